@@ -0,0 +1,206 @@
+"""ASGI-обёртка над синхронным Django.
+
+Django 2.2 не умеет асинхронные представления, поэтому представления
+выполняются в ограниченном пуле потоков (ASGI_THREADS), а event loop
+принимает соединения и отдаёт тела ответов. Поток занят только
+на время работы представления: медленный клиент, читающий ответ,
+ждёт в event loop и поток не держит. Потоковый ответ
+(StreamingHttpResponse) целиком читается одним потоком пула: его
+генераторы и соединения с базой привязаны к потоку. Поток передаёт
+части в event loop через очередь на STREAM_BUFFER частей и ждёт, если
+клиент читает медленнее.
+"""
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+STREAM_BUFFER = 8
+
+
+def build_environ(scope, body):
+    """WSGI environ из HTTP scope по PEP 3333 и спецификации ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    path = scope['path'].encode('utf-8').decode('latin-1')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': path,
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_application, max_threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_threads,
+            thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Протокол {scope["type"]} не поддерживается')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def http(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = build_environ(scope, body)
+        status, headers, chunks, response = await self.run(
+            self.call_view, environ
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        pump = None
+        try:
+            for chunk in chunks:
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            if response is not None:
+                pump = StreamPump(response, asyncio.get_running_loop())
+                self.executor.submit(pump.run)
+                async for chunk in pump:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if pump is not None:
+                pump.stop()
+            elif response is not None and hasattr(response, 'close'):
+                await self.run(response.close)
+
+    def call_view(self, environ):
+        """Выполняется в пуле. Обычный ответ собирается и закрывается
+        в том же потоке: сигнал request_finished закрывает соединения
+        с базой именно этого потока."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        response = self.wsgi_application(environ, start_response)
+        if getattr(response, 'streaming', False):
+            return started['status'], started['headers'], [], response
+        try:
+            chunks = [chunk for chunk in response if chunk]
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return started['status'], started['headers'], chunks, None
+
+
+class StreamPump:
+    """Потоковый ответ, который читает и закрывает один поток пула
+    (run), а event loop забирает части асинхронной итерацией."""
+
+    def __init__(self, response, loop):
+        self.response = response
+        self.loop = loop
+        self.chunks = asyncio.Queue()
+        self.space = threading.Semaphore(STREAM_BUFFER)
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            for chunk in self.response:
+                if not chunk:
+                    continue
+                self.space.acquire()
+                if self.stopped.is_set():
+                    break
+                self._put(chunk)
+        except Exception as error:
+            self._put(error)
+        finally:
+            if hasattr(self.response, 'close'):
+                self.response.close()
+            self._put(None)
+
+    def _put(self, item):
+        self.loop.call_soon_threadsafe(self.chunks.put_nowait, item)
+
+    def stop(self):
+        """Клиент отключился или отправка упала: поток прекращает
+        чтение после текущей части."""
+        self.stopped.set()
+        self.space.release()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.chunks.get()
+        self.space.release()
+        if item is None:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+def get_asgi_application():
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    wsgi_application = get_wsgi_application()
+    return AsgiHandler(wsgi_application, settings.ASGI_THREADS)
@@ -0,0 +1,531 @@
+"""Сценарии замеров для команды `python manage.py benchmark <сценарий>`.
+
+Каждый сценарий регистрируется декоратором @scenario, получает поток
+вывода и число повторов и печатает таблицу результатов.
+"""
+import time
+from contextlib import contextmanager
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+def timed(func, repeat):
+    """Среднее время одного вызова в миллисекундах."""
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def report(stdout, title, rows):
+    stdout.write(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        stdout.write(f'  {label:<{width}}  {value}')
+
+
+def _fake_page(size):
+    """Страница ленты из несохранённых объектов: замер только рендера."""
+    from django.contrib.auth import get_user_model
+    from django.core.paginator import Paginator
+    from django.utils import timezone
+
+    from posts.models import Group, Post
+
+    User = get_user_model()
+    group = Group(id=1, title='Группа', slug='bench', description='...')
+    author = User(id=1, username='bench', first_name='Лев', last_name='Т.')
+    posts = [
+        Post(
+            id=number,
+            text='Текст поста ' * 20,
+            pub_date=timezone.now(),
+            author=author,
+            group=group,
+        )
+        for number in range(1, size + 1)
+    ]
+    for post in posts:
+        post.fill_excerpt()
+    return group, Paginator(posts, size).page(1)
+
+
+def _engines():
+    from django.conf import settings
+    from django.template import Engine
+    from django.template.backends.django import get_installed_libraries
+
+    options = {
+        'dirs': [settings.TEMPLATES_DIR],
+        'libraries': get_installed_libraries(),
+    }
+    default_loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    return (
+        ('по умолчанию', Engine(loaders=default_loaders, **options)),
+        ('кешированный', Engine(
+            loaders=[('django.template.loaders.cached.Loader',
+                      default_loaders)],
+            **options
+        )),
+    )
+
+
+@scenario('templates')
+def template_rendering(stdout, repeat):
+    """Рендер ленты из POSTS_PER_PAGE карточек: загрузчик шаблонов
+    по умолчанию против кешированного, include против preloaded_include."""
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.template import Context
+    from django.test import RequestFactory
+
+    request = RequestFactory().get('/group/bench/')
+    request.user = AnonymousUser()
+    group, page_obj = _fake_page(settings.POSTS_PER_PAGE)
+    loops = (
+        ('include', "{% for post in page_obj %}"
+                    "{% include 'includes/post_card.html' %}{% endfor %}"),
+        ('preloaded_include',
+         "{% load preload %}{% for post in page_obj %}"
+         "{% preloaded_include 'includes/post_card.html' %}{% endfor %}"),
+    )
+    rows = []
+    for loader, engine in _engines():
+        def context():
+            return Context({
+                'request': request,
+                'user': request.user,
+                'group': group,
+                'page_obj': page_obj,
+            })
+        for label, source in loops:
+            compiled = engine.from_string(source)
+            rows.append((
+                f'{loader} загрузчик, {label} в цикле',
+                f'{timed(lambda: compiled.render(context()), repeat):.2f} мс',
+            ))
+
+        def whole_page():
+            page = engine.get_template('posts/group_list.html')
+            return page.render(context())
+        rows.append((
+            f'{loader} загрузчик, posts/group_list.html целиком',
+            f'{timed(whole_page, repeat):.2f} мс',
+        ))
+    report(stdout, 'Рендер страницы ленты:', rows)
+
+
+class _SqliteWorkload:
+    """Читатели выбирают страницу ленты, пока писатели вставляют
+    посты по одному в транзакции."""
+
+    def __init__(self, path, pragmas):
+        import threading
+
+        self.path = path
+        self.pragmas = pragmas
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = {
+            'reads': 0, 'writes': 0, 'locked': 0, 'slowest_read': 0.0
+        }
+
+    def connect(self):
+        import sqlite3
+
+        from core.db.sqlite import pragma_statements
+
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        for statement in pragma_statements(self.pragmas):
+            connection.execute(statement)
+        return connection
+
+    def count(self, name, elapsed=0.0):
+        with self.lock:
+            self.stats[name] += 1
+            self.stats['slowest_read'] = max(
+                self.stats['slowest_read'], elapsed
+            )
+
+    def fill(self):
+        connection = self.connect()
+        connection.execute(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, '
+            'pub_date REAL)'
+        )
+        connection.executemany(
+            'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+            [('Текст поста ' * 20, number) for number in range(1000)]
+        )
+        connection.close()
+
+    def reader(self):
+        import sqlite3
+
+        connection = self.connect()
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            try:
+                connection.execute(
+                    'SELECT id, text FROM post ORDER BY pub_date DESC '
+                    'LIMIT 10'
+                ).fetchall()
+            except sqlite3.OperationalError:
+                self.count('locked')
+                continue
+            self.count('reads', time.perf_counter() - started)
+        connection.close()
+
+    def writer(self):
+        import sqlite3
+
+        connection = self.connect()
+        while not self.stop.is_set():
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute(
+                    'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+                    ('Новый пост', time.time())
+                )
+                connection.execute('COMMIT')
+            except sqlite3.OperationalError:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                self.count('locked')
+                continue
+            self.count('writes')
+        connection.close()
+
+    def run(self, readers, writers, duration):
+        import threading
+
+        self.fill()
+        threads = [
+            threading.Thread(target=self.reader) for _ in range(readers)
+        ] + [threading.Thread(target=self.writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        return self.stats
+
+
+@scenario('sqlite')
+def sqlite_concurrency(stdout, repeat):
+    """Пропускная способность чтения во время потока записей:
+    журнал отката по умолчанию против профиля SQLITE_PRAGMAS.
+    repeat - длительность каждого прогона в десятых долях секунды."""
+    import os
+    import tempfile
+
+    from django.conf import settings
+
+    profiles = (
+        ('журнал отката', {'journal_mode': 'DELETE', 'synchronous': 'FULL'}),
+        ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS),
+    )
+    duration = repeat / 10
+    rows = []
+    for label, pragmas in profiles:
+        with tempfile.TemporaryDirectory() as directory:
+            workload = _SqliteWorkload(
+                os.path.join(directory, 'bench.sqlite3'), pragmas
+            )
+            stats = workload.run(readers=4, writers=2, duration=duration)
+        rows.append((
+            label,
+            f'чтений/с {stats["reads"] / duration:.0f}, '
+            f'записей/с {stats["writes"] / duration:.0f}, '
+            f'ошибок блокировки {stats["locked"]}, '
+            f'самое долгое чтение {stats["slowest_read"] * 1000:.1f} мс',
+        ))
+    report(stdout, 'SQLite под потоком записей:', rows)
+
+
+@contextmanager
+def _test_database():
+    """Временная тестовая база: сценарии с записью не трогают
+    рабочие данные."""
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@scenario('comments')
+def comment_burst(stdout, repeat):
+    """Всплеск из repeat комментариев к одному посту: запись в запросе
+    против очереди WRITE_BEHIND со сбросом одним пакетом."""
+    import tempfile
+
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+
+    from posts import write_behind
+    from posts.models import Comment, Post
+
+    User = get_user_model()
+    with _test_database(), tempfile.TemporaryDirectory() as spool:
+        readers = [
+            User.objects.create_user(username=f'reader_{number}')
+            for number in range(10)
+        ]
+        post = Post.objects.create(author=readers[0], text='Вирусный пост')
+
+        def inline():
+            started = time.perf_counter()
+            for number in range(repeat):
+                Comment.objects.create(
+                    post=post, author=readers[number % 10], text='Комментарий'
+                )
+            return time.perf_counter() - started, 0.0
+
+        def queued():
+            started = time.perf_counter()
+            for number in range(repeat):
+                write_behind.enqueue_comment(
+                    readers[number % 10], post, 'Комментарий'
+                )
+            enqueued = time.perf_counter() - started
+            started = time.perf_counter()
+            write_behind.flush()
+            return enqueued, time.perf_counter() - started
+
+        rows = []
+        with override_settings(WRITE_BEHIND=True, WRITE_BEHIND_DIR=spool):
+            for label, burst in (('в запросе', inline), ('очередь', queued)):
+                in_requests, flushing = burst()
+                rows.append((
+                    label,
+                    f'{in_requests * 1000 / repeat:.3f} мс на запрос, '
+                    f'сброс {flushing * 1000:.1f} мс',
+                ))
+    report(stdout, f'Всплеск из {repeat} комментариев:', rows)
+
+
+# Задержка медленного клиента на каждую часть ответа, секунд.
+SLOW_CLIENT_DELAY = 0.05
+
+INDEX_SCOPE = {
+    'type': 'http',
+    'method': 'GET',
+    'path': '/',
+    'query_string': b'',
+    'headers': [(b'host', b'testserver')],
+    'server': ('testserver', 80),
+}
+
+
+def _wsgi_slow_clients(wsgi_application, repeat, threads):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from core.asgi import build_environ
+
+    def handle():
+        response = wsgi_application(
+            build_environ(INDEX_SCOPE, b''), lambda status, headers: None
+        )
+        for _ in response:
+            time.sleep(SLOW_CLIENT_DELAY)
+        response.close()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(handle) for _ in range(repeat)]:
+            future.result()
+
+
+def _asgi_slow_clients(wsgi_application, repeat, threads):
+    import asyncio
+
+    from core.asgi import AsgiHandler
+
+    application = AsgiHandler(wsgi_application, threads)
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        if message.get('body'):
+            await asyncio.sleep(SLOW_CLIENT_DELAY)
+
+    async def clients():
+        await asyncio.gather(*(
+            application(INDEX_SCOPE, receive, send) for _ in range(repeat)
+        ))
+
+    asyncio.run(clients())
+    application.executor.shutdown()
+
+
+@scenario('serving')
+def slow_clients(stdout, repeat):
+    """repeat запросов главной от медленных клиентов: синхронный
+    WSGI-сервер с ASGI_THREADS потоками против yatube.asgi с тем же
+    пулом. В WSGI поток ждёт, пока клиент дочитает ответ."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.wsgi import get_wsgi_application
+
+    from posts.models import Post
+
+    threads = settings.ASGI_THREADS
+    wsgi_application = get_wsgi_application()
+    with _test_database():
+        author = get_user_model().objects.create_user(username='bench')
+        posts = [
+            Post(author=author, text='Текст поста ' * 20) for _ in range(30)
+        ]
+        for post in posts:
+            post.fill_excerpt()
+        Post.objects.bulk_create(posts)
+        rows = []
+        for label, run in (
+            ('WSGI', _wsgi_slow_clients),
+            ('ASGI', _asgi_slow_clients),
+        ):
+            started = time.perf_counter()
+            run(wsgi_application, repeat, threads)
+            elapsed = time.perf_counter() - started
+            rows.append((label, f'{repeat / elapsed:.0f} запросов/с'))
+    report(
+        stdout,
+        f'{repeat} медленных клиентов, {threads} потоков:',
+        rows
+    )
+
+
+@scenario('streaming')
+def time_to_first_byte(stdout, repeat):
+    """Время до первой части ответа и до конца ответа для страницы
+    поста с repeat комментариями: render() против потокового рендера.
+    Кеш страниц отключён - меряется сам рендер."""
+    from django.contrib.auth import get_user_model
+    from django.core.wsgi import get_wsgi_application
+    from django.test import override_settings
+
+    from core.asgi import build_environ
+    from posts import threads
+    from posts.models import Comment, Post
+
+    wsgi_application = get_wsgi_application()
+    # Все комментарии - на одной странице ветки.
+    with _test_database(), override_settings(
+        PAGE_CACHE_ENABLED=False, COMMENTS_PER_PAGE=repeat
+    ):
+        author = get_user_model().objects.create_user(username='bench')
+        post = Post.objects.create(author=author, text='Длинное обсуждение')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text='Комментарий ' * 10)
+            for _ in range(repeat)
+        )
+        threads.link(Comment.objects.filter(post=post))
+        scope = dict(INDEX_SCOPE, path=f'/posts/{post.id}/')
+        rows = []
+        for label, streaming in (('render()', False), ('поток', True)):
+            with override_settings(STREAMING_RENDER=streaming):
+                started = time.perf_counter()
+                response = wsgi_application(
+                    build_environ(scope, b''), lambda status, headers: None
+                )
+                parts = iter(response)
+                next(parts)
+                first = time.perf_counter() - started
+                for _ in parts:
+                    pass
+                response.close()
+                total = time.perf_counter() - started
+            rows.append((
+                label,
+                f'первый байт {first * 1000:.1f} мс, '
+                f'весь ответ {total * 1000:.1f} мс',
+            ))
+    report(stdout, f'Страница поста с {repeat} комментариями:', rows)
+
+
+def _retained(build):
+    """Память, удерживаемая результатом build(), в килобайтах."""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        result = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return size / 1024
+
+
+@scenario('cards')
+def feed_objects(stdout, repeat):
+    """Страница ленты из POSTS_PER_PAGE постов: экземпляры моделей
+    против карточек со __slots__. Время и удерживаемая память на
+    сборку страницы, включая чтение из базы или кеша объектов."""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+
+    from posts.cards import get_cards
+    from posts.models import Group, Post
+    from posts.object_cache import POSTS
+
+    with _test_database():
+        group = Group.objects.create(
+            title='Группа', slug='bench', description='...'
+        )
+        authors = [
+            get_user_model().objects.create_user(
+                username=f'bench_{number}', first_name='Лев', last_name='Т.'
+            )
+            for number in range(3)
+        ]
+        ids = [
+            Post.objects.create(
+                author=authors[number % 3], group=group,
+                text='Текст поста ' * 20
+            ).id
+            for number in range(settings.POSTS_PER_PAGE)
+        ]
+
+        def models():
+            return list(Post.objects.select_related(
+                'author', 'group'
+            ).filter(id__in=ids))
+
+        def uncached(build):
+            def run():
+                cache.clear()
+                return build(ids)
+            return run
+
+        variants = (
+            ('модели, select_related', models),
+            ('модели из кеша объектов', lambda: POSTS.get_many(ids)),
+            ('карточки из кеша объектов', lambda: get_cards(ids)),
+            ('модели, промах кеша', uncached(POSTS.get_many)),
+            ('карточки, промах кеша', uncached(get_cards)),
+        )
+        rows = []
+        for label, build in variants:
+            rows.append((
+                label,
+                f'{timed(build, repeat):.3f} мс, '
+                f'{_retained(build):.1f} КБ',
+            ))
+    report(stdout, f'Сборка страницы из {len(ids)} постов:', rows)
@@ -0,0 +1,49 @@
+"""Фильтр Блума: множество строк без хранения самих строк.
+
+Ответ «нет» точный, ответ «возможно» ошибается с вероятностью
+error_rate, пока в фильтр добавлено не больше capacity ключей.
+Позиции битов считаются двойным хешированием одного дайджеста blake2b.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(64, math.ceil(
+            -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        )
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    @property
+    def full(self):
+        """Добавлено больше ключей, чем рассчитан фильтр:
+        доля ложных «возможно» растёт, пора пересобрать."""
+        return self.count > self.capacity
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.security)
+def production_debug_check(app_configs, **kwargs):
+    """Не даёт запустить профиль prod с отладочными средствами."""
+    if settings.ENVIRONMENT != 'prod':
+        return []
+    errors = []
+    if settings.DEBUG:
+        errors.append(Error(
+            'DEBUG включён в профиле prod.',
+            hint='Уберите DEBUG=True из окружения.',
+            id='core.E001',
+        ))
+    if 'debug_toolbar' in settings.INSTALLED_APPS:
+        errors.append(Error(
+            'debug_toolbar подключён в профиле prod.',
+            hint='Отладочная панель хранит все SQL-запросы в памяти.',
+            id='core.E002',
+        ))
+    if any('debug_toolbar' in path for path in settings.MIDDLEWARE):
+        errors.append(Error(
+            'DebugToolbarMiddleware подключён в профиле prod.',
+            id='core.E003',
+        ))
+    return errors
+
+
+# Кеши, которые не видны другим процессам.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """Штампы версий, кеш страниц, фильтры существования и списки лент
+    согласуют рабочие процессы через кеш default."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    errors = []
+    if settings.ENVIRONMENT == 'prod':
+        errors.append(Error(
+            'Кеш default хранится в памяти процесса.',
+            hint='Задайте общий кеш: CACHE_LOCATION для memcached.',
+            id='core.E004',
+        ))
+    if not settings.TASKS_EAGER:
+        errors.append(Error(
+            'Кеш default хранится в памяти процесса, а задачи выполняет '
+            'отдельный процесс run_tasks.',
+            hint='Ленты подписчиков, которые меняет задача, не увидят '
+                 'процессы сайта: задайте общий кеш или TASKS_EAGER=True.',
+            id='core.E005',
+        ))
+    return errors
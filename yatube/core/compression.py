@@ -0,0 +1,82 @@
+"""Сжатие ответов: brotli, если пакет установлен, иначе gzip."""
+import re
+import zlib
+
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+)
+
+re_accepts_br = re.compile(r'\bbr\b')
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def choose_encoding(request):
+    """Лучшее из поддерживаемых клиентом сжатий или None."""
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli and re_accepts_br.search(accept):
+        return 'br'
+    if re_accepts_gzip.search(accept):
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type):
+    return content_type.split(';')[0].strip() in COMPRESSIBLE_TYPES
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, mode=brotli.MODE_TEXT)
+    return compress_string(content)
+
+
+def compress_stream(sequence, encoding):
+    if encoding == 'br':
+        return _brotli_sequence(sequence)
+    return _gzip_sequence(sequence)
+
+
+def _gzip_sequence(sequence):
+    """compress_sequence из Django копит данные в буфере zlib до конца
+    ответа; Z_SYNC_FLUSH отдаёт каждую часть сразу."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for item in sequence:
+        data = compressor.compress(item) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT)
+    for item in sequence:
+        # flush - чтобы каждая часть потокового ответа уходила сразу.
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_variants(content):
+    """Все варианты сжатия для хранения рядом с закешированной страницей."""
+    return {
+        encoding: compress(content, encoding)
+        for encoding in available_encodings()
+    }
@@ -0,0 +1,73 @@
+"""PostgreSQL с пулом соединений.
+
+В конце запроса Django закрывает соединение (CONN_MAX_AGE = 0),
+а этот бэкенд вместо закрытия возвращает его в пул. Настройки пула -
+ключ POOL в описании базы: max_size, timeout, check_interval.
+"""
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db import pool
+
+from .creation import DatabaseCreation
+
+Database = base.Database
+
+
+def ping(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+def reset(connection):
+    """Откатывает незавершённую транзакцию. Соединение в неизвестном
+    состоянии (разрыв посреди запроса) повторно не выдаётся."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        # Служебное соединение с базой postgres при создании тестовой
+        # базы живёт недолго и не закрывается явно - пул ему не нужен.
+        if self.alias == NO_DB_ALIAS:
+            self._connection_pool = None
+            return super().get_new_connection(conn_params)
+        self._connection_pool = pool.get_pool(
+            repr(sorted(conn_params.items())),
+            lambda: Database.connect(**conn_params),
+            ping=ping,
+            reset=reset,
+            **self.settings_dict.get('POOL', {})
+        )
+        connection = self._connection_pool.acquire()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None or self._connection_pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            self._connection_pool.release(self.connection)
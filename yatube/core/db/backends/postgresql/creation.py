@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+from core.db import pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Свободные соединения пула держат тестовую базу открытой,
+        # и DROP DATABASE без их закрытия не пройдёт.
+        pool.close_all()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,117 @@
+"""Пул соединений с базой данных.
+
+Пул не зависит от драйвера: соединения создаёт функция connect,
+проверяет ping, а reset готовит соединение к повторной выдаче.
+Соединение, пролежавшее в пуле дольше check_interval секунд, перед
+выдачей проверяется запросом SELECT 1 - так оборванные сервером
+соединения не попадают в представления.
+"""
+import os
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, ping, reset, max_size=10, timeout=10,
+                 check_interval=30):
+        self._connect = connect
+        self._ping = ping
+        self._reset = reset
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _take(self, deadline):
+        """Свободное соединение с временем возврата или (None, None),
+        если можно открыть новое."""
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(
+                        f'Все {self.max_size} соединений заняты'
+                    )
+                self._condition.wait(remaining)
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection, released_at = self._take(deadline)
+            if connection is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._forget()
+                    raise
+            idle = time.monotonic() - released_at
+            if idle < self.check_interval or self._ping(connection):
+                return connection
+            self._discard(connection)
+
+    def release(self, connection):
+        try:
+            reusable = not self._closed and self._reset(connection)
+        except Exception:
+            reusable = False
+        if not reusable:
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, connect, **options):
+    """Пул для набора параметров соединения. После fork дочерний
+    процесс получает свои пулы: сокеты родителя не переиспользуются."""
+    key = (os.getpid(), key)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(connect, **options)
+        return _pools[key]
+
+
+def close_all():
+    """Закрывает свободные соединения всех пулов процесса.
+    Занятые соединения закроются при возврате."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,125 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплика используется только представлениями, помеченными
+@read_from_replica, и только если пользователь недавно ничего
+не записывал: после записи middleware ставит cookie, и в течение
+REPLICA_PIN_SECONDS его чтения идут в основную базу - так автор
+сразу видит свой пост, даже если реплика отстаёт. Вход в аккаунт
+(сессия и last_login) записью не считается.
+
+Общие кеши (страниц, объектов) заполняются только из основной базы:
+иначе отстающая реплика закрепила бы устаревшие данные под новым
+ключом. Для того же ответы, прочитанные с реплики, не получают
+валидаторов (replica_used).
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+PIN_COOKIE = 'pin_primary'
+
+_replica_allowed = contextvars.ContextVar('replica_allowed', default=False)
+
+_wrote = contextvars.ContextVar('wrote', default=False)
+
+_replica_used = contextvars.ContextVar('replica_used', default=False)
+
+# Записи, после которых не нужно читать из основной базы.
+UNPINNED_MODELS = {'sessions.session'}
+
+
+def start_request():
+    _replica_allowed.set(False)
+    _wrote.set(False)
+    _replica_used.set(False)
+
+
+def wrote():
+    """Была ли запись в базу в текущем запросе."""
+    return _wrote.get()
+
+
+def record_write():
+    """Для роутеров, выбирающих базу записи раньше ReplicaRouter."""
+    _wrote.set(True)
+
+
+def replica_used():
+    """Читал ли текущий запрос с реплики."""
+    return _replica_used.get()
+
+
+def replica_possible():
+    """Могут ли чтения в текущем контексте пойти на реплику."""
+    return bool(settings.DATABASE_REPLICAS) and _replica_allowed.get()
+
+
+@contextmanager
+def primary():
+    """Чтения внутри блока идут в основную базу."""
+    token = _replica_allowed.set(False)
+    try:
+        yield
+    finally:
+        _replica_allowed.reset(token)
+
+
+def primary_iter(iterable):
+    """Итератор, каждый шаг которого читает из основной базы:
+    для потоковых ответов, рендерящихся после выхода из view."""
+    iterator = iter(iterable)
+    while True:
+        with primary():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _pins(model, instance):
+    """Запись, которую пользователь должен сразу увидеть. Обновление
+    существующего пользователя (last_login при входе, пароль)
+    на страницах не видно."""
+    label = model._meta.label_lower
+    if label in UNPINNED_MODELS:
+        return False
+    if label == settings.AUTH_USER_MODEL.lower() and instance is not None:
+        return instance._state.adding
+    return True
+
+
+def read_from_replica(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _replica_allowed.set(PIN_COOKIE not in request.COOKIES)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_allowed.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if replica_possible():
+            _replica_used.set(True)
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        if _pins(model, hints.get('instance')):
+            record_write()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема на реплики приходит репликацией.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,59 @@
+"""Настройка SQLite для небольших установок.
+
+При открытии соединения выполняются PRAGMA из SQLITE_PRAGMAS:
+WAL-журнал позволяет читать во время записи, synchronous=NORMAL
+не ждёт fsync на каждой транзакции, busy_timeout заставляет
+писателя подождать блокировку, а не сразу падать с
+«database is locked». Если блокировка всё же не дождалась,
+запись повторяется retry_on_locked. Оборачивается сама запись
+(save, create, delete), а не представление: повтор представления
+повторил бы уже закоммиченные записи и их сигналы.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def pragma_statements(pragmas=None):
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements():
+            cursor.execute(statement)
+
+
+def is_locked(error):
+    return 'locked' in str(error)
+
+
+def retry_on_locked(func):
+    """Повторяет запись, если база занята другим писателем:
+    retry_on_locked(post.save)(). func - одна запись или транзакция.
+    Внутри транзакции повтор бессмысленен - ошибка пробрасывается."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        delay = settings.SQLITE_LOCK_RETRY_DELAY
+        for attempt in range(settings.SQLITE_LOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as error:
+                if (
+                    not is_locked(error)
+                    or attempt == settings.SQLITE_LOCK_RETRIES
+                    or transaction.get_connection().in_atomic_block
+                ):
+                    raise
+            time.sleep(delay)
+            delay *= 2
+    return wrapper
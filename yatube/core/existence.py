@@ -0,0 +1,179 @@
+"""Быстрые ответы 404 на адреса несуществующих объектов.
+
+Для каждого вида ключей (имена пользователей, слаги групп, id постов)
+процесс держит фильтр Блума по всем существующим значениям. Если фильтр
+говорит «нет», представление не вызывается и база не опрашивается.
+Ложные «возможно» и удалённые объекты доходят до get_object_or_404,
+а их 404 запоминается в кеше на EXISTENCE_NEGATIVE_TIMEOUT секунд.
+
+Фильтры процессов синхронизируются через общий кеш (в профиле prod -
+memcached, см. core.checks): запись объекта увеличивает счётчик
+поколения и кладёт ключ под номером поколения.
+Процесс, отставший на несколько поколений, дочитывает ключи одним
+get_many; если ключей уже нет в кеше или кеш очищен, фильтр
+пересобирается из базы. Счётчик живёт внутри «эпохи» - случайного
+имени, которое меняется, если счётчик потерян, - поэтому очистка кеша
+не может совпасть с уже прочитанным номером поколения.
+"""
+import hashlib
+import threading
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .bloom import BloomFilter
+
+KEY_PREFIX = 'existence:'
+
+# Сколько поколений процесс дочитывает из кеша, прежде чем
+# предпочесть полную пересборку.
+MAX_CATCH_UP = 500
+
+# Сколько живут в кеше ключи поколений.
+ADDED_TIMEOUT = 24 * 60 * 60
+
+
+class ExistenceFilter:
+    """keys - функция без аргументов, возвращающая все существующие
+    значения ключа (выполняется при пересборке)."""
+
+    def __init__(self, name, keys):
+        self.name = name
+        self.keys = keys
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._epoch = None
+        self._generation = 0
+
+    def _key(self, *parts):
+        return KEY_PREFIX + ':'.join((self.name,) + parts)
+
+    def _missing_key(self, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return self._key('missing', digest)
+
+    def _current(self):
+        """Эпоха и номер поколения из общего кеша. Потерянный счётчик
+        начинает новую эпоху."""
+        epoch = cache.get(self._key('epoch'))
+        generation = None
+        if epoch is not None:
+            generation = cache.get(self._key(epoch, 'generation'))
+        if generation is None:
+            epoch = uuid.uuid4().hex
+            cache.set(self._key(epoch, 'generation'), 0, timeout=None)
+            cache.set(self._key('epoch'), epoch, timeout=None)
+            generation = 0
+        return epoch, generation
+
+    def _catch_up(self, epoch, generation):
+        """Дочитывает ключи, добавленные другими процессами.
+        Возвращает False, если нужна полная пересборка."""
+        if self._bloom is None or epoch != self._epoch:
+            return False
+        if generation - self._generation > MAX_CATCH_UP:
+            return False
+        names = [
+            self._key(epoch, 'added', str(number))
+            for number in range(self._generation + 1, generation + 1)
+        ]
+        added = cache.get_many(names)
+        if len(added) != len(names):
+            return False
+        self._bloom.update(added.values())
+        self._generation = generation
+        return not self._bloom.full
+
+    def rebuild(self):
+        """Полная пересборка из базы. Номер поколения читается до
+        запроса: ключи, добавленные во время чтения, дочитаются потом."""
+        with self._lock:
+            self._rebuild(*self._current())
+
+    def _rebuild(self, epoch, generation):
+        values = [str(value) for value in self.keys()]
+        bloom = BloomFilter(
+            max(len(values) * 2, settings.EXISTENCE_FILTER_MIN_CAPACITY),
+            settings.EXISTENCE_FILTER_ERROR_RATE
+        )
+        bloom.update(values)
+        self._bloom, self._epoch, self._generation = bloom, epoch, generation
+
+    def might_exist(self, value):
+        with self._lock:
+            epoch, generation = self._current()
+            if generation != self._generation or epoch != self._epoch:
+                if not self._catch_up(epoch, generation):
+                    self._rebuild(epoch, generation)
+            elif self._bloom is None:
+                self._rebuild(epoch, generation)
+            return str(value) in self._bloom
+
+    def known_missing(self, value):
+        """Точно известно, что объекта нет: фильтр его не знает
+        или недавний поиск в базе ничего не нашёл."""
+        if not self.might_exist(value):
+            return True
+        return bool(cache.get(self._missing_key(value)))
+
+    def remember_missing(self, value):
+        cache.set(
+            self._missing_key(value), True,
+            settings.EXISTENCE_NEGATIVE_TIMEOUT
+        )
+
+    def forget_missing(self, value):
+        cache.delete(self._missing_key(value))
+
+    def stamp(self):
+        """(эпоха, поколение): меняется при каждом добавлении ключа."""
+        return self._current()
+
+    def add(self, value):
+        """Объект создан: ключ попадает в фильтры всех процессов,
+        запомненный 404 сбрасывается - после нового поколения, см.
+        guard_missing."""
+        epoch, _ = self._current()
+        try:
+            generation = cache.incr(self._key(epoch, 'generation'))
+        except ValueError:
+            # Счётчик пропал между чтением и записью: новая эпоха
+            # заставит процессы пересобрать фильтры.
+            cache.delete(self._key('epoch'))
+            self.forget_missing(value)
+            return
+        cache.set(
+            self._key(epoch, 'added', str(generation)), str(value),
+            ADDED_TIMEOUT
+        )
+        self.forget_missing(value)
+
+
+def guard_missing(existence_filter, kwarg, not_found):
+    """Декоратор представления: ключ из аргумента kwarg проверяется
+    фильтром до вызова представления. not_found(request) - ответ
+    на известный промах; 404 самого представления запоминается.
+
+    Объект мог появиться, пока представление искало его в базе. Тогда
+    поколение фильтра уже сменилось, и промах не запоминается (или
+    сбрасывается: add увеличивает поколение раньше, чем удаляет
+    запомненный промах)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            value = kwargs[kwarg]
+            if existence_filter.known_missing(value):
+                return not_found(request)
+            before = existence_filter.stamp()
+            try:
+                return view(request, *args, **kwargs)
+            except Http404:
+                existence_filter.remember_missing(value)
+                if existence_filter.stamp() != before:
+                    existence_filter.forget_missing(value)
+                raise
+        return wrapper
+    return decorator
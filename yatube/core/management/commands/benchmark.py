@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Запускает сценарий замера производительности'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(SCENARIOS))
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Количество повторов замера'
+        )
+
+    def handle(self, *args, **options):
+        SCENARIOS[options['scenario']](self.stdout, options['repeat'])
@@ -0,0 +1,91 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+USER = 'yatube'
+
+PORT = 5432
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет тесты на временном локальном PostgreSQL: '
+        'кластер создаётся во временном каталоге и удаляется после прогона'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels',
+            nargs='*',
+            default=['posts', 'core'],
+            help='Приложения или модули с тестами'
+        )
+        parser.add_argument(
+            '--pytest',
+            action='store_true',
+            help='Дополнительно запустить тесты pytest из корня репозитория'
+        )
+
+    def handle(self, *args, **options):
+        for binary in ('initdb', 'pg_ctl'):
+            if shutil.which(binary) is None:
+                raise CommandError(
+                    f'Не найдена утилита {binary}: установите PostgreSQL '
+                    'и добавьте его bin в PATH'
+                )
+        with tempfile.TemporaryDirectory(prefix='yatube-pg-') as directory:
+            data = os.path.join(directory, 'data')
+            subprocess.run(
+                ['initdb', '-D', data, '-U', USER, '-E', 'UTF8',
+                 '--auth=trust'],
+                stdout=subprocess.DEVNULL,
+                check=True
+            )
+            # Только unix-сокет во временном каталоге: экземпляр
+            # не конфликтует с уже запущенным PostgreSQL.
+            subprocess.run(
+                ['pg_ctl', '-D', data, '-w', '-l',
+                 os.path.join(directory, 'postgres.log'),
+                 '-o', f"-k {directory} -p {PORT} -F -c listen_addresses=''",
+                 'start'],
+                stdout=subprocess.DEVNULL,
+                check=True
+            )
+            try:
+                code = self.run_tests(directory, options)
+            finally:
+                subprocess.run(
+                    ['pg_ctl', '-D', data, '-w', '-m', 'fast', 'stop'],
+                    stdout=subprocess.DEVNULL
+                )
+        if code:
+            raise CommandError('Тесты на PostgreSQL не прошли')
+
+    def run_tests(self, socket_dir, options):
+        env = dict(
+            os.environ,
+            DJANGO_ENV='test',
+            DB_ENGINE='postgresql',
+            DB_NAME='yatube',
+            POSTGRES_USER=USER,
+            POSTGRES_PASSWORD='',
+            DB_HOST=socket_dir,
+            DB_PORT=str(PORT),
+        )
+        code = subprocess.run(
+            [sys.executable, 'manage.py', 'test', *options['labels']],
+            cwd=settings.BASE_DIR,
+            env=env
+        ).returncode
+        if code == 0 and options['pytest']:
+            code = subprocess.run(
+                [sys.executable, '-m', 'pytest', '-q'],
+                cwd=os.path.dirname(settings.BASE_DIR),
+                env=env
+            ).returncode
+        return code
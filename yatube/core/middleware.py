@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from . import compression
+from .db import routers
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает HTML и JSON (brotli или gzip). Ответы, уже сжатые
+    кешем страниц, пропускает - только делает их ETag слабым."""
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            if getattr(response, 'precompressed', False):
+                self._weaken_etag(response)
+            return response
+        if not compression.is_compressible(response.get('Content-Type', '')):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            compressed = compression.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        self._weaken_etag(response)
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _weaken_etag(response):
+        """Сжатое и несжатое представления отличаются побайтно,
+        поэтому сильный ETag становится слабым (RFC 7232, 2.1)."""
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """После записи в базу закрепляет пользователя за основной базой
+    на REPLICA_PIN_SECONDS секунд (см. core.db.routers)."""
+    def process_request(self, request):
+        routers.start_request()
+
+    def process_response(self, request, response):
+        if routers.wrote():
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
@@ -0,0 +1,178 @@
+"""Кеш объектов моделей со сквозным чтением.
+
+В кеше хранится строка модели - кортеж значений столбцов, а не
+pickle экземпляра со связанными объектами: связи (автор и группа поста)
+подтягиваются из своих кешей одним get_many на всю пачку. В ключ входит
+хеш списка столбцов, поэтому после миграции старые строки не читаются.
+
+Поиск по уникальному полю (слаг, имя пользователя) идёт через ключ-
+псевдоним с pk. Псевдонимы не сбрасываются: найденный объект сверяется
+с запрошенным значением, и при расхождении выполняется запрос к базе.
+Сами объекты сбрасываются сигналами при сохранении и удалении.
+
+Для моделей на нескольких базах shard(pk) называет базу строки
+(None - базу выбирает роутер); промахи читаются по запросу на базу.
+Промахи читаются из основной базы, а не с реплики: строка остаётся
+в кеше надолго, и отставание реплики не должно в нём закрепиться.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.db.models.fields.files import FieldFile
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .db import routers
+
+KEY_PREFIX = 'object:'
+
+
+class ObjectCache:
+    """related - {имя внешнего ключа: ObjectCache связанной модели}.
+    fields - столбцы, если нужны не все (строки для get_rows).
+    shard - функция pk -> база строки."""
+
+    def __init__(self, model, related=None, fields=None, shard=None):
+        self.model = model
+        self.related = related or {}
+        self._fields = fields
+        self.shard = shard
+
+    @cached_property
+    def fields(self):
+        if self._fields is not None:
+            return list(self._fields)
+        return [field.attname for field in self.model._meta.concrete_fields]
+
+    @cached_property
+    def prefix(self):
+        version = hashlib.md5(':'.join(self.fields).encode()).hexdigest()
+        return f'{KEY_PREFIX}{self.model._meta.label_lower}:{version[:8]}:'
+
+    def _key(self, pk):
+        return f'{self.prefix}{pk}'
+
+    def _alias_key(self, field, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return f'{self.prefix}{field}:{digest}'
+
+    def _pack(self, obj):
+        """Значения как у values_list: у файлов - имя, а не FieldFile
+        со ссылкой на экземпляр."""
+        values = (getattr(obj, field) for field in self.fields)
+        return tuple(
+            value.name if isinstance(value, FieldFile) else value
+            for value in values
+        )
+
+    @cached_property
+    def _pk_position(self):
+        return self.fields.index(self.model._meta.pk.attname)
+
+    def _db(self, pk):
+        return self.shard(pk) if self.shard is not None else None
+
+    def _unpack(self, row):
+        db = self._db(row[self._pk_position])
+        if db is None:
+            with routers.primary():
+                db = router.db_for_read(self.model)
+        return self.model.from_db(db, self.fields, row)
+
+    def _fetch(self, pks):
+        groups = {}
+        for pk in pks:
+            groups.setdefault(self._db(pk), []).append(pk)
+        for db, group in groups.items():
+            rows = self.model._default_manager.filter(pk__in=group)
+            if db is not None:
+                rows = rows.using(db)
+            with routers.primary():
+                fetched = list(rows.values_list(*self.fields))
+            yield from fetched
+
+    def _remember(self, objects):
+        cache.set_many(
+            {self._key(obj.pk): self._pack(obj) for obj in objects},
+            settings.OBJECT_CACHE_TIMEOUT
+        )
+
+    def get_rows(self, pks):
+        """{pk: кортеж значений столбцов fields} для набора pk без
+        создания моделей: один get_many к кешу и один values_list
+        к базе только за промахами."""
+        keys = {self._key(pk): pk for pk in pks}
+        rows = {
+            keys[key]: row
+            for key, row in cache.get_many(list(keys)).items()
+        }
+        missing = [pk for pk in keys.values() if pk not in rows]
+        if missing:
+            fetched = {
+                row[self._pk_position]: row for row in self._fetch(missing)
+            }
+            cache.set_many(
+                {self._key(pk): row for pk, row in fetched.items()},
+                settings.OBJECT_CACHE_TIMEOUT
+            )
+            rows.update(fetched)
+        return rows
+
+    def get_many(self, pks):
+        """{pk: объект} для набора pk со связанными объектами."""
+        found = {
+            pk: self._unpack(row) for pk, row in self.get_rows(pks).items()
+        }
+        self._attach(found.values())
+        return found
+
+    def get(self, **lookup):
+        """Объект по pk или уникальному полю; None, если его нет."""
+        (field, value), = lookup.items()
+        if field in ('pk', self.model._meta.pk.attname):
+            return self.get_many([value]).get(value)
+        alias = self._alias_key(field, value)
+        pk = cache.get(alias)
+        if pk is not None:
+            obj = self.get_many([pk]).get(pk)
+            if obj is not None and getattr(obj, field) == value:
+                return obj
+        with routers.primary():
+            obj = self.model._default_manager.filter(**lookup).first()
+        if obj is None:
+            return None
+        cache.set(alias, obj.pk, settings.OBJECT_CACHE_TIMEOUT)
+        self._remember([obj])
+        self._attach([obj])
+        return obj
+
+    def get_or_404(self, **lookup):
+        obj = self.get(**lookup)
+        if obj is None:
+            raise Http404(
+                f'No {self.model._meta.object_name} matches the given query.'
+            )
+        return obj
+
+    def _attach(self, objects):
+        """Подставляет связанные объекты из их кешей."""
+        objects = list(objects)
+        for name, related_cache in self.related.items():
+            field = self.model._meta.get_field(name)
+            pks = {getattr(obj, field.attname) for obj in objects}
+            pks.discard(None)
+            if not pks:
+                continue
+            related = related_cache.get_many(pks)
+            for obj in objects:
+                value = related.get(getattr(obj, field.attname))
+                if value is not None:
+                    field.set_cached_value(obj, value)
+
+    def invalidate(self, instance):
+        cache.delete(self._key(instance.pk))
+
+    def invalidate_many(self, pks):
+        cache.delete_many([self._key(pk) for pk in pks])
@@ -0,0 +1,185 @@
+"""Кеш целых страниц с «дырками» под персональные фрагменты.
+
+Страница рендерится один раз как каркас: вместо персональных кусков
+(шапка, переключатель лент, форма комментария, кнопки) тег {% hole %}
+оставляет метку. При выдаче метки заполняются отдельным рендером
+маленьких шаблонов в контексте текущего запроса. Для анонимов
+заполненная страница тоже сохраняется и отдаётся как есть - вместе
+с заранее сжатыми вариантами, чтобы не сжимать её на каждый запрос.
+
+Кеш общий для всех, поэтому страница для него рендерится по основной
+базе, даже если представление читает с реплики: отстающая реплика
+закрепила бы старую страницу под ключом новой версии.
+"""
+import base64
+import hashlib
+import json
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from django.utils.safestring import mark_safe
+
+from . import compression
+from .db import routers
+
+KEY_PREFIX = 'page:'
+
+HOLE_RE = re.compile(r'<!--hole:([A-Za-z0-9_=-]+)-->')
+
+
+def rendering_skeleton(request):
+    return getattr(request, 'render_holes', False)
+
+
+def placeholder(template_name, kwargs):
+    raw = json.dumps([template_name, kwargs]).encode()
+    return mark_safe(
+        f'<!--hole:{base64.urlsafe_b64encode(raw).decode()}-->'
+    )
+
+
+def fill_holes(content, request):
+    """Рендерит персональные фрагменты каркаса для запроса."""
+    def render_hole(match):
+        raw = base64.urlsafe_b64decode(match.group(1).encode())
+        template_name, kwargs = json.loads(raw)
+        return render_to_string(template_name, kwargs, request=request)
+
+    return HOLE_RE.sub(render_hole, content)
+
+
+def _response(content, content_type):
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def _anonymous_response(entry, request):
+    encoding = compression.choose_encoding(request)
+    compressed = entry['compressed'].get(encoding)
+    if compressed is None:
+        return _response(entry['anonymous'], entry['content_type'])
+    response = _response(compressed, entry['content_type'])
+    response['Content-Encoding'] = encoding
+    response['Content-Length'] = str(len(compressed))
+    response.precompressed = True
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def cache_page_with_holes(key_func, timeout=None):
+    """Декоратор представления. key_func(request, *args, **kwargs)
+    возвращает строку, меняющуюся при любой записи, влияющей
+    на страницу (например, штампы версий лент)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.PAGE_CACHE_ENABLED
+                or request.method not in ('GET', 'HEAD')
+            ):
+                return view(request, *args, **kwargs)
+            lifetime = timeout or settings.PAGE_CACHE_TIMEOUT
+            version = key_func(request, *args, **kwargs)
+            digest = hashlib.md5(
+                f'{request.get_full_path()}|{version}'.encode()
+            ).hexdigest()
+            key = KEY_PREFIX + digest
+            anonymous = not request.user.is_authenticated
+            entry = cache.get(key)
+            if entry is not None:
+                if anonymous and entry['anonymous'] is not None:
+                    return _anonymous_response(entry, request)
+                if not anonymous:
+                    content = fill_holes(entry['skeleton'], request)
+                    return _response(content, entry['content_type'])
+                with routers.primary():
+                    content = fill_holes(entry['skeleton'], request)
+                _remember(key, entry, content, request, lifetime)
+                return _response(content, entry['content_type'])
+
+            request.render_holes = True
+            try:
+                with routers.primary():
+                    response = view(request, *args, **kwargs)
+            finally:
+                request.render_holes = False
+            with routers.primary():
+                return _fill_and_remember(response, request, key, lifetime)
+        return wrapper
+    return decorator
+
+
+def _entry(skeleton, response):
+    return {
+        'skeleton': skeleton,
+        'content_type': response['Content-Type'],
+        'anonymous': None,
+        'compressed': {},
+    }
+
+
+def _fill_and_remember(response, request, key, timeout):
+    """Заполняет метки в только что отрендеренном каркасе
+    и сохраняет каркас в кеш."""
+    if response.streaming:
+        response.streaming_content = routers.primary_iter(
+            _stream_and_remember(
+                iter(response.streaming_content),
+                response, request, key, timeout
+            )
+        )
+        response.rendered_on_primary = True
+        return response
+    if not response.content:
+        return response
+    skeleton = response.content.decode(response.charset)
+    content = fill_holes(skeleton, request)
+    response.content = content
+    if response.status_code == 200:
+        _remember(key, _entry(skeleton, response), content, request, timeout)
+    return response
+
+
+def _stream_and_remember(parts, response, request, key, timeout):
+    """Потоковый ответ: каждая часть рендерится как каркас, метки
+    заполняются сразу, а по окончании каркас сохраняется в кеш."""
+    skeleton = []
+    filled = []
+    while True:
+        request.render_holes = True
+        try:
+            part = next(parts, None)
+        finally:
+            request.render_holes = False
+        if part is None:
+            break
+        text = part.decode(response.charset)
+        skeleton.append(text)
+        filled.append(fill_holes(text, request))
+        yield filled[-1].encode(response.charset)
+    if response.status_code == 200:
+        entry = _entry(''.join(skeleton), response)
+        _remember(key, entry, ''.join(filled), request, timeout)
+
+
+def _remember(key, entry, content, request, timeout):
+    """Сохраняет каркас. Заполненная страница анонима одинакова
+    для всех анонимов, если в неё не попал CSRF-токен клиента."""
+    if (
+        not request.user.is_authenticated
+        and not request.META.get('CSRF_COOKIE_USED')
+    ):
+        entry = dict(entry, anonymous=content)
+        body = content.encode()
+        if (
+            compression.is_compressible(entry['content_type'])
+            and len(body) >= settings.COMPRESSION_MIN_LENGTH
+        ):
+            entry['compressed'] = compression.compress_variants(body)
+    cache.set(key, entry, timeout)
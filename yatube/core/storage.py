@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.staticfiles.storage import StaticFilesStorage
+
+from . import compression
+
+PRECOMPRESSED_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.ico', '.map', '.json',
+)
+
+
+class CompressedStaticFilesStorage(StaticFilesStorage):
+    """При collectstatic рядом с текстовыми файлами кладёт .gz
+    (и .br, если установлен brotli), чтобы веб-сервер отдавал их
+    готовыми (gzip_static/brotli_static в nginx). Картинки png/jpg
+    уже сжаты и пропускаются."""
+    suffixes = {'gzip': '.gz', 'br': '.br'}
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for name in paths:
+            if not name.endswith(PRECOMPRESSED_EXTENSIONS):
+                continue
+            with self.open(name) as original:
+                content = original.read()
+            if len(content) < settings.COMPRESSION_MIN_LENGTH:
+                continue
+            for encoding in compression.available_encodings():
+                compressed = compression.compress(content, encoding)
+                if len(compressed) >= len(content):
+                    continue
+                target = self.path(name) + self.suffixes[encoding]
+                with open(target, 'wb') as output:
+                    output.write(compressed)
+            yield name, name, True
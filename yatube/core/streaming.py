@@ -0,0 +1,172 @@
+"""Потоковый рендер страниц.
+
+Шаблон обходится по узлам: {% extends %}, {% block %} и {% include %}
+без параметров раскрываются, циклы {% for %} с одной переменной
+отдают каждую итерацию отдельно, остальные узлы рендерятся целиком.
+Готовый HTML отправляется частями не меньше STREAMING_MIN_CHUNK байт,
+поэтому <head> и шапка уходят клиенту до того, как отрендерены
+карточки постов.
+
+Включается настройкой STREAMING_RENDER. Тело ответа рендерится уже
+после middleware, поэтому CSRF-токен для формы комментария
+создаётся заранее, а запросы и страницы пагинатора из контекста
+выполняются до начала потока: в потоке представления и с его
+выбором базы (core.db.routers).
+"""
+from django.conf import settings
+from django.core.paginator import Page
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render as render_to_response
+from django.template.context import make_context
+from django.template.defaulttags import ForNode
+from django.template.loader import get_template
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode, IncludeNode
+)
+from django.template.base import TextNode
+
+from core.templatetags.preload import PreloadedIncludeNode
+
+
+def render(request, template_name, context=None):
+    """Замена django.shortcuts.render для длинных страниц."""
+    if not settings.STREAMING_RENDER:
+        return render_to_response(request, template_name, context)
+    if request.user.is_authenticated:
+        get_token(request)
+    for value in (context or {}).values():
+        if isinstance(value, (QuerySet, Page)):
+            len(value)
+    return StreamingHttpResponse(
+        stream_template(template_name, context, request),
+        content_type='text/html; charset=utf-8'
+    )
+
+
+def stream_template(template_name, context=None, request=None):
+    backend_template = get_template(template_name)
+    template = backend_template.template
+    context = make_context(
+        context,
+        request,
+        autoescape=backend_template.backend.engine.autoescape
+    )
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            yield from _chunks(_nodes(template.nodelist, context))
+
+
+def _chunks(parts):
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= settings.STREAMING_MIN_CHUNK:
+            yield ''.join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def _nodes(nodelist, context):
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from _extends(node, context)
+        elif isinstance(node, BlockNode):
+            yield from _block(node, context)
+        elif isinstance(node, ForNode) and len(node.loopvars) == 1:
+            yield from _for(node, context)
+        elif isinstance(node, PreloadedIncludeNode):
+            yield from _include(node.included, context)
+        elif (
+            isinstance(node, IncludeNode)
+            and not node.extra_context
+            and not node.isolated_context
+        ):
+            yield from _include(_included_template(node, context), context)
+        else:
+            yield str(node.render_annotated(context))
+
+
+def _extends(node, context):
+    """ExtendsNode.render, но родитель отдаётся по узлам."""
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block
+                    for block in parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _nodes(parent.nodelist, context)
+
+
+def _included_template(node, context):
+    template = node.template.resolve(context)
+    if not callable(getattr(template, 'render', None)):
+        return context.template.engine.get_template(template)
+    return getattr(template, 'template', template)
+
+
+def _include(template, context):
+    with context.push():
+        with context.render_context.push_state(template):
+            yield from _nodes(template.nodelist, context)
+
+
+def _block(node, context):
+    """BlockNode.render: берётся самое глубокое переопределение блока."""
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from _nodes(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from _nodes(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def _for(node, context):
+    """ForNode.render для цикла с одной переменной:
+    каждая итерация отдаётся отдельной частью."""
+    parentloop = context['forloop'] if 'forloop' in context else {}
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        length = len(values)
+        if length < 1:
+            yield from _nodes(node.nodelist_empty, context)
+            return
+        if node.is_reversed:
+            values = reversed(values)
+        loop = context['forloop'] = {'parentloop': parentloop}
+        for index, item in enumerate(values):
+            loop['counter0'] = index
+            loop['counter'] = index + 1
+            loop['revcounter'] = length - index
+            loop['revcounter0'] = length - index - 1
+            loop['first'] = index == 0
+            loop['last'] = index == length - 1
+            context[node.loopvars[0]] = item
+            yield from _nodes(node.nodelist_loop, context)
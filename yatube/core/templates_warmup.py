@@ -0,0 +1,38 @@
+"""Прогрев кеша шаблонов при старте рабочего процесса."""
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Имена всех .html-шаблонов проекта (каталоги из DIRS)."""
+    names = set()
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory))
+    return sorted(name.replace(os.sep, '/') for name in names)
+
+
+def warm_up_templates():
+    """Компилирует все шаблоны проекта. С кешированным загрузчиком
+    первый запрос к странице уже не разбирает шаблоны с диска.
+    Возвращает число скомпилированных шаблонов."""
+    compiled = 0
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('Шаблон %s не компилируется', name)
+                continue
+            compiled += 1
+    return compiled
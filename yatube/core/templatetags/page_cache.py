@@ -0,0 +1,17 @@
+from django import template
+
+from core.page_cache import placeholder, rendering_skeleton
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, template_name, **kwargs):
+    """Персональный фрагмент страницы. При рендере каркаса для кеша
+    страниц оставляет метку, иначе работает как include с параметрами.
+    Параметры должны быть простыми значениями (числа, строки)."""
+    if rendering_skeleton(context.get('request')):
+        return placeholder(template_name, kwargs)
+    fragment = context.template.engine.get_template(template_name)
+    with context.push(**kwargs):
+        return fragment.render(context)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+from django.core.wsgi import get_wsgi_application
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from core.asgi import AsgiHandler, build_environ
+
+
+def request(application, path, headers=()):
+    """Один HTTP-запрос к ASGI-приложению: (статус, заголовки, части)."""
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start, *bodies = messages
+    return (
+        start['status'],
+        dict(start['headers']),
+        [body['body'] for body in bodies],
+    )
+
+
+class AsgiHandlerTest(SimpleTestCase):
+    def test_django_page_is_served(self):
+        application = AsgiHandler(get_wsgi_application(), max_threads=2)
+        status, headers, bodies = request(
+            application, reverse('about:author')
+        )
+        self.assertEqual(status, 200)
+        self.assertIn(b'text/html', headers[b'content-type'])
+        self.assertIn(b'</html>', b''.join(bodies))
+
+    def test_streaming_response_is_sent_in_parts(self):
+        def wsgi_application(environ, start_response):
+            response = StreamingHttpResponse(iter([b'one', b'two']))
+            start_response('200 OK', list(response.items()))
+            return response
+
+        application = AsgiHandler(wsgi_application, max_threads=1)
+        _, _, bodies = request(application, '/')
+        self.assertEqual(bodies, [b'one', b'two', b''])
+
+    def test_streaming_response_is_read_on_one_thread(self):
+        """Генератор ответа и его закрытие - в одном потоке пула."""
+        threads = []
+
+        def parts():
+            for number in range(20):
+                threads.append(threading.get_ident())
+                yield str(number).encode()
+
+        class Response(StreamingHttpResponse):
+            def close(self):
+                threads.append(threading.get_ident())
+                super().close()
+
+        def wsgi_application(environ, start_response):
+            response = Response(parts())
+            start_response('200 OK', list(response.items()))
+            return response
+
+        application = AsgiHandler(wsgi_application, max_threads=4)
+        _, _, bodies = request(application, '/')
+        self.assertEqual(len(bodies), 21)
+        self.assertEqual(len(threads), 21)
+        self.assertEqual(len(set(threads)), 1)
+
+    def test_repeated_headers_are_joined(self):
+        environ = build_environ({
+            'method': 'GET',
+            'path': '/группа/',
+            'headers': [(b'cookie', b'a=1'), (b'cookie', b'b=2')],
+        }, b'')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode('utf-8'),
+            '/группа/'
+        )
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import production_debug_check, shared_cache_check
+
+
+class ProductionDebugCheckTest(SimpleTestCase):
+    @override_settings(ENVIRONMENT='prod', DEBUG=False)
+    def test_clean_production_profile_passes(self):
+        """Продакшен-профиль без отладочных средств проходит проверку."""
+        with self.modify_settings(
+            INSTALLED_APPS={'remove': 'debug_toolbar'},
+            MIDDLEWARE={
+                'remove': 'debug_toolbar.middleware.DebugToolbarMiddleware'
+            },
+        ):
+            self.assertEqual(production_debug_check(None), [])
+
+    @override_settings(ENVIRONMENT='prod', DEBUG=True)
+    def test_debug_features_in_production_are_errors(self):
+        """DEBUG и debug_toolbar в продакшене - ошибки запуска."""
+        with self.modify_settings(INSTALLED_APPS={'append': 'debug_toolbar'}):
+            ids = {error.id for error in production_debug_check(None)}
+        self.assertIn('core.E001', ids)
+        self.assertIn('core.E002', ids)
+
+    @override_settings(ENVIRONMENT='dev', DEBUG=True)
+    def test_dev_profile_is_not_checked(self):
+        self.assertEqual(production_debug_check(None), [])
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    LOCAL = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    MEMCACHED = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    }}
+
+    def test_process_local_cache_in_production_is_error(self):
+        """Штампы версий в памяти процесса не видны другим рабочим
+        процессам."""
+        with self.settings(
+            ENVIRONMENT='prod', CACHES=self.LOCAL, TASKS_EAGER=True
+        ):
+            ids = [error.id for error in shared_cache_check(None)]
+        self.assertEqual(ids, ['core.E004'])
+
+    def test_task_worker_needs_shared_cache(self):
+        """Задача run_tasks меняет ленты подписчиков в своей памяти."""
+        with self.settings(
+            ENVIRONMENT='dev', CACHES=self.LOCAL, TASKS_EAGER=False
+        ):
+            ids = [error.id for error in shared_cache_check(None)]
+        self.assertEqual(ids, ['core.E005'])
+
+    def test_shared_cache_passes(self):
+        with self.settings(
+            ENVIRONMENT='prod', CACHES=self.MEMCACHED, TASKS_EAGER=False
+        ):
+            self.assertEqual(shared_cache_check(None), [])
+
+    @override_settings(ENVIRONMENT='dev', TASKS_EAGER=True)
+    def test_dev_profile_with_eager_tasks_is_not_checked(self):
+        self.assertEqual(shared_cache_check(None), [])
+
+
+class ProductionSettingsTest(SimpleTestCase):
+    def load(self, secret_key, expression='s.DEBUG'):
+        """Загружает профиль prod в отдельном процессе и печатает
+        expression: (код, вывод)."""
+        environ = {
+            name: value for name, value in os.environ.items()
+            if name not in ('DEBUG', 'SECRET_KEY')
+        }
+        environ.update(DJANGO_ENV='prod', SECRET_KEY=secret_key)
+        result = subprocess.run(
+            [sys.executable, '-c',
+             f'import yatube.settings as s; print({expression})'],
+            cwd=settings.BASE_DIR, env=environ,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            universal_newlines=True
+        )
+        return result.returncode, result.stdout
+
+    def test_development_env_file_is_not_loaded(self):
+        """DEBUG=True из yatube.env не мешает запуску продакшена."""
+        code, output = self.load('production-key')
+        self.assertEqual(code, 0, output)
+        self.assertEqual(output.strip(), 'False')
+
+    def test_placeholder_secret_key_is_rejected(self):
+        code, output = self.load('MY_SECRET_KEY')
+        self.assertNotEqual(code, 0)
+        self.assertIn('SECRET_KEY', output)
+
+    def test_cache_is_shared_between_processes(self):
+        code, output = self.load(
+            'production-key', "s.CACHES['default']['BACKEND']"
+        )
+        self.assertEqual(code, 0, output)
+        self.assertIn('memcached', output)
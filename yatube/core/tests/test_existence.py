@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotFound
+from django.test import RequestFactory, SimpleTestCase
+
+from core.bloom import BloomFilter
+from core.existence import ExistenceFilter, guard_missing
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        bloom.update(f'user{number}' for number in range(1000))
+        self.assertTrue(all(
+            f'user{number}' in bloom for number in range(1000)
+        ))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        bloom.update(f'user{number}' for number in range(1000))
+        false_positives = sum(
+            f'bot{number}' in bloom for number in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+
+
+class ExistenceFilterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.rows = ['leo', 'anna']
+        self.rebuilds = 0
+
+        def keys():
+            self.rebuilds += 1
+            return list(self.rows)
+
+        self.first = ExistenceFilter('test', keys)
+        self.second = ExistenceFilter('test', keys)
+
+    def test_other_process_catches_up_without_rebuild(self):
+        self.assertFalse(self.second.might_exist('kate'))
+        self.first.add('kate')
+        self.assertTrue(self.second.might_exist('kate'))
+        self.assertEqual(self.rebuilds, 1)
+
+    def test_cleared_cache_rebuilds_filter(self):
+        """После очистки кеша номер поколения может совпасть с уже
+        прочитанным - фильтр всё равно пересобирается."""
+        self.assertFalse(self.second.might_exist('kate'))
+        cache.clear()
+        self.rows.append('kate')
+        self.assertTrue(self.second.might_exist('kate'))
+
+    def test_negative_cache_is_reset_on_add(self):
+        self.first.remember_missing('leo')
+        self.assertTrue(self.first.known_missing('leo'))
+        self.first.add('leo')
+        self.assertFalse(self.first.known_missing('leo'))
+
+    def test_object_created_during_lookup_is_not_remembered(self):
+        """404 представления, пока другой процесс создавал объект,
+        не закрывает доступ к нему."""
+        @guard_missing(self.first, 'username', HttpResponseNotFound)
+        def view(request, username):
+            self.second.add(username)
+            raise Http404
+
+        request = RequestFactory().get('/')
+        self.first.might_exist('leo')
+        with self.assertRaises(Http404):
+            view(request, username='leo')
+        self.assertFalse(self.first.known_missing('leo'))
+
+        @guard_missing(self.first, 'username', HttpResponseNotFound)
+        def missing(request, username):
+            raise Http404
+
+        with self.assertRaises(Http404):
+            missing(request, username='anna')
+        self.assertTrue(self.first.known_missing('anna'))
+        self.assertIsInstance(
+            missing(request, username='anna'), HttpResponse
+        )
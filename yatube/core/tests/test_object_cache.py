@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from posts.models import Group, Post
+from posts.object_cache import GROUPS, POSTS, USERS
+
+User = get_user_model()
+
+
+class ObjectCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.user, group=self.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+        self.ids = [post.id for post in self.posts]
+
+    def test_get_many_queries_only_misses(self):
+        POSTS.get_many(self.ids[:1])
+        with self.assertNumQueries(1):
+            found = POSTS.get_many(self.ids)
+        self.assertEqual(sorted(found), self.ids)
+        with self.assertNumQueries(0):
+            found = POSTS.get_many(self.ids)
+            self.assertEqual(found[self.ids[0]].text, 'Пост 0')
+            self.assertEqual(found[self.ids[0]].author.username, 'author')
+            self.assertEqual(found[self.ids[0]].group.slug, 'group')
+
+    def test_lookup_by_unique_field(self):
+        USERS.get(username='author')
+        with self.assertNumQueries(0):
+            self.assertEqual(USERS.get(username='author'), self.user)
+
+    def test_saved_object_is_refreshed(self):
+        GROUPS.get(slug='group')
+        self.group.title = 'Новое название'
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertEqual(
+            GROUPS.get(slug='renamed').title, 'Новое название'
+        )
+        self.assertIsNone(GROUPS.get(slug='group'))
+
+    def test_deleted_object_is_missing(self):
+        POSTS.get(pk=self.ids[0])
+        self.posts[0].delete()
+        with self.assertRaises(Http404):
+            POSTS.get_or_404(pk=self.ids[0])
@@ -0,0 +1,58 @@
+import itertools
+
+from django.test import SimpleTestCase
+
+from core.db.pool import ConnectionPool, PoolExhausted
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        numbers = itertools.count(1)
+        self.pool = ConnectionPool(
+            connect=lambda: FakeConnection(next(numbers)),
+            ping=lambda connection: connection.alive,
+            reset=lambda connection: not connection.closed,
+            max_size=2,
+            timeout=0.01,
+            check_interval=0,
+        )
+
+    def test_released_connection_is_reused(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+
+    def test_broken_connection_is_replaced(self):
+        """Соединение, не ответившее на проверку, закрывается,
+        а вместо него открывается новое."""
+        connection = self.pool.acquire()
+        connection.alive = False
+        self.pool.release(connection)
+        fresh = self.pool.acquire()
+        self.assertTrue(connection.closed)
+        self.assertEqual(fresh.number, 2)
+
+    def test_exhausted_pool_raises_after_timeout(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolExhausted):
+            self.pool.acquire()
+
+    def test_closed_pool_closes_idle_and_returned_connections(self):
+        idle = self.pool.acquire()
+        busy = self.pool.acquire()
+        self.pool.release(idle)
+        self.pool.close()
+        self.pool.release(busy)
+        self.assertTrue(idle.closed)
+        self.assertTrue(busy.closed)
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from django.urls import reverse
+
+from core.db import routers
+from core.db.routers import PIN_COOKIE, ReplicaRouter, read_from_replica
+from core.page_cache import cache_page_with_holes
+from posts import versions
+from posts.models import Post
+
+User = get_user_model()
+
+
+@read_from_replica
+def database_for_read(request):
+    return HttpResponse(ReplicaRouter().db_for_read(Post))
+
+
+cached_database_for_read = read_from_replica(
+    cache_page_with_holes(lambda request: 'v1')(database_for_read.__wrapped__)
+)
+
+validated_database_for_read = read_from_replica(
+    versions.conditional()(database_for_read.__wrapped__)
+)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        routers.start_request()
+        self.factory = RequestFactory()
+
+    def test_marked_view_reads_from_replica(self):
+        response = database_for_read(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+
+    def test_pinned_user_reads_from_primary(self):
+        """После записи чтения идут в основную базу."""
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(database_for_read(request).content, b'default')
+
+    def test_other_reads_and_writes_use_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_page_cache_renders_from_primary(self):
+        """Общий кеш страниц не заполняется с отстающей реплики."""
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        self.assertEqual(
+            cached_database_for_read(request).content, b'default'
+        )
+
+    def test_replica_response_has_no_validators(self):
+        response = validated_database_for_read(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        routers.start_request()
+        self.assertTrue(
+            validated_database_for_read(request).has_header('ETag')
+        )
+
+
+class ReplicaPinMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        self.client.force_login(self.user)
+
+    def test_write_pins_user_to_primary(self):
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Комментарий'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_login_does_not_pin(self):
+        self.client.logout()
+        self.user.set_password('password')
+        self.user.save()
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'writer', 'password': 'password'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_read_does_not_pin(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
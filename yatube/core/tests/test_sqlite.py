@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.db.sqlite import retry_on_locked
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            busy_timeout = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+        self.assertEqual(
+            busy_timeout, settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+        # 1 - NORMAL.
+        self.assertEqual(synchronous, 1)
+
+
+@override_settings(SQLITE_LOCK_RETRIES=2, SQLITE_LOCK_RETRY_DELAY=0)
+class RetryOnLockedTest(SimpleTestCase):
+    def test_locked_write_is_retried(self):
+        write = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'saved'
+        ])
+        self.assertEqual(retry_on_locked(write)(), 'saved')
+        self.assertEqual(write.call_count, 2)
+
+    def test_gives_up_after_retries(self):
+        write = mock.Mock(side_effect=OperationalError('database is locked'))
+        with self.assertRaises(OperationalError):
+            retry_on_locked(write)()
+        self.assertEqual(write.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        write = mock.Mock(side_effect=OperationalError('no such table'))
+        with self.assertRaises(OperationalError):
+            retry_on_locked(write)()
+        self.assertEqual(write.call_count, 1)
@@ -0,0 +1,84 @@
+import gzip
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import compression
+from posts import threads
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class StreamingRenderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'Ответ {number}')
+            for number in range(30)
+        )
+        threads.link(Comment.objects.all())
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, url, streaming):
+        with self.settings(STREAMING_RENDER=streaming):
+            response = self.client.get(url)
+        if streaming:
+            self.assertTrue(response.streaming)
+            return b''.join(response.streaming_content)
+        return response.content
+
+    @override_settings(PAGE_CACHE_ENABLED=False, STREAMING_MIN_CHUNK=1)
+    def test_streamed_page_matches_regular_render(self):
+        """Потоковый рендер выдаёт ту же страницу, что и render()."""
+        for url in (
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:post_detail', args=(self.post.id,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.render(url, streaming=True),
+                    self.render(url, streaming=False)
+                )
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_streamed_page_is_stored_in_page_cache(self):
+        url = reverse('posts:profile', args=(self.author.username,))
+        first = self.client.get(url)
+        content = b''.join(first.streaming_content)
+        second = self.client.get(url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, content)
+
+    @override_settings(STREAMING_RENDER=True, PAGE_CACHE_ENABLED=False)
+    def test_page_queries_run_before_streaming(self):
+        """Запросы из контекста выполняются в представлении, а не
+        при чтении потока."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        with self.assertNumQueries(0):
+            content = b''.join(response.streaming_content)
+        self.assertIn('Ответ 19'.encode(), content)
+
+    def test_gzip_stream_flushes_each_part(self):
+        parts = [b'<head>' * 50, b'<body>' * 50]
+        stream = compression.compress_stream(iter(parts), 'gzip')
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(next(stream)), parts[0])
+        rest = b''.join(stream)
+        self.assertEqual(decompressor.decompress(rest), parts[1])
+        self.assertEqual(
+            gzip.decompress(compression.compress(b''.join(parts), 'gzip')),
+            b''.join(parts)
+        )
@@ -0,0 +1,34 @@
+from django.template import Context, Engine, TemplateSyntaxError
+from django.test import SimpleTestCase
+
+from core.templates_warmup import warm_up_templates
+
+
+class PreloadedIncludeTest(SimpleTestCase):
+    def test_renders_like_include(self):
+        """preloaded_include выводит то же, что и include."""
+        engine = Engine.get_default()
+        context = {'year': 2026}
+        source = "{% for post in items %}{% TAG 'includes/footer.html' %}"
+        source += '{% endfor %}'
+        included = engine.from_string(source.replace('TAG', 'include'))
+        preloaded = engine.from_string(
+            '{% load preload %}'
+            + source.replace('TAG', 'preloaded_include')
+        )
+        context['items'] = [1, 2]
+        self.assertEqual(
+            preloaded.render(Context(context)),
+            included.render(Context(context))
+        )
+
+    def test_template_name_must_be_quoted(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Engine.get_default().from_string(
+                '{% load preload %}{% preloaded_include name %}'
+            )
+
+
+class WarmUpTemplatesTest(SimpleTestCase):
+    def test_compiles_project_templates(self):
+        self.assertGreater(warm_up_templates(), 0)
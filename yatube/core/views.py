@@ -1,10 +1,41 @@
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest, HttpResponseNotFound
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .page_cache import fill_holes
+
+# Метка адреса в заранее отрендеренной странице 404.
+PATH_MARK = '<!--path-->'
+
+_not_found_skeleton = None
 
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
 
 
+def _render_not_found_skeleton():
+    request = HttpRequest()
+    request.user = AnonymousUser()
+    request.render_holes = True
+    return render_to_string(
+        'core/404.html', {'path': mark_safe(PATH_MARK)}, request=request
+    )
+
+
+def prerendered_not_found(request):
+    """Страница 404 из каркаса, отрендеренного один раз на процесс:
+    на запрос подставляются адрес и шапка пользователя."""
+    global _not_found_skeleton
+    if _not_found_skeleton is None:
+        _not_found_skeleton = _render_not_found_skeleton()
+    content = _not_found_skeleton.replace(PATH_MARK, escape(request.path))
+    return HttpResponseNotFound(fill_holes(content, request))
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
 
@@ -1,6 +1,34 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Post, Group, Comment, Follow
+from .models import (
+    ArchivedPost, Post, Group, Comment, Follow, Recommendation
+)
+from .tasks import delete_group
+
+
+class BackgroundDeleteMixin:
+    """Удаление выбранных объектов фоновой задачей вместо
+    стандартного delete_selected, который грузит каскад в память."""
+    background_delete_task = None
+
+    actions = ('delete_in_background',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_in_background(self, request, queryset):
+        pks = list(queryset.values_list('pk', flat=True))
+        for pk in pks:
+            self.background_delete_task.delay(pk)
+        self.message_user(
+            request,
+            f'Удаление запущено в фоне: {len(pks)}. '
+            'Ход выполнения - в журнале рабочего процесса задач.',
+            messages.SUCCESS
+        )
+    delete_in_background.short_description = 'Удалить в фоне'
 
 
 @admin.register(Post)
@@ -18,14 +46,36 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(admin.ModelAdmin):
+    """Архив только для просмотра (см. posts.archive)."""
+    list_display = (
+        'pk',
+        'text',
+        'pub_date',
+        'author',
+        'group'
+    )
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Group)
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'description'
     )
     search_fields = ('title', 'description')
     empty_value_display = '-пусто-'
+    background_delete_task = delete_group
 
 
 @admin.register(Comment)
@@ -41,6 +91,7 @@ class CommentAdmin(admin.ModelAdmin):
     ordering = ('post',)
     search_fields = ('text', 'post')
     list_filter = ('created',)
+    raw_id_fields = ('parent',)
     empty_value_display = '-пусто-'
 
 
@@ -54,3 +105,14 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('author',)
     list_filter = ('author',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(Recommendation)
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'author',
+        'score'
+    )
+    search_fields = ('user__username', 'author__username')
+    empty_value_display = '-пусто-'
@@ -0,0 +1,176 @@
+"""JSON API только для чтения: те же ленты, что и HTML-страницы.
+
+Пагинация курсорная (по паре pub_date, id), набор полей задаётся
+параметром ?fields=. ETag и Last-Modified строятся по штампам версий
+лент, поэтому на повторный запрос без изменений отвечаем 304 без
+запросов к базе и без сериализации.
+"""
+import base64
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+from django.views.decorators.vary import vary_on_cookie
+
+from . import shards, versions
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+# Поле ответа -> столбец для values_list.
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+def _error(message, status):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def _requested_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(FIELDS)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return fields
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.POSTS_PER_PAGE))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, settings.API_MAX_LIMIT))
+
+
+def encode_cursor(pub_date, post_id):
+    raw = f'{pub_date.isoformat()}|{post_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, post_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(pub_date), int(post_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError('Некорректный курсор')
+
+
+def _value(field, value):
+    if field == 'pub_date':
+        return value.isoformat()
+    if field == 'image':
+        return settings.MEDIA_URL + value if value else None
+    return value
+
+
+def feed_response(request, querysets):
+    """Страница ленты в JSON из запросов к шардам (posts.shards).
+    Модели не создаются: выбираются только запрошенные столбцы."""
+    try:
+        fields = _requested_fields(request)
+        limit = _limit(request)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            pub_date, post_id = decode_cursor(cursor)
+            querysets = [
+                queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, id__lt=post_id)
+                )
+                for queryset in querysets
+            ]
+    except ApiError as error:
+        return _error(str(error), 400)
+    rows = shards.ordered_rows(
+        querysets, *(FIELDS[field] for field in fields), limit=limit + 1
+    )
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        query = request.GET.copy()
+        query['cursor'] = encode_cursor(*rows[-1][:2])
+        next_url = f'{request.path}?{query.urlencode()}'
+    results = [
+        {
+            field: _value(field, value)
+            for field, value in zip(fields, row[2:])
+        }
+        for row in rows
+    ]
+    return JsonResponse({'results': results, 'next': next_url})
+
+
+@require_GET
+@versions.conditional(lambda request: versions.INDEX)
+def index(request):
+    """Все посты."""
+    return feed_response(request, shards.everywhere(Post.objects.all()))
+
+
+@require_GET
+@versions.conditional(lambda request, slug: versions.group_scope(slug))
+def group_posts(request, slug):
+    """Посты группы."""
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request, shards.everywhere(Post.objects.filter(group=group))
+    )
+
+
+@require_GET
+@versions.conditional(
+    lambda request, username: versions.author_scope(username)
+)
+def profile(request, username):
+    """Посты автора, как в HTML-профиле, - вместе с архивными
+    (posts.archive)."""
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, [author.posts.all(), author.archived_posts.all()]
+    )
+
+
+def _authenticated(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error('Требуется авторизация', 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_GET
+@vary_on_cookie
+@_authenticated
+@versions.conditional(
+    lambda request: versions.INDEX,
+    lambda request: versions.follow_scope(request.user.pk),
+    per_user=True
+)
+def follow_index(request):
+    """Посты авторов, на которых подписан пользователь."""
+    authors = Follow.objects.filter(user=request.user).values_list(
+        'author_id', flat=True
+    )
+    return feed_response(
+        request, shards.by_author(Post.objects.all(), set(authors))
+    )
@@ -0,0 +1,181 @@
+"""Архив старых постов.
+
+Почти все чтения приходятся на свежие посты, а posts_post хранит всю
+историю. archive_posts переносит посты старше ARCHIVE_AFTER_DAYS дней
+вместе с комментариями в ArchivedPost и ArchivedComment пачками по
+ARCHIVE_BATCH_SIZE: INSERT в архив и DELETE из горячих таблиц в одной
+транзакции. id сохраняются, поэтому адреса постов не меняются.
+
+Ленты (главная, группы, подписки) показывают только горячие посты.
+Страница поста (get_post_or_404), профиль автора (author_posts)
+и профиль в API (posts.api) читают обе таблицы. Горячий пост всегда
+новее архивного: каждый оставшийся пост пережил отсечку каждого
+переноса, - поэтому в профиле архив просто продолжает ленту автора.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from . import feeds, shards, versions
+from .models import ArchivedComment, ArchivedPost, Comment, Follow, Post
+from .object_cache import ARCHIVED_POSTS, POSTS, forget_posts
+from .utils import pk_chunks
+
+logger = logging.getLogger(__name__)
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image', 'excerpt',
+    'word_count', 'is_truncated',
+)
+
+COMMENT_FIELDS = (
+    'id', 'text', 'post_id', 'author_id', 'created', 'parent_id', 'path',
+    'depth', 'replies_count',
+)
+
+# Комментариев пачки в одном IN: у SQLite ограничено число параметров.
+COMMENT_CHUNK = 500
+
+
+def get_post(pk):
+    """Пост или архивный пост из кеша объектов; None, если нет."""
+    return POSTS.get(pk=pk) or ARCHIVED_POSTS.get(pk=pk)
+
+
+def get_post_or_404(pk):
+    post = get_post(pk)
+    if post is None:
+        raise Http404('No Post matches the given query.')
+    return post
+
+
+class WithArchive:
+    """Последовательность для Paginator: горячая лента, за ней
+    архивные посты в том же порядке."""
+
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived.select_related(
+            'author', 'group'
+        ).order_by('-pub_date', '-id')
+        self._hot_count = None
+
+    def _hot(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self._hot() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = self.count() if index.stop is None else index.stop
+        hot = self._hot()
+        posts = list(self.hot[start:min(stop, hot)]) if start < hot else []
+        if stop > hot:
+            posts += self.archived[max(start - hot, 0):stop - hot]
+        return posts
+
+
+def author_posts(author):
+    return WithArchive(
+        feeds.author_feed(author),
+        author.archived_posts.all()
+    )
+
+
+def _affected(db, pks):
+    """Ленты и штампы, которые меняет перенос пачки постов."""
+    rows = set(
+        Post.objects.using(db).filter(pk__in=pks).values_list(
+            'author_id', 'author__username', 'group_id', 'group__slug'
+        )
+    )
+    followers = set(
+        Follow.objects.filter(
+            author_id__in={row[0] for row in rows}
+        ).values_list('user_id', flat=True)
+    )
+    scopes = [feeds.index_scope()]
+    stamps = [versions.INDEX]
+    for author_id, username, group_id, slug in rows:
+        scopes.append(feeds.author_scope(author_id))
+        stamps.append(versions.author_scope(username))
+        if group_id:
+            scopes.append(feeds.group_scope(group_id))
+            stamps.append(versions.group_scope(slug))
+    for user_id in followers:
+        scopes.append(feeds.follow_scope(user_id))
+        stamps.append(versions.follow_scope(user_id))
+    stamps += [versions.post_scope(pk) for pk in pks]
+    return set(scopes), set(stamps)
+
+
+def _move(db, pks):
+    """Переносит пачку постов шарда db с комментариями; возвращает
+    число постов.
+
+    Посты блокируются первыми: комментарий к ним, добавляемый
+    параллельно, ждёт конца транзакции (и не находит поста), поэтому
+    копируются и удаляются одни и те же комментарии - набор pk,
+    выбранный под блокировкой."""
+    scopes, stamps = _affected(db, pks)
+    with transaction.atomic(using=db):
+        locked = list(
+            Post.objects.using(db).select_for_update().filter(
+                pk__in=pks
+            ).values_list('pk', flat=True)
+        )
+        posts = Post.objects.using(db).filter(pk__in=locked)
+        # Родители вставляются раньше ответов.
+        comment_pks = list(
+            Comment.objects.using(db).filter(
+                post_id__in=locked
+            ).order_by('path').values_list('pk', flat=True)
+        )
+        ArchivedPost.objects.using(db).bulk_create(
+            ArchivedPost(**row) for row in posts.values(*POST_FIELDS)
+        )
+        for start in range(0, len(comment_pks), COMMENT_CHUNK):
+            comments = Comment.objects.using(db).filter(
+                pk__in=comment_pks[start:start + COMMENT_CHUNK]
+            )
+            ArchivedComment.objects.using(db).bulk_create(
+                ArchivedComment(**row)
+                for row in comments.order_by('path').values(
+                    *COMMENT_FIELDS
+                )
+            )
+            comments._raw_delete(db)
+        moved = posts._raw_delete(db)
+    forget_posts(pks)
+    feeds.drop(*scopes)
+    versions.bump(*stamps)
+    return moved
+
+
+def archive_posts(days=None, batch_size=None, report=None):
+    """Переносит в архив посты старше days дней; возвращает их число.
+    report(moved) вызывается после каждой пачки."""
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    moved = 0
+    for posts in shards.everywhere(Post.objects.filter(pub_date__lt=cutoff)):
+        for pks in pk_chunks(
+            posts, batch_size or settings.ARCHIVE_BATCH_SIZE
+        ):
+            moved += _move(posts.db, pks)
+            logger.info('В архив перенесено постов: %d', moved)
+            if report is not None:
+                report(moved)
+    return moved
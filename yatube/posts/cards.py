@@ -0,0 +1,148 @@
+"""Лёгкие модели чтения для карточек лент.
+
+Карточка поста (includes/post_card.html) собирается из строк кеша
+объектов - кортежей значений столбцов - без создания экземпляров Post,
+User и Group. Объекты со __slots__ не имеют __dict__ и создаются
+простым присваиванием полей; автор и группа одной страницы создаются
+по одному разу на id. Вместо полного текста карточка несёт отрывок;
+text читается из кеша постов только при обращении.
+
+С моделями карточки сравниваются по pk: card == post и card.author
+== user верны, если это одна и та же запись.
+"""
+from django.contrib.auth import get_user_model
+
+from .models import Group, Post
+from .object_cache import GROUPS, POST_CARDS, POSTS, USERS
+
+User = get_user_model()
+
+
+class ReadModel:
+    __slots__ = ()
+
+    model = None
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __eq__(self, other):
+        if isinstance(other, (type(self), self.model)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.model, self.pk))
+
+
+class AuthorRef(ReadModel):
+    __slots__ = ('pk', 'username', 'first_name', 'last_name')
+
+    model = User
+
+    def __init__(self, pk, username, first_name, last_name):
+        self.pk = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def __str__(self):
+        return self.username
+
+
+class GroupRef(ReadModel):
+    __slots__ = ('pk', 'title', 'slug')
+
+    model = Group
+
+    def __init__(self, pk, title, slug):
+        self.pk = pk
+        self.title = title
+        self.slug = slug
+
+    def __str__(self):
+        return self.title
+
+
+class PostCard(ReadModel):
+    __slots__ = (
+        'pk', 'excerpt', 'word_count', 'is_truncated', 'pub_date', 'image',
+        'author', 'group',
+    )
+
+    model = Post
+
+    def __init__(self, pk, excerpt, word_count, is_truncated, pub_date,
+                 image, author, group):
+        self.pk = pk
+        self.excerpt = excerpt
+        self.word_count = word_count
+        self.is_truncated = is_truncated
+        self.pub_date = pub_date
+        self.image = image
+        self.author = author
+        self.group = group
+
+    @property
+    def text(self):
+        """Полный текст. Необрезанный отрывок и есть текст; пустой
+        отрывок - пост ещё не обработан backfill_excerpts."""
+        if self.excerpt and not self.is_truncated:
+            return self.excerpt
+        return POSTS.get(pk=self.pk).text
+
+    @property
+    def author_id(self):
+        return self.author.pk
+
+    @property
+    def group_id(self):
+        return self.group.pk if self.group is not None else None
+
+    def __str__(self):
+        return self.excerpt[:15]
+
+
+def _columns(cached, *names):
+    return [cached.fields.index(name) for name in names]
+
+
+def _refs(cached, ref, names, pks):
+    pks.discard(None)
+    if not pks:
+        return {}
+    columns = _columns(cached, *names)
+    return {
+        pk: ref(pk, *(row[column] for column in columns))
+        for pk, row in cached.get_rows(pks).items()
+    }
+
+
+def get_cards(pks):
+    """{pk: PostCard} для набора id постов."""
+    rows = POST_CARDS.get_rows(pks)
+    columns = _columns(
+        POST_CARDS, 'excerpt', 'word_count', 'is_truncated', 'pub_date',
+        'image'
+    )
+    author_id, group_id = _columns(POST_CARDS, 'author_id', 'group_id')
+    authors = _refs(
+        USERS, AuthorRef, ('username', 'first_name', 'last_name'),
+        {row[author_id] for row in rows.values()}
+    )
+    groups = _refs(
+        GROUPS, GroupRef, ('title', 'slug'),
+        {row[group_id] for row in rows.values()}
+    )
+    return {
+        pk: PostCard(
+            pk, *(row[column] for column in columns),
+            authors[row[author_id]], groups.get(row[group_id])
+        )
+        for pk, row in rows.items()
+        if row[author_id] in authors
+    }
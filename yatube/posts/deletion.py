@@ -0,0 +1,193 @@
+"""Удаление пользователей и групп с большой историей.
+
+Стандартный delete() собирает в память все связанные строки (посты,
+комментарии, подписки), прежде чем удалить их, и на плодовитом авторе
+не укладывается во время запроса. Здесь каскад выполняется пачками
+по DELETION_CHUNK_SIZE строк: id пачки выбираются по индексу, затем
+один DELETE ... WHERE id IN (...) или UPDATE в своей транзакции.
+Сигналы при этом не отправляются, поэтому штампы лент, кеш объектов
+и списки лент обновляются здесь же.
+
+Ход выполнения пишется в журнал и в кеш (get_progress), а из админки
+и команды bulk_delete удаление запускается фоновой задачей.
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from . import feeds, shards, threads, versions
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post,
+    Recommendation
+)
+from .object_cache import forget_posts
+from .utils import pk_chunks
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+PROGRESS_TIMEOUT = 24 * 60 * 60
+
+
+def _progress_key(kind, pk):
+    return f'deletion:{kind}:{pk}'
+
+
+def get_progress(kind, pk):
+    """{'steps': {шаг: строк}, 'finished': bool} или None."""
+    return cache.get(_progress_key(kind, pk))
+
+
+class Progress:
+    """report(step, done) - дополнительный вывод (например, команды)."""
+
+    def __init__(self, kind, pk, report=None):
+        self.key = _progress_key(kind, pk)
+        self.kind = kind
+        self.pk = pk
+        self.report = report
+        self.steps = Counter()
+
+    def _save(self, finished):
+        cache.set(
+            self.key,
+            {'steps': dict(self.steps), 'finished': finished},
+            PROGRESS_TIMEOUT
+        )
+
+    def __call__(self, step, count):
+        self.steps[step] += count
+        self._save(False)
+        logger.info(
+            'Удаление %s %s: %s - %d', self.kind, self.pk, step,
+            self.steps[step]
+        )
+        if self.report is not None:
+            self.report(step, self.steps[step])
+
+    def finish(self):
+        self._save(True)
+
+
+def _delete(queryset, step, progress, chunk_size, before=None):
+    """DELETE пачками в базе queryset; before(rows, pks) вызывается
+    в транзакции пачки и возвращает число удалённых им строк."""
+    db = queryset.db
+    for pks in pk_chunks(queryset, chunk_size):
+        rows = queryset.model._base_manager.using(db).filter(pk__in=pks)
+        with transaction.atomic(using=db):
+            deleted = 0
+            if before is not None:
+                deleted = before(rows, pks) or 0
+            deleted += rows._raw_delete(db)
+        progress(step, deleted)
+
+
+def _comments_deleted(rows, pks):
+    """Ответы на удаляемые комментарии удаляются вместе с ними."""
+    post_ids = set(rows.values_list('post_id', flat=True))
+    versions.bump_twice(
+        rows.db, *(versions.post_scope(post_id) for post_id in post_ids)
+    )
+    return threads.prune(rows, pks)
+
+
+def _posts_changed(rows, pks):
+    forget_posts(pks)
+    transaction.on_commit(lambda: forget_posts(pks), using=rows.db)
+    versions.bump_twice(rows.db, *(versions.post_scope(pk) for pk in pks))
+
+
+def delete_user(user_id, chunk_size=None, report=None):
+    """Удаляет пользователя со всеми постами, комментариями,
+    подписками и рекомендациями."""
+    chunk_size = chunk_size or settings.DELETION_CHUNK_SIZE
+    user = User.objects.get(pk=user_id)
+    # Пока идёт удаление, войти под пользователем нельзя.
+    User.objects.filter(pk=user_id).update(is_active=False)
+    progress = Progress('user', user_id, report)
+    followers = list(
+        Follow.objects.filter(author_id=user_id).values_list(
+            'user_id', flat=True
+        )
+    )
+    # Группы скопированы на шарды: ищем на шарде автора.
+    groups = list(shards.on_author(
+        Group.objects.filter(
+            Q(posts__author_id=user_id) | Q(archived_posts__author_id=user_id)
+        ).distinct(),
+        user_id
+    ))
+    commented = Q(author_id=user_id) | Q(post__author_id=user_id)
+    both = Q(user_id=user_id) | Q(author_id=user_id)
+    # Архивные посты и комментарии (posts.archive) - теми же шагами.
+    # Посты - на шарде автора, его комментарии - на шардах всех постов.
+    steps = (
+        (shards.everywhere(Comment.objects.filter(commented)),
+         'comments', _comments_deleted),
+        (shards.everywhere(ArchivedComment.objects.filter(commented)),
+         'comments', _comments_deleted),
+        ([shards.on_author(Post.objects.filter(author_id=user_id), user_id)],
+         'posts', _posts_changed),
+        ([shards.on_author(
+            ArchivedPost.objects.filter(author_id=user_id), user_id
+        )], 'posts', _posts_changed),
+        ([Follow.objects.filter(both)], 'follows', None),
+        ([Recommendation.objects.filter(both)], 'recommendations', None),
+    )
+    for querysets, step, before in steps:
+        for queryset in querysets:
+            _delete(queryset, step, progress, chunk_size, before=before)
+    # Оставшиеся связи (журнал админки, права) немногочисленны.
+    user.delete()
+    feeds.drop(
+        feeds.index_scope(),
+        feeds.author_scope(user_id),
+        feeds.follow_scope(user_id),
+        *(feeds.group_scope(group.pk) for group in groups),
+        *(feeds.follow_scope(follower) for follower in followers),
+    )
+    versions.bump_twice(
+        DEFAULT_DB_ALIAS,
+        versions.INDEX,
+        versions.USERS,
+        versions.RECOMMENDATIONS,
+        versions.author_scope(user.username),
+        *(versions.group_scope(group.slug) for group in groups),
+        *(versions.follow_scope(follower) for follower in followers),
+    )
+    progress.finish()
+
+
+def _detach(posts, pks, progress):
+    rows = posts.model._base_manager.using(posts.db).filter(pk__in=pks)
+    authors = set(rows.values_list('author__username', flat=True))
+    with transaction.atomic(using=posts.db):
+        detached = rows.update(group=None)
+        _posts_changed(rows, pks)
+    versions.bump_twice(
+        posts.db, *(versions.author_scope(name) for name in authors)
+    )
+    progress('posts', detached)
+
+
+def delete_group(group_id, chunk_size=None, report=None):
+    """Отвязывает посты от группы пачками UPDATE и удаляет группу."""
+    chunk_size = chunk_size or settings.DELETION_CHUNK_SIZE
+    group = Group.objects.get(pk=group_id)
+    progress = Progress('group', group_id, report)
+    for model in (Post, ArchivedPost):
+        detached = model.objects.filter(group_id=group_id)
+        for posts in shards.everywhere(detached):
+            for pks in pk_chunks(posts, chunk_size):
+                _detach(posts, pks, progress)
+    group.delete()
+    feeds.drop(feeds.group_scope(group_id))
+    versions.bump_twice(DEFAULT_DB_ALIAS, versions.INDEX)
+    progress.finish()
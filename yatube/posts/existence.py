@@ -0,0 +1,43 @@
+"""Фильтры существования для адресов с именем автора, слагом группы
+и id поста (см. core.existence). Ключи добавляются сигналами."""
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+
+from core.existence import ExistenceFilter, guard_missing
+from core.views import prerendered_not_found
+from . import shards
+from .models import ArchivedPost, Group, Post
+
+User = get_user_model()
+
+USERNAMES = ExistenceFilter(
+    'username',
+    lambda: User.objects.values_list('username', flat=True).iterator()
+)
+
+GROUP_SLUGS = ExistenceFilter(
+    'group_slug',
+    lambda: Group.objects.values_list('slug', flat=True).iterator()
+)
+
+POST_IDS = ExistenceFilter(
+    'post_id',
+    lambda: chain(*(
+        posts.values_list('id', flat=True).iterator()
+        for model in (Post, ArchivedPost)
+        for posts in shards.everywhere(model.objects.all())
+    ))
+)
+
+FILTERS = (USERNAMES, GROUP_SLUGS, POST_IDS)
+
+
+def guard(existence_filter, kwarg):
+    return guard_missing(existence_filter, kwarg, prerendered_not_found)
+
+
+def warm_up():
+    """Строит фильтры при старте рабочего процесса."""
+    for existence_filter in FILTERS:
+        existence_filter.rebuild()
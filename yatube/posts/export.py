@@ -0,0 +1,145 @@
+"""Выгрузка данных пользователя одним zip-архивом.
+
+В архиве posts.ndjson, comments.ndjson, follows.ndjson (на кого
+подписан пользователь), followers.ndjson (кто подписан на него) - по
+одному JSON-объекту в строке - и картинки постов в images/.
+
+Архив не собирается в памяти: строки читаются курсором пачками по
+EXPORT_CURSOR_SIZE (на PostgreSQL - серверным курсором), файлы -
+частями хранилища, а zipfile пишет в поток без перемотки (размеры
+записей - в дескрипторах после данных). Готовые байты отдаются
+частями около EXPORT_CHUNK_SIZE, поэтому память не зависит от
+размера аккаунта.
+"""
+import json
+import logging
+import zipfile
+from itertools import chain
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import shards
+from .models import ArchivedComment, ArchivedPost, Comment, Follow, Post
+
+logger = logging.getLogger(__name__)
+
+
+class _Pipe:
+    """Файл только для записи: накапливает байты до drain()."""
+
+    def __init__(self):
+        self.parts = []
+        self.pending = 0
+        self.offset = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.pending += len(data)
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        self.pending = 0
+        return data
+
+
+def _rows(queryset, *fields):
+    return queryset.values(*fields).iterator(
+        chunk_size=settings.EXPORT_CURSOR_SIZE
+    )
+
+
+def _tables(user):
+    """(имя файла, строки) для NDJSON-частей архива.
+    Посты и комментарии - из горячих таблиц и из архива; посты - на шарде
+    пользователя, комментарии - на шардах прокомментированных постов."""
+    yield 'posts.ndjson', chain(*(
+        _rows(
+            shards.on_author(
+                model.objects.filter(author=user).order_by('pk'), user.pk
+            ),
+            'id', 'text', 'pub_date', 'group__slug', 'image'
+        )
+        for model in (Post, ArchivedPost)
+    ))
+    yield 'comments.ndjson', chain(*(
+        _rows(
+            comments.order_by('pk'),
+            'id', 'post_id', 'parent_id', 'text', 'created'
+        )
+        for model in (Comment, ArchivedComment)
+        for comments in shards.everywhere(model.objects.filter(author=user))
+    ))
+    yield 'follows.ndjson', _rows(
+        Follow.objects.filter(user=user).order_by('pk'),
+        'author__username'
+    )
+    yield 'followers.ndjson', _rows(
+        Follow.objects.filter(author=user).order_by('pk'),
+        'user__username'
+    )
+
+
+def _images(user):
+    return chain(*(
+        shards.on_author(model.objects.filter(author=user), user.pk).exclude(
+            image=''
+        ).order_by('pk').values_list('image', flat=True).iterator(
+            chunk_size=settings.EXPORT_CURSOR_SIZE
+        )
+        for model in (Post, ArchivedPost)
+    ))
+
+
+def _line(row):
+    return json.dumps(
+        row, cls=DjangoJSONEncoder, ensure_ascii=False
+    ).encode() + b'\n'
+
+
+def stream_export(user):
+    """Итератор байтов zip-архива с данными пользователя."""
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, rows in _tables(user):
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for row in rows:
+                    entry.write(_line(row))
+                    if pipe.pending >= settings.EXPORT_CHUNK_SIZE:
+                        yield pipe.drain()
+        for name in _images(user):
+            try:
+                source = default_storage.open(name)
+            except FileNotFoundError:
+                logger.warning('Картинка %s не найдена, пропущена', name)
+                continue
+            # Картинки уже сжаты: кладём как есть.
+            info = zipfile.ZipInfo(f'images/{name}')
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = source.size
+            with source, archive.open(info, 'w') as entry:
+                for chunk in source.chunks(settings.EXPORT_CHUNK_SIZE):
+                    entry.write(chunk)
+                    if pipe.pending >= settings.EXPORT_CHUNK_SIZE:
+                        yield pipe.drain()
+    yield pipe.drain()
+
+
+def write_export(user, path):
+    """Записывает архив в файл path; возвращает его размер."""
+    size = 0
+    with open(path, 'wb') as target:
+        for chunk in stream_export(user):
+            target.write(chunk)
+            size += len(chunk)
+    return size
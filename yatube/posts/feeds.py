@@ -0,0 +1,286 @@
+"""Ленты как списки id постов в кеше.
+
+Каждая лента (главная, группа, автор, подписки пользователя) хранится
+как массив 64-битных id в порядке (-pub_date, -id) - несколько байт
+на пост вместо отрендеренного HTML или pickle моделей. Страница ленты
+берёт срез массива и собирает карточки (posts.cards) из кеша объектов
+одним get_many, поэтому ни COUNT, ни ORDER BY к базе не идут.
+
+Сигналы меняют массивы на месте: новый пост добавляется в начало,
+удалённый убирается; ленты подписчиков автора обновляет задача
+(posts.tasks), а не запрос, создавший пост. Список, собираемый из базы
+параллельно с записью, может не увидеть её, поэтому у ленты есть
+счётчик поколений: запись увеличивает его, а собранный список
+сохраняется, только если поколение не изменилось за время сборки
+(сравнение и запись - под блокировкой ленты). Поднятые посты
+сверяются с лентой; расхождение (пост удалён, id занят другим постом)
+приводит к пересборке списка. Число постов в таком запросе уже взято
+из старого списка, поэтому страница может оказаться короче.
+
+Ленты длиннее FEED_IDS_MAX хранят только начало; дальние страницы
+и число постов таких лент берутся из базы.
+
+Лента собирается из запросов к шардам (posts.shards): лента автора -
+один запрос, остальные - слияние по всем шардам.
+"""
+import hashlib
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import shards
+from .cards import get_cards
+from .models import Follow, Post
+
+KEY_PREFIX = 'feed_ids:'
+
+LOCK_TIMEOUT = 5
+
+LOCK_ATTEMPTS = 50
+
+
+def _key(scope):
+    return KEY_PREFIX + hashlib.md5(scope.encode()).hexdigest()
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+class Feed:
+    """Ленивая последовательность постов для Paginator.
+
+    querysets - запросы постов ленты к шардам. contains(post) проверяет,
+    что поднятый из кеша пост относится к ленте. Лента без scope
+    не кешируется: страницы читаются из базы."""
+
+    def __init__(self, scope, querysets, contains):
+        self.key = scope and _key(scope)
+        self.querysets = querysets
+        self.contains = contains
+        self._ids = None
+        self._complete = True
+
+    def _load(self, refresh=False):
+        if self._ids is not None and not refresh:
+            return
+        if self.key is None:
+            self._ids, self._complete = array('q'), False
+            return
+        entry = None if refresh else cache.get(self.key)
+        if entry is None:
+            entry = self._build()
+        raw, self._complete = entry
+        self._ids = array('q')
+        self._ids.frombytes(raw)
+
+    def _build(self):
+        generation = cache.get(self.key + ':generation')
+        limit = settings.FEED_IDS_MAX
+        ids = array('q', shards.ordered_ids(self.querysets, limit + 1))
+        entry = (ids[:limit].tobytes(), len(ids) <= limit)
+        # Список не ждёт блокировку: занятая лента соберётся снова.
+        if cache.add(self.key + ':lock', 1, LOCK_TIMEOUT):
+            try:
+                if cache.get(self.key + ':generation') == generation:
+                    cache.set(self.key, entry, settings.FEED_IDS_TIMEOUT)
+            finally:
+                cache.delete(self.key + ':lock')
+        return entry
+
+    def count(self):
+        self._load()
+        if self._complete:
+            return len(self._ids)
+        return shards.count(self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        self._load()
+        if not self._complete and (
+            index.stop is None or index.stop > len(self._ids)
+        ):
+            ids = shards.ordered_ids(self.querysets, index.stop)
+            return self._hydrate(ids[index.start:]) or []
+        posts = self._hydrate(self._ids[index])
+        if posts is None:
+            self._load(refresh=True)
+            posts = self._hydrate(self._ids[index]) or []
+        return posts
+
+    def _hydrate(self, ids):
+        """Карточки постов в порядке ленты или None, если список
+        разошёлся с базой."""
+        found = get_cards(ids)
+        posts = [found[post_id] for post_id in ids if post_id in found]
+        if len(posts) != len(ids) or not all(map(self.contains, posts)):
+            return None
+        return posts
+
+
+def index_feed():
+    return Feed(
+        index_scope(), shards.everywhere(Post.objects.all()),
+        lambda post: True
+    )
+
+
+def group_feed(group):
+    return Feed(
+        group_scope(group.pk),
+        shards.everywhere(Post.objects.filter(group=group)),
+        lambda post: post.group_id == group.pk
+    )
+
+
+def author_feed(author):
+    return Feed(
+        author_scope(author.pk),
+        [author.posts.all()],
+        lambda post: post.author_id == author.pk
+    )
+
+
+def follow_feed(user, authors=None):
+    """Подписки проверяются одним запросом по индексу Follow. Явный
+    набор authors (подписки, ещё не записанные в базу) не кешируется."""
+    scope = follow_scope(user.pk) if authors is None else None
+    if authors is None:
+        authors = followed_authors(user)
+    return Feed(
+        scope,
+        shards.by_author(Post.objects.all(), authors),
+        lambda post: post.author_id in authors
+    )
+
+
+def followed_authors(user):
+    return set(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    )
+
+
+def _lock(key):
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(key + ':lock', 1, LOCK_TIMEOUT):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _next_generation(keys):
+    """Отменяет сохранение списков, собираемых сейчас из базы."""
+    for key in keys:
+        cache.add(key + ':generation', 0, None)
+        cache.incr(key + ':generation')
+
+
+def _change(scopes, change):
+    """Применяет change(ids) к закешированным спискам лент.
+    Списки, которые не удалось заблокировать, удаляются."""
+    keys = [_key(scope) for scope in scopes]
+    _next_generation(keys)
+    for key in keys:
+        if not _lock(key):
+            cache.delete(key)
+            continue
+        try:
+            entry = cache.get(key)
+            if entry is None:
+                continue
+            ids = array('q')
+            ids.frombytes(entry[0])
+            change(ids)
+            complete = entry[1]
+            if len(ids) > settings.FEED_IDS_MAX:
+                # Полный список дорос до предела: дальше хранится начало.
+                del ids[settings.FEED_IDS_MAX:]
+                complete = False
+            cache.set(
+                key, (ids.tobytes(), complete), settings.FEED_IDS_TIMEOUT
+            )
+        finally:
+            cache.delete(key + ':lock')
+
+
+def post_scopes(post):
+    """Общие ленты поста: главная, автора и группы."""
+    scopes = [index_scope(), author_scope(post.author_id)]
+    if post.group_id:
+        scopes.append(group_scope(post.group_id))
+    return scopes
+
+
+def follower_scopes(author_id):
+    """Ленты подписчиков автора."""
+    return [
+        follow_scope(user_id)
+        for user_id in Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True).iterator()
+    ]
+
+
+def _prepend(post_id):
+    def change(ids):
+        if post_id not in ids:
+            ids.insert(0, post_id)
+    return change
+
+
+def _discard(post_id):
+    def change(ids):
+        if post_id in ids:
+            ids.remove(post_id)
+    return change
+
+
+def add_post(post):
+    """Новый пост - самый свежий: встаёт в начало списков."""
+    _change(post_scopes(post), _prepend(post.pk))
+
+
+def remove_post(post):
+    _change(post_scopes(post), _discard(post.pk))
+
+
+def add_to_followers(post_id, author_id):
+    _change(follower_scopes(author_id), _prepend(post_id))
+
+
+def remove_from_followers(post_id, author_id):
+    _change(follower_scopes(author_id), _discard(post_id))
+
+
+def move_post(post, previous_group_id):
+    """Пост перенесён в другую группу: из старой ленты он убирается,
+    список новой пересобирается (место поста в нём неизвестно)."""
+    if previous_group_id:
+        _change([group_scope(previous_group_id)], _discard(post.pk))
+    if post.group_id:
+        drop(group_scope(post.group_id))
+
+
+def drop(*scopes):
+    """Удаляет списки лент; они соберутся из базы при чтении."""
+    keys = [_key(scope) for scope in scopes]
+    _next_generation(keys)
+    cache.delete_many(keys)
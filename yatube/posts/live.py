@@ -0,0 +1,244 @@
+"""Новые посты в реальном времени (Server-Sent Events).
+
+Брокер живёт в памяти процесса: сигнал создания поста после коммита
+публикует id поста в темы главной, группы и автора (имена тем - те же,
+что у штампов версий лент). Подписчик получает id и отправляет клиенту
+готовую карточку; карточка рендерится один раз и кешируется.
+
+Соединение держится не дольше LIVE_MAX_DURATION секунд, затем браузер
+переподключается с заголовком Last-Event-ID и получает пропущенные
+посты из базы. id события - время публикации и id поста: id постов
+выдаются блоками (posts.shards) и по ним одним порядок не восстановить.
+При нескольких рабочих процессах подписчик видит посты, созданные
+в его процессе, а остальные - при переподключении.
+
+Соединение всё время занимает поток (под ASGI - поток пула
+представлений), поэтому одновременно открыто не больше
+LIVE_MAX_STREAMS потоков событий; сверх них клиент получает 503
+с Retry-After и переподключается позже. Под WSGI поток - это рабочий
+поток сервера, поэтому ленты включаются настройкой LIVE_FEED, которую
+по умолчанию задаёт только yatube.asgi; без неё адреса отвечают 404.
+"""
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from . import shards, versions
+from .models import Follow, Group, Post
+
+CARD_KEY_PREFIX = 'live_event:'
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, topics):
+        subscription = queue.Queue(maxsize=settings.LIVE_QUEUE_SIZE)
+        subscription.topics = tuple(topics)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].discard(subscription)
+                if not self._subscribers[topic]:
+                    del self._subscribers[topic]
+
+    def publish(self, topics, message):
+        with self._lock:
+            subscribers = set().union(*(
+                self._subscribers.get(topic, ()) for topic in topics
+            ))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                # Клиент не успевает читать - догонит по Last-Event-ID.
+                pass
+
+
+broker = Broker()
+
+
+class Slots:
+    """Счётчик открытых потоков событий."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.taken = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.taken >= settings.LIVE_MAX_STREAMS:
+                return False
+            self.taken += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.taken -= 1
+
+
+slots = Slots()
+
+
+class Stream:
+    """Поток событий, освобождающий место при закрытии ответа, даже
+    если его так и не начали читать."""
+
+    def __init__(self, events):
+        self._events = events
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._events.close()
+            slots.release()
+
+
+def publish_post(post):
+    broker.publish(
+        (
+            versions.INDEX,
+            versions.author_scope(post.author.username),
+            post.group and versions.group_scope(post.group.slug),
+        ),
+        post.pk
+    )
+
+
+def event_id(post):
+    return f'{post.pub_date.isoformat()}/{post.pk}'
+
+
+def card(post_id):
+    """(id события, HTML карточки) или None, если поста нет."""
+    key = f'{CARD_KEY_PREFIX}{post_id}'
+    found = cache.get(key)
+    if found is None:
+        post = shards.on_post(
+            Post.objects.select_related('author', 'group'), post_id
+        ).filter(pk=post_id).first()
+        if post is None:
+            return None
+        html = render_to_string('includes/post_card.html', {'post': post})
+        found = (event_id(post), html)
+        cache.set(key, found, settings.LIVE_MAX_DURATION)
+    return found
+
+
+def _event(post_id):
+    found = card(post_id)
+    if found is None:
+        return ''
+    event, html = found
+    data = json.dumps({'id': post_id, 'html': html}, ensure_ascii=False)
+    return f'id: {event}\nevent: post\ndata: {data}\n\n'
+
+
+def _last_event(request):
+    """(время публикации, id поста) из Last-Event-ID или None."""
+    pub_date, _, post_id = request.META.get(
+        'HTTP_LAST_EVENT_ID', ''
+    ).partition('/')
+    try:
+        pub_date = parse_datetime(pub_date)
+    except ValueError:
+        return None
+    if pub_date is None or not post_id.isdigit():
+        return None
+    return pub_date, int(post_id)
+
+
+def event_stream(request, topics, querysets):
+    subscription = broker.subscribe(topics)
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+        last = _last_event(request)
+        if last is not None:
+            for _, post_id in shards.newer_rows(
+                querysets, *last, settings.POSTS_PER_PAGE
+            ):
+                yield _event(post_id)
+        deadline = time.monotonic() + settings.LIVE_MAX_DURATION
+        while time.monotonic() < deadline:
+            try:
+                post_id = subscription.get(timeout=settings.LIVE_HEARTBEAT)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield _event(post_id)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _response(request, topics, querysets):
+    if not settings.LIVE_FEED:
+        raise Http404('Живые ленты выключены')
+    if not slots.acquire():
+        response = HttpResponse(
+            'Слишком много открытых соединений', status=503,
+            content_type='text/plain; charset=utf-8'
+        )
+        response['Retry-After'] = str(settings.LIVE_RETRY_MS // 1000 or 1)
+        return response
+    response = StreamingHttpResponse(
+        Stream(event_stream(request, topics, querysets)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def index(request):
+    return _response(
+        request, (versions.INDEX,), shards.everywhere(Post.objects.all())
+    )
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _response(
+        request, (versions.group_scope(slug),),
+        shards.everywhere(Post.objects.filter(group=group))
+    )
+
+
+@require_GET
+@login_required
+def follow_index(request):
+    authors = dict(Follow.objects.filter(user=request.user).values_list(
+        'author_id', 'author__username'
+    ))
+    return _response(
+        request,
+        [versions.author_scope(username) for username in authors.values()],
+        shards.by_author(Post.objects.all(), set(authors))
+    )
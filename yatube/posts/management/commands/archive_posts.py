@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые посты с комментариями в архивные таблицы '
+        '(см. posts.archive)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Возраст поста в днях (по умолчанию ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Постов в одной пачке (по умолчанию ARCHIVE_BATCH_SIZE)'
+        )
+
+    def report(self, moved):
+        self.stdout.write(f'Перенесено: {moved}')
+
+    def handle(self, *args, **options):
+        moved = archive_posts(
+            options['days'], options['batch_size'], report=self.report
+        )
+        self.stdout.write(self.style.SUCCESS(f'Всего в архиве: +{moved}'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from posts import shards
+from posts.models import Post
+from posts.object_cache import forget_posts
+
+
+def backfill_excerpts(batch_size=500, everything=False):
+    """Заполняет отрывки постов пакетами по возрастанию id: каждый
+    пакет - один SELECT id, text и один bulk_update. Шарды (posts.shards)
+    обходятся по очереди. Возвращает число обработанных постов."""
+    posts = Post.objects.order_by('pk').only('pk', 'text')
+    if not everything:
+        posts = posts.filter(excerpt='')
+    return sum(
+        _backfill_shard(shard_posts, batch_size)
+        for shard_posts in shards.everywhere(posts)
+    )
+
+
+def _backfill_shard(posts, batch_size):
+    last_pk = 0
+    done = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return done
+        for post in batch:
+            post.fill_excerpt()
+        Post.objects.using(posts.db).bulk_update(
+            batch, ('excerpt', 'word_count', 'is_truncated')
+        )
+        # bulk_update не отправляет сигналы.
+        forget_posts([post.pk for post in batch])
+        last_pk = batch[-1].pk
+        done += len(batch)
+
+
+class Command(BaseCommand):
+    help = 'Заполняет отрывки постов для карточек лент'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество постов в одном пакете'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать и уже заполненные отрывки'
+        )
+
+    def handle(self, *args, **options):
+        count = backfill_excerpts(options['batch_size'], options['all'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано постов: {count}')
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов по графу подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Количество рекомендаций на пользователя'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_recommendations(limit=options['limit'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Сохранено рекомендаций: {count}')
+        )
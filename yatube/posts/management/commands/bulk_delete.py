@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import deletion
+from posts.models import Group
+from posts.tasks import delete_group, delete_user
+
+# Вид объекта -> (удаление сразу, фоновая задача).
+REMOVERS = {
+    'user': (deletion.delete_user, delete_user),
+    'group': (deletion.delete_group, delete_group),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователя или группу с большой историей пачками '
+        '(см. posts.deletion)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=('user', 'group'))
+        parser.add_argument('key', help='Имя пользователя или слаг группы')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Строк в одной пачке (по умолчанию DELETION_CHUNK_SIZE)'
+        )
+        parser.add_argument(
+            '--background',
+            action='store_true',
+            help='Поставить удаление в очередь фоновых задач'
+        )
+
+    def _target(self, kind, key):
+        if kind == 'user':
+            model, lookup = get_user_model(), {'username': key}
+        else:
+            model, lookup = Group, {'slug': key}
+        pk = model.objects.filter(**lookup).values_list(
+            'pk', flat=True
+        ).first()
+        if pk is None:
+            raise CommandError(f'Не найдено: {kind} {key}')
+        return pk
+
+    def report(self, step, done):
+        self.stdout.write(f'{step}: {done}')
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        pk = self._target(kind, options['key'])
+        remove, background = REMOVERS[kind]
+        if options['background']:
+            background.delay(pk)
+            self.stdout.write(
+                self.style.SUCCESS('Удаление поставлено в очередь')
+            )
+            return
+        remove(pk, options['chunk_size'], report=self.report)
+        self.stdout.write(self.style.SUCCESS('Удалено'))
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import write_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии, подписки и картинки пользователя '
+        'в zip-архив (см. posts.export)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='Куда записать архив')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(
+            username=options['username']
+        ).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        size = write_export(user, options['path'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано {size} байт в {options["path"]}'
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.write_behind import flush
+
+
+class Command(BaseCommand):
+    help = 'Записывает в базу отложенные комментарии и подписки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            type=float,
+            default=None,
+            help='Повторять сброс каждые N секунд'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = flush()
+            if count:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Записано операций: {count}')
+                )
+            if options['loop'] is None:
+                break
+            time.sleep(options['loop'])
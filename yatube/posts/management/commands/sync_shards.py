@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import shards
+from posts.models import Group
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует пользователей и группы из основной базы на шарды '
+        '(см. posts.shards)'
+    )
+
+    def handle(self, *args, **options):
+        if not shards.enabled():
+            raise CommandError('Шардирование не включено (DB_SHARDS)')
+        for model in (get_user_model(), Group):
+            copied = 0
+            for instance in model._base_manager.using('default').iterator():
+                shards.replicate(instance)
+                copied += 1
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {copied}'
+            )
+        self.stdout.write(self.style.SUCCESS('Шарды синхронизированы'))
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Начало текста для лент, заполняется при сохранении', verbose_name='Отрывок'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Отрывок короче текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число слов'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, LPad
+
+
+def fill_paths(apps, schema_editor):
+    # Существующие комментарии - верхнего уровня: путь - свой id.
+    db = schema_editor.connection.alias
+    for name in ('Comment', 'ArchivedComment'):
+        apps.get_model('posts', name).objects.using(db).update(
+            path=LPad(Cast('id', CharField()), 10, Value('0'))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_id_sequence'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='archivedcomment',
+            options={'ordering': ['path'], 'verbose_name': 'Архивный комментарий', 'verbose_name_plural': 'Архивные комментарии'},
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Уровень'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.ArchivedComment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='path',
+            field=models.CharField(default='', max_length=250, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ответов'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=250, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ответов'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'path'], name='archived_comment_post_path'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'depth', 'path'], name='archived_comment_depth_path'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'depth', 'path'], name='comment_post_depth_path'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
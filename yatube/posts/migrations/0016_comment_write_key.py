@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='write_key',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True, verbose_name='Ключ отложенной записи'),
+        ),
+    ]
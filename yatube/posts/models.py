@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router, transaction
+
+from . import shards, threads
+from .utils import make_excerpt
 
 User = get_user_model()
 
@@ -33,6 +36,24 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    excerpt = models.TextField(
+        verbose_name='Отрывок',
+        help_text='Начало текста для лент, заполняется при сохранении',
+        blank=True,
+        editable=False
+    )
+    word_count = models.PositiveIntegerField(
+        verbose_name='Число слов',
+        default=0,
+        editable=False
+    )
+    is_truncated = models.BooleanField(
+        verbose_name='Отрывок короче текста',
+        default=False,
+        editable=False
+    )
+
+    is_archived = False
 
     class Meta:
         ordering = ['-pub_date']
@@ -42,6 +63,27 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        if shards.enabled():
+            if self.pk is None:
+                # По id новый пост находится на шарде автора.
+                self.pk = shards.allocate_post_id(self.author_id)
+                kwargs['force_insert'] = True
+            # objects.create() передаёт базу запроса, а не шард.
+            kwargs['using'] = shards.for_post(self.pk)
+        self.fill_excerpt()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {
+                'excerpt', 'word_count', 'is_truncated'
+            }
+        super().save(*args, **kwargs)
+
+    def fill_excerpt(self):
+        self.excerpt, self.word_count, self.is_truncated = make_excerpt(
+            self.text
+        )
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -75,10 +117,72 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=threads.PATH_LENGTH,
+        default='',
+        editable=False
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Уровень', default=0, editable=False
+    )
+    replies_count = models.PositiveIntegerField(
+        'Ответов', default=0, editable=False
+    )
+    # Ключ операции отложенной записи: повторный сброс пакета
+    # не вставит комментарий второй раз (posts.write_behind).
+    write_key = models.CharField(
+        'Ключ отложенной записи',
+        max_length=32,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_post_path'),
+            models.Index(
+                fields=['post', 'depth', 'path'],
+                name='comment_post_depth_path'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Новый комментарий получает уровень и путь (posts.threads)."""
+        if shards.enabled():
+            kwargs['using'] = shards.for_post(self.post_id)
+        created = self.pk is None
+        if created and self.parent_id is not None:
+            self.parent = threads.reply_to(self.parent)
+            self.depth = self.parent.depth + 1
+        db = kwargs.get('using') or router.db_for_write(
+            Comment, instance=self
+        )
+        try:
+            with transaction.atomic(using=db):
+                super().save(*args, **kwargs)
+                if created:
+                    threads.place(self)
+        except Exception:
+            if created:
+                # Вставка откатилась: повторный save снова вставит строку.
+                self.pk = None
+                self._state.adding = True
+            raise
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -93,3 +197,146 @@ class Follow(models.Model):
         verbose_name='Автор',
         related_name='following'
     )
+
+
+class Recommendation(models.Model):
+    """Рекомендованный автор для пользователя.
+    Таблица заполняется пакетно командой build_recommendations."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='recommendations'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Рекомендованный автор',
+        related_name='+'
+    )
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_recommendation'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из posts_post (см. posts.archive).
+    id сохраняется, поэтому адрес поста не меняется."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст поста')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    excerpt = models.TextField(verbose_name='Отрывок', blank=True)
+    word_count = models.PositiveIntegerField(
+        verbose_name='Число слов',
+        default=0
+    )
+    is_truncated = models.BooleanField(
+        verbose_name='Отрывок короче текста',
+        default=False
+    )
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='archived_post_author_date'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к архивному посту; id сохраняется."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(
+        verbose_name='Текст комментария',
+        blank=True,
+        null=True
+    )
+    post = models.ForeignKey(
+        ArchivedPost,
+        verbose_name='Пост',
+        related_name='comments',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_comments'
+    )
+    created = models.DateTimeField(verbose_name='Дата публикации')
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на'
+    )
+    path = models.CharField(
+        'Путь в ветке', max_length=threads.PATH_LENGTH, default=''
+    )
+    depth = models.PositiveSmallIntegerField('Уровень', default=0)
+    replies_count = models.PositiveIntegerField('Ответов', default=0)
+
+    class Meta:
+        ordering = ['path']
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'path'], name='archived_comment_post_path'
+            ),
+            models.Index(
+                fields=['post', 'depth', 'path'],
+                name='archived_comment_depth_path'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class IdSequence(models.Model):
+    """Счётчик id для таблиц на нескольких шардах (posts.shards).
+    Хранится только в основной базе."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
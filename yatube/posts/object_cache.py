@@ -0,0 +1,40 @@
+"""Кеши объектов постов, групп и пользователей (см. core.object_cache).
+Сбрасываются сигналами."""
+from django.contrib.auth import get_user_model
+
+from core.object_cache import ObjectCache
+from . import shards
+from .models import ArchivedPost, Group, Post
+
+User = get_user_model()
+
+# Только то, что выводится на страницах: хеш пароля, почта и права
+# в общем кеше не хранятся.
+USERS = ObjectCache(User, fields=(
+    'id', 'username', 'first_name', 'last_name',
+))
+
+GROUPS = ObjectCache(Group)
+
+POSTS = ObjectCache(
+    Post, related={'author': USERS, 'group': GROUPS}, shard=shards.post_db
+)
+
+# Строки для карточек лент: без полного текста поста.
+POST_CARDS = ObjectCache(Post, fields=(
+    'id', 'pub_date', 'image', 'author_id', 'group_id',
+    'excerpt', 'word_count', 'is_truncated',
+), shard=shards.post_db)
+
+ARCHIVED_POSTS = ObjectCache(
+    ArchivedPost, related={'author': USERS, 'group': GROUPS},
+    shard=shards.post_db
+)
+
+
+def forget_posts(pks):
+    """Сброс постов, изменённых в обход сигналов (UPDATE, bulk_update).
+    id архивных постов (posts.archive) - из того же ряда."""
+    POSTS.invalidate_many(pks)
+    POST_CARDS.invalidate_many(pks)
+    ARCHIVED_POSTS.invalidate_many(pks)
@@ -0,0 +1,139 @@
+"""Рекомендации авторов на основе графа подписок.
+
+Граф хранится как разреженная матрица смежности F (строка - подписчик,
+столбцы - авторы) в виде словаря множеств. Оценка кандидата c для
+пользователя u складывается из двух произведений разреженных матриц:
+
+* друзья друзей: (F @ F)[u, c] - сколько авторов пользователя u
+  подписаны на c;
+* совместные подписки: (S @ F)[u, c], где S = cos(F @ F.T) - косинусная
+  близость наборов подписок пользователей u и v.
+
+Перемножаются только ненулевые элементы, но совместные подписки всё
+равно квадратичны по популярности: у автора с n подписчиками каждый
+из них пересекается с остальными n - 1. Поэтому для пересечений
+у каждого автора берётся выборка не больше RECOMMENDATIONS_MAX_FOLLOWERS
+подписчиков (постоянная между пересборками), и работа на пользователя
+ограничена числом его подписок, умноженным на этот предел.
+
+Таблица пересобирается пачками по batch_size пользователей, каждая
+в своей транзакции: рекомендации пользователя заменяются целиком.
+"""
+import random
+from collections import defaultdict
+from heapq import nlargest
+from itertools import islice
+from math import sqrt
+
+from django.conf import settings
+from django.db import transaction
+
+from . import versions
+from .models import Follow, Recommendation
+
+
+def build_follow_graph():
+    """Прямой и обратный индексы подписок одним запросом."""
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    for user_id, author_id in Follow.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        if user_id == author_id:
+            continue
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    return following, followers
+
+
+def sample_followers(followers, size):
+    """Не больше size подписчиков каждого автора для пересечений."""
+    sampled = {}
+    for author_id, users in followers.items():
+        users = sorted(users)
+        if len(users) > size:
+            users = random.Random(author_id).sample(users, size)
+        sampled[author_id] = users
+    return sampled
+
+
+def score_candidates(user_id, following, followers):
+    """Строка u матрицы оценок: {author_id: score}. followers -
+    выборка подписчиков (sample_followers)."""
+    own = following.get(user_id, ())
+    scores = defaultdict(float)
+    weight = settings.RECOMMENDATIONS_FOF_WEIGHT
+    for author_id in own:
+        for candidate in following.get(author_id, ()):
+            scores[candidate] += weight
+    overlap = defaultdict(int)
+    for author_id in own:
+        for neighbour in followers.get(author_id, ()):
+            overlap[neighbour] += 1
+    overlap.pop(user_id, None)
+    weight = settings.RECOMMENDATIONS_COFOLLOW_WEIGHT
+    for neighbour, common in overlap.items():
+        similarity = common / sqrt(len(own) * len(following[neighbour]))
+        for candidate in following[neighbour]:
+            scores[candidate] += weight * similarity
+    scores.pop(user_id, None)
+    for author_id in own:
+        scores.pop(author_id, None)
+    return scores
+
+
+def compute_recommendations(following, followers, limit, user_ids=None):
+    """Top-K рекомендаций для пользователей user_ids (по умолчанию -
+    всех с подписками)."""
+    for user_id in following if user_ids is None else user_ids:
+        scores = score_candidates(user_id, following, followers)
+        top = nlargest(limit, scores.items(), key=lambda item: item[1])
+        for author_id, score in top:
+            yield user_id, author_id, score
+
+
+def rebuild_recommendations(limit=None, batch_size=1000):
+    """Полная пересборка таблицы рекомендаций.
+    Возвращает количество сохранённых строк."""
+    limit = limit or settings.RECOMMENDATIONS_PER_USER
+    following, followers = build_follow_graph()
+    followers = sample_followers(
+        followers, settings.RECOMMENDATIONS_MAX_FOLLOWERS
+    )
+    saved = 0
+    users = iter(following)
+    while True:
+        chunk = list(islice(users, batch_size))
+        if not chunk:
+            break
+        rows = [
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for user_id, author_id, score in compute_recommendations(
+                following, followers, limit, chunk
+            )
+        ]
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=chunk).delete()
+            Recommendation.objects.bulk_create(rows)
+        saved += len(rows)
+    # Пользователи, у которых не осталось подписок.
+    stale = list(set(
+        Recommendation.objects.values_list('user_id', flat=True).distinct()
+    ) - set(following))
+    for start in range(0, len(stale), batch_size):
+        Recommendation.objects.filter(
+            user_id__in=stale[start:start + batch_size]
+        ).delete()
+    versions.bump(versions.RECOMMENDATIONS)
+    return saved
+
+
+def recommendations_for(user):
+    """Готовые рекомендации пользователя - один запрос к таблице top-K."""
+    if not user.is_authenticated:
+        return []
+    return list(
+        Recommendation.objects.filter(user=user).select_related(
+            'author'
+        )[:settings.RECOMMENDATIONS_PER_USER]
+    )
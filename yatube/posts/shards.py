@@ -0,0 +1,242 @@
+"""Шардирование постов и комментариев по автору.
+
+DATABASE_SHARDS - базы с постами, первая из них - основная (default),
+где живут и все остальные таблицы. Пост хранится на шарде автора
+(author_id % N), комментарии и архив (posts.archive) - на шарде своего
+поста. Пользователи и группы копируются сигналами на все шарды: на них
+ссылаются внешние ключи постов и запросы с author__username.
+
+id поста выдаётся из общего счётчика IdSequence в основной базе так,
+что id % N - номер шарда поста: по id шард известен без запросов. Поэтому
+число шардов после начала записи не меняется (перешардирование - перенос
+данных - здесь не реализовано).
+
+ShardRouter направляет на шард сохранение и чтения через связи
+(author.posts, post.comments). Запросы без автора (главная, группа,
+подписки) выполняются на каждом шарде (everywhere), а упорядоченные
+по (-pub_date, -id) потоки сливаются heapq.merge (ordered_ids).
+
+С одним шардом (по умолчанию) все функции возвращают запросы без
+изменений, и чтение с реплик (core.db.routers) работает как раньше.
+"""
+import heapq
+import threading
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Max, Q
+
+from core.db.routers import record_write
+
+POST_MODELS = {'posts.post', 'posts.archivedpost'}
+
+COMMENT_MODELS = {'posts.comment', 'posts.archivedcomment'}
+
+_lock = threading.Lock()
+
+_blocks = {}
+
+
+def enabled():
+    return len(settings.DATABASE_SHARDS) > 1
+
+
+def for_author(author_id):
+    shards = settings.DATABASE_SHARDS
+    return shards[author_id % len(shards)]
+
+
+def for_post(post_id):
+    shards = settings.DATABASE_SHARDS
+    return shards[post_id % len(shards)]
+
+
+def post_db(post_id):
+    """Шард поста или None без шардирования (базу выберет роутер)."""
+    return for_post(post_id) if enabled() else None
+
+
+def on(queryset, db):
+    return queryset if db is None else queryset.using(db)
+
+
+def on_author(queryset, author_id):
+    return on(queryset, for_author(author_id) if enabled() else None)
+
+
+def on_post(queryset, post_id):
+    return on(queryset, post_db(post_id))
+
+
+def everywhere(queryset):
+    """Тот же запрос на каждом шарде."""
+    if not enabled():
+        return [queryset]
+    return [queryset.using(db) for db in settings.DATABASE_SHARDS]
+
+
+def by_author(queryset, author_ids):
+    """queryset с фильтром по авторам - по запросу на шард."""
+    if not enabled():
+        return [queryset.filter(author_id__in=author_ids)]
+    groups = defaultdict(list)
+    for author_id in author_ids:
+        groups[for_author(author_id)].append(author_id)
+    return [
+        queryset.using(db).filter(author_id__in=ids)
+        for db, ids in groups.items()
+    ]
+
+
+def by_post(post_ids):
+    """{шард или None: [id]} для набора id постов."""
+    groups = defaultdict(list)
+    for post_id in post_ids:
+        groups[post_db(post_id)].append(post_id)
+    return groups
+
+
+def ordered_rows(querysets, *fields, limit=None):
+    """Строки values_list('pub_date', 'id', *fields) в порядке
+    (-pub_date, -id) из запросов к шардам: слияние упорядоченных
+    потоков, не больше limit."""
+    streams = [
+        queryset.order_by('-pub_date', '-id').values_list(
+            'pub_date', 'id', *fields
+        )[:limit].iterator()
+        for queryset in querysets
+    ]
+    if len(streams) == 1:
+        return list(streams[0])
+    return list(islice(heapq.merge(*streams, reverse=True), limit))
+
+
+def ordered_ids(querysets, limit=None):
+    return [row[1] for row in ordered_rows(querysets, limit=limit)]
+
+
+def newer_rows(querysets, pub_date, post_id, limit):
+    """(pub_date, id) постов после (pub_date, post_id) по возрастанию
+    со всех шардов. Сравнивать одни id нельзя: процессы берут номера
+    блоками, и id не растут вместе со временем публикации."""
+    after = Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=post_id)
+    streams = [
+        queryset.filter(after).order_by('pub_date', 'id').values_list(
+            'pub_date', 'id'
+        )[:limit].iterator()
+        for queryset in querysets
+    ]
+    return list(islice(heapq.merge(*streams), limit))
+
+
+def count(querysets):
+    return sum(queryset.count() for queryset in querysets)
+
+
+def _shard_of(model, instance):
+    """Шард для модели поста или комментария по объекту-подсказке:
+    самому посту (комментарию) или объекту, от которого идёт связь."""
+    label = instance._meta.label_lower
+    if label in POST_MODELS:
+        if instance.pk is not None:
+            return for_post(instance.pk)
+        return for_author(instance.author_id)
+    if label in COMMENT_MODELS:
+        return for_post(instance.post_id)
+    if label == settings.AUTH_USER_MODEL.lower() and (
+        model._meta.label_lower in POST_MODELS
+    ):
+        return for_author(instance.pk)
+    return None
+
+
+class ShardRouter:
+    def _db(self, model, hints):
+        instance = hints.get('instance')
+        if not enabled() or instance is None:
+            return None
+        if model._meta.label_lower in POST_MODELS | COMMENT_MODELS:
+            return _shard_of(model, instance)
+        # Автор или группа поста с шарда читаются там же: при каскадном
+        # удалении копии пользователя в основной базе уже нет.
+        if instance._state.db in settings.DATABASE_SHARDS[1:]:
+            return instance._state.db
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        db = self._db(model, hints)
+        if db is not None:
+            record_write()
+        return db
+
+
+def _reserve(name, size):
+    """Забирает из счётчика блок [start, end) номеров."""
+    from .models import ArchivedPost, IdSequence, Post
+
+    sequences = IdSequence.objects.using(DEFAULT_DB_ALIAS)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if not sequences.filter(name=name).exists():
+            # Номера продолжают уже существующие id постов.
+            largest = max(
+                (
+                    queryset.aggregate(largest=Max('id'))['largest'] or 0
+                    for queryset in everywhere(Post.objects.all())
+                    + everywhere(ArchivedPost.objects.all())
+                ),
+                default=0
+            )
+            sequences.get_or_create(
+                name=name,
+                defaults={
+                    'value': largest // len(settings.DATABASE_SHARDS) + 1
+                }
+            )
+        sequences.filter(name=name).update(value=F('value') + size)
+        end = sequences.values_list('value', flat=True).get(name=name)
+    return end - size, end
+
+
+def _next(name):
+    with _lock:
+        current, end = _blocks.get(name, (0, 0))
+        if current >= end:
+            current, end = _reserve(name, settings.SHARD_ID_BLOCK)
+        _blocks[name] = (current + 1, end)
+        return current
+
+
+def allocate_post_id(author_id):
+    """Новый id поста, по которому вычисляется шард автора."""
+    shards = settings.DATABASE_SHARDS
+    return _next('post') * len(shards) + shards.index(for_author(author_id))
+
+
+def _replicas():
+    return settings.DATABASE_SHARDS[1:]
+
+
+def replicate(instance):
+    """Копирует строку пользователя или группы на шарды."""
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+    }
+    for db in _replicas():
+        rows = model._base_manager.using(db)
+        if not rows.filter(pk=instance.pk).update(**values):
+            rows.bulk_create([model(**values)])
+
+
+def unreplicate(instance):
+    """Удаляет копии; посты на шардах удаляются каскадом."""
+    for db in _replicas():
+        type(instance)._base_manager.using(db).filter(
+            pk=instance.pk
+        ).delete()
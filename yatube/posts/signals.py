@@ -0,0 +1,224 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import existence, feeds, live, object_cache, shards, tasks, versions
+from .models import ArchivedPost, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def _exists(existence_filter, value, using):
+    """Ключ добавляется сразу (его видит следующий запрос этого же
+    потока) и ещё раз после коммита: процесс, пересобравший фильтр
+    из базы до коммита, дочитает ключ следующим поколением."""
+    existence_filter.add(value)
+    transaction.on_commit(lambda: existence_filter.add(value), using=using)
+
+
+def _twice(using, update, instance, *args):
+    """Обновление списков лент сразу и ещё раз после коммита: список,
+    собранный из базы до коммита, получит изменение вторым вызовом."""
+    update(instance, *args)
+    transaction.on_commit(lambda: update(instance, *args), using=using)
+
+
+def _forget(cached, instance, using):
+    """Объект сбрасывается сразу и ещё раз после коммита: чтение,
+    успевшее закешировать старую строку до коммита, не переживёт его."""
+    cached.invalidate(instance)
+    transaction.on_commit(lambda: cached.invalidate(instance), using=using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ArchivedPost)
+def forget_cached_object(sender, instance, using, **kwargs):
+    caches = {
+        Post: (object_cache.POSTS, object_cache.POST_CARDS),
+        ArchivedPost: (object_cache.ARCHIVED_POSTS,),
+        Group: (object_cache.GROUPS,),
+        User: (object_cache.USERS,),
+    }[sender]
+    for cached in caches:
+        _forget(cached, instance, using)
+
+
+@receiver(pre_delete, sender=Group)
+def forget_group_posts(sender, instance, using, **kwargs):
+    """Посты удаляемой группы теряют её через UPDATE без сигналов."""
+    pks = [
+        pk
+        for model in (Post, ArchivedPost)
+        for posts in shards.everywhere(model.objects.filter(group=instance))
+        for pk in posts.values_list('pk', flat=True)
+    ]
+    object_cache.forget_posts(pks)
+    transaction.on_commit(
+        lambda: object_cache.forget_posts(pks), using=using
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, using, **kwargs):
+    """Запоминает группу до редактирования поста,
+    чтобы обновить ленту и старой, и новой группы."""
+    instance._previous_group_id = None
+    instance._previous_group_slug = None
+    if instance.pk is not None:
+        (
+            instance._previous_group_id, instance._previous_group_slug
+        ) = Post.objects.using(using).filter(pk=instance.pk).values_list(
+            'group_id', 'group__slug'
+        ).first() or (None, None)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, using, **kwargs):
+    previous_slug = getattr(instance, '_previous_group_slug', None)
+    versions.bump_twice(
+        using,
+        versions.INDEX,
+        versions.author_scope(instance.author.username),
+        versions.post_scope(instance.pk),
+        instance.group and versions.group_scope(instance.group.slug),
+        previous_slug and versions.group_scope(previous_slug),
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, using, **kwargs):
+    """Новый пост уходит подписчикам живых лент после коммита."""
+    if created:
+        _exists(existence.POST_IDS, instance.pk, using)
+        _twice(using, feeds.add_post, instance)
+        transaction.on_commit(lambda: tasks.add_to_follow_feeds.delay(
+            instance.pk, instance.author_id
+        ), using=using)
+        transaction.on_commit(
+            lambda: live.publish_post(instance), using=using
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_moved(sender, instance, created, using, **kwargs):
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if not created and previous_group_id != instance.group_id:
+        _twice(using, feeds.move_post, instance, previous_group_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, using, **kwargs):
+    _twice(using, feeds.remove_post, instance)
+    transaction.on_commit(lambda: tasks.remove_from_follow_feeds.delay(
+        instance.pk, instance.author_id
+    ), using=using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, using, **kwargs):
+    versions.bump_twice(using, versions.post_scope(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def reply_deleted(sender, instance, using, **kwargs):
+    """Счётчик ответов родителя. Если родитель удалён тем же каскадом,
+    UPDATE ничего не меняет."""
+    if instance.parent_id is not None:
+        Comment.objects.using(using).filter(pk=instance.parent_id).update(
+            replies_count=F('replies_count') - 1
+        )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, using, **kwargs):
+    versions.bump_twice(using, versions.follow_scope(instance.user_id))
+    feeds.drop(feeds.follow_scope(instance.user_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, using, created=False, **kwargs):
+    """Новая группа ещё не выводится в чужих лентах."""
+    scopes = [versions.group_scope(instance.slug)]
+    if not created:
+        scopes.append(versions.GROUPS)
+    versions.bump_twice(using, *scopes)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, using, **kwargs):
+    """Слаг мог измениться при редактировании."""
+    _exists(existence.GROUP_SLUGS, instance.slug, using)
+
+
+# Поля пользователя, которые выводятся в карточках и на страницах.
+USER_CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_names(sender, instance, using, update_fields=None,
+                            **kwargs):
+    """Запоминает имена до сохранения: ленты сбрасываются, только если
+    они изменились, а при переименовании - и по старому имени."""
+    instance._previous_names = None
+    if instance.pk is None or (
+        update_fields and not set(update_fields) & set(USER_CARD_FIELDS)
+    ):
+        return
+    instance._previous_names = User.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list(*USER_CARD_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, using, **kwargs):
+    """Имя автора выводится в карточках всех лент. Регистрация
+    и вход (last_login) ленты не затрагивают."""
+    if created:
+        _exists(existence.USERNAMES, instance.username, using)
+        return
+    previous = getattr(instance, '_previous_names', None)
+    names = tuple(getattr(instance, field) for field in USER_CARD_FIELDS)
+    if previous is None or previous == names:
+        return
+    previous_username = previous[0]
+    versions.bump_twice(
+        using,
+        versions.USERS,
+        versions.author_scope(instance.username),
+        versions.author_scope(previous_username),
+    )
+    if previous_username != instance.username:
+        _exists(existence.USERNAMES, instance.username, using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def replicate_to_shards(sender, instance, using, update_fields=None,
+                        **kwargs):
+    """Копии пользователей и групп на шардах постов (posts.shards).
+    Время входа на шардах не нужно."""
+    if not shards.enabled() or using != DEFAULT_DB_ALIAS:
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    shards.replicate(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def unreplicate_from_shards(sender, instance, using, **kwargs):
+    if shards.enabled() and using == DEFAULT_DB_ALIAS:
+        shards.unreplicate(instance)
@@ -0,0 +1,47 @@
+from sorl.thumbnail import get_thumbnail
+
+from tasks.registry import task
+
+from . import deletion, feeds, shards
+from .models import Post
+
+# Те же параметры, что у {% thumbnail %} в карточке и на странице поста.
+POST_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+
+
+@task
+def generate_thumbnail(post_id):
+    """Миниатюра создаётся заранее, и первый показ поста
+    не тратит время на обработку картинки."""
+    image = shards.on_post(Post.objects.all(), post_id).filter(
+        pk=post_id
+    ).values_list(
+        'image', flat=True
+    ).first()
+    if image:
+        geometry, options = POST_THUMBNAIL
+        get_thumbnail(image, geometry, **options)
+
+
+@task
+def delete_user(user_id):
+    """Удаление пользователя с историей пачками, см. posts.deletion."""
+    deletion.delete_user(user_id)
+
+
+@task
+def delete_group(group_id):
+    deletion.delete_group(group_id)
+
+
+@task
+def add_to_follow_feeds(post_id, author_id):
+    """Подписчиков у автора может быть много: их ленты обновляются
+    вне запроса, создавшего пост. Списки лент правятся в кеше, общем
+    с процессами сайта (проверка core.E005)."""
+    feeds.add_to_followers(post_id, author_id)
+
+
+@task
+def remove_from_follow_feeds(post_id, author_id):
+    feeds.remove_from_followers(post_id, author_id)
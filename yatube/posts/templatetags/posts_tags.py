@@ -0,0 +1,41 @@
+from django import template
+from django.conf import settings
+
+from posts import write_behind
+from posts.forms import CommentForm
+from posts.models import Follow
+from posts.recommendations import recommendations_for
+
+register = template.Library()
+
+
+@register.simple_tag
+def is_following(user, author_username):
+    pending = write_behind.pending_follows(user).get(author_username)
+    if pending is not None:
+        return pending[1]
+    return user.is_authenticated and Follow.objects.filter(
+        user=user,
+        author__username=author_username
+    ).exists()
+
+
+@register.simple_tag
+def recommended_authors(user):
+    return recommendations_for(user)
+
+
+@register.simple_tag
+def live_feed_enabled():
+    return settings.LIVE_FEED
+
+
+@register.simple_tag
+def new_comment_form():
+    return CommentForm()
+
+
+@register.simple_tag
+def pending_comments(user, post_id, parent_id=None):
+    # Без ответа шаблон передаёт пустую строку.
+    return write_behind.pending_comments(user, post_id, parent_id or None)
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Данные для тестирования: 12 постов автора в группе."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='api_slug',
+            description='Тестовое описание',
+        )
+        for i in range(12):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_pagination_walks_whole_feed(self):
+        """Курсор проходит всю ленту без пропусков и повторов."""
+        url = reverse('posts:api_index') + '?limit=5'
+        seen = []
+        while url:
+            data = self.guest_client.get(url).json()
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_fields_selection(self):
+        """Параметр fields ограничивает набор полей."""
+        url = reverse('posts:api_group_list', args=(self.group.slug,))
+        data = self.guest_client.get(url, {'fields': 'id,author'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        self.assertEqual(data['results'][0]['author'], 'api_author')
+        response = self.guest_client.get(url, {'fields': 'password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_etag_revalidation(self):
+        """Неизменная лента отвечает 304, новая запись меняет ETag."""
+        url = reverse('posts:api_profile', args=(self.author.username,))
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_group_rename_changes_feed_etags(self):
+        """Слаг группы есть в постах любой ленты."""
+        url = reverse('posts:api_index')
+        etag = self.guest_client.get(url)['ETag']
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            'renamed', [post['group'] for post in response.json()['results']]
+        )
+
+    def test_follow_feed_requires_auth(self):
+        """Лента подписок доступна только авторизованному."""
+        url = reverse('posts:api_follow_index')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        reader = User.objects.create_user(username='api_reader')
+        client = Client()
+        client.force_login(reader)
+        self.assertEqual(client.get(url).json()['results'], [])
+        Follow.objects.create(user=reader, author=self.author)
+        data = client.get(url, {'limit': 3}).json()
+        self.assertEqual(len(data['results']), 3)
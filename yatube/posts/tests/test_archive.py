@@ -0,0 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import archive, deletion
+from posts.models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.old = []
+        for number in range(12):
+            post = Post.objects.create(
+                author=self.author, group=self.group,
+                text=f'Старый пост {number}'
+            )
+            self.old.append(post)
+        Post.objects.filter(pk__in=[post.pk for post in self.old]).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        self.fresh = Post.objects.create(
+            author=self.author, group=self.group, text='Свежий пост'
+        )
+        Comment.objects.create(
+            post=self.old[0], author=self.reader, text='Давний комментарий'
+        )
+
+    def test_old_posts_move_with_comments(self):
+        self.assertEqual(archive.archive_posts(days=365, batch_size=5), 12)
+        self.assertEqual(list(Post.objects.all()), [self.fresh])
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        self.assertFalse(Comment.objects.exists())
+        comment = ArchivedComment.objects.get()
+        self.assertEqual(comment.post_id, self.old[0].pk)
+        archived = ArchivedPost.objects.get(pk=self.old[0].pk)
+        self.assertEqual(archived.text, self.old[0].text)
+        self.assertEqual(archived.excerpt, self.old[0].excerpt)
+
+    @mock.patch.object(archive, 'COMMENT_CHUNK', 2)
+    def test_comments_move_in_chunks_parents_first(self):
+        root = Comment.objects.get()
+        reply = Comment.objects.create(
+            post=self.old[0], author=self.author, text='Ответ', parent=root
+        )
+        for number in range(3):
+            Comment.objects.create(
+                post=self.old[0], author=self.reader,
+                text=f'Ответ на ответ {number}', parent=reply
+            )
+        archive.archive_posts(days=365)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedComment.objects.count(), 5)
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=reply.pk).parent_id, root.pk
+        )
+
+    def test_post_detail_reads_archive(self):
+        url = reverse('posts:post_detail', args=(self.old[0].pk,))
+        self.client.get(url)
+        archive.archive_posts(days=365)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Давний комментарий')
+        self.assertContains(response, 'комментарии закрыты')
+        self.assertEqual(
+            response.context['post'], ArchivedPost.objects.get(
+                pk=self.old[0].pk
+            )
+        )
+
+    def test_profile_continues_with_archive(self):
+        archive.archive_posts(days=365)
+        url = reverse('posts:profile', args=(self.author.username,))
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url + '?page=2').context['page_obj']
+        self.assertEqual(first.paginator.count, 13)
+        self.assertEqual(first[0], self.fresh)
+        self.assertEqual(
+            [post.pk for post in list(first)[1:] + list(second)],
+            [post.pk for post in reversed(self.old)]
+        )
+
+    def test_api_profile_continues_with_archive(self):
+        archive.archive_posts(days=365)
+        url = reverse('posts:api_profile', args=(self.author.username,))
+        first = self.client.get(url, {'limit': 10}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(
+            [post['id'] for post in first['results'] + second['results']],
+            [self.fresh.pk] + [post.pk for post in reversed(self.old)]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_index_shows_only_hot_posts(self):
+        self.client.get(reverse('posts:index'))
+        archive.archive_posts(days=365)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.fresh])
+
+    def test_deletion_covers_archive(self):
+        archive.archive_posts(days=365)
+        deletion.delete_user(self.author.pk)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_posts', days=365, batch_size=10, stdout=out)
+        self.assertIn('Перенесено: 10', out.getvalue())
+        self.assertIn('Перенесено: 12', out.getvalue())
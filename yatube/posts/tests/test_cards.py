@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase
+
+from posts import object_cache
+from posts.cards import get_cards
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой'
+        )
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Текст поста'
+        )
+        self.plain = Post.objects.create(author=self.user, text='Без группы')
+
+    def test_cards_compare_equal_to_models(self):
+        card = get_cards([self.post.id])[self.post.id]
+        self.assertEqual(card, self.post)
+        self.assertEqual(card.author, self.user)
+        self.assertEqual(card.group, self.group)
+        self.assertNotEqual(card, self.plain)
+        self.assertEqual(card.author.get_full_name(), 'Лев Толстой')
+
+    def test_user_cache_keeps_only_public_fields(self):
+        self.user.set_password('secret')
+        self.user.email = 'leo@example.com'
+        self.user.save()
+        row = object_cache.USERS.get_rows([self.user.pk])[self.user.pk]
+        self.assertEqual(row, (self.user.pk, 'leo', 'Лев', 'Толстой'))
+        author = object_cache.USERS.get(username='leo')
+        self.assertEqual(author.get_full_name(), 'Лев Толстой')
+
+    def test_cards_are_built_without_models(self):
+        get_cards([self.post.id, self.plain.id])
+        with mock.patch.object(Post, 'from_db') as from_db:
+            cards = get_cards([self.post.id, self.plain.id])
+        from_db.assert_not_called()
+        self.assertIsNone(cards[self.plain.id].group)
+
+    def test_card_renders_like_model(self):
+        request = RequestFactory().get('/')
+        for post in (self.post, self.plain):
+            with self.subTest(post=post.text):
+                card = get_cards([post.id])[post.id]
+                self.assertHTMLEqual(
+                    render_to_string(
+                        'includes/post_card.html', {'post': card}, request
+                    ),
+                    render_to_string(
+                        'includes/post_card.html', {'post': post}, request
+                    ),
+                )
@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import deletion
+from posts.models import Comment, Follow, Group, Post, Recommendation
+
+User = get_user_model()
+
+
+class BulkDeletionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='prolific')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {number}'
+            )
+            for number in range(5)
+        ]
+        self.kept = Post.objects.create(
+            author=self.reader, group=self.group, text='Пост читателя'
+        )
+        for post in self.posts[:3]:
+            Comment.objects.create(post=post, author=self.reader, text='Ок')
+        Comment.objects.create(
+            post=self.kept, author=self.author, text='Ответ'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        Recommendation.objects.create(
+            user=self.reader, author=self.author, score=1
+        )
+
+    def test_delete_user_removes_history_in_chunks(self):
+        reports = []
+        deletion.delete_user(
+            self.author.pk, chunk_size=2,
+            report=lambda step, done: reports.append((step, done))
+        )
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Recommendation.objects.exists())
+        self.assertIn(('posts', 2), reports)
+        self.assertEqual(
+            deletion.get_progress('user', self.author.pk),
+            {
+                'steps': {
+                    'comments': 4, 'posts': 5, 'follows': 2,
+                    'recommendations': 1,
+                },
+                'finished': True,
+            }
+        )
+
+    def test_deleted_posts_leave_feeds(self):
+        self.client.get(reverse('posts:index'))
+        deletion.delete_user(self.author.pk)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.kept])
+
+    def test_delete_group_detaches_posts(self):
+        deletion.delete_group(self.group.pk, chunk_size=4)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'все записи группы')
+
+    def test_command_reports_progress(self):
+        out = StringIO()
+        call_command(
+            'bulk_delete', 'user', 'prolific', chunk_size=3, stdout=out
+        )
+        self.assertIn('posts: 3', out.getvalue())
+        self.assertIn('posts: 5', out.getvalue())
+
+    def test_admin_action_deletes_in_background(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'secret'
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_in_background',
+            '_selected_action': [self.author.pk],
+        })
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
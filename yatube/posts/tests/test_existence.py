@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class MissingObjectsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(author=self.user, text='Пост')
+
+    def test_misses_do_not_query_database(self):
+        urls = (
+            reverse('posts:profile', args=('nobody',)),
+            reverse('posts:group_list', args=('nothing',)),
+            reverse('posts:post_detail', args=(self.post.id + 100,)),
+        )
+        for url in urls:
+            self.client.get(url)
+        for url in urls:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertContains(response, url, status_code=404)
+
+    def test_created_objects_are_found(self):
+        self.client.get(reverse('posts:profile', args=('newcomer',)))
+        User.objects.create_user(username='newcomer')
+        response = self.client.get(
+            reverse('posts:profile', args=('newcomer',))
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_object_miss_is_remembered(self):
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        self.post.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_prerendered_page_shows_user_header(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:profile', args=('nobody',))
+        )
+        self.assertContains(response, 'author', status_code=404)
+        self.assertContains(response, '/profile/nobody/', status_code=404)
+
+    def test_missing_comment_does_not_hide_post(self):
+        """404 ветки несуществующего комментария не запоминается как
+        отсутствующий пост."""
+        response = self.client.get(
+            reverse('posts:comment_thread', args=(self.post.id, 100))
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def _ndjson(archive, name):
+    return [
+        json.loads(line)
+        for line in archive.read(name).decode().splitlines()
+    ]
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, EXPORT_CHUNK_SIZE=64)
+class ExportTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+        self.plain = Post.objects.create(author=self.user, text='Без группы')
+        Post.objects.create(author=self.other, text='Чужой пост')
+        Comment.objects.create(
+            post=self.plain, author=self.user, text='Свой комментарий'
+        )
+        Comment.objects.create(post=self.plain, author=self.other, text='Ок')
+        Follow.objects.create(user=self.user, author=self.other)
+        Follow.objects.create(user=self.other, author=self.user)
+        self.client.force_login(self.user)
+
+    def _download(self):
+        response = self.client.get(reverse('posts:export_data'))
+        chunks = list(response.streaming_content)
+        return response, chunks, zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+    def test_archive_contents(self):
+        response, chunks, archive = self._download()
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(
+            [row['text'] for row in _ndjson(archive, 'posts.ndjson')],
+            ['Пост с картинкой', 'Без группы']
+        )
+        self.assertEqual(
+            _ndjson(archive, 'posts.ndjson')[0]['group__slug'], 'group'
+        )
+        self.assertEqual(
+            [row['text'] for row in _ndjson(archive, 'comments.ndjson')],
+            ['Свой комментарий']
+        )
+        self.assertEqual(
+            _ndjson(archive, 'follows.ndjson'),
+            [{'author__username': 'other'}]
+        )
+        self.assertEqual(
+            _ndjson(archive, 'followers.ndjson'),
+            [{'user__username': 'other'}]
+        )
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), SMALL_GIF
+        )
+        self.assertIsNone(archive.testzip())
+
+    def test_missing_image_is_skipped(self):
+        default_storage.delete(self.post.image.name)
+        _, _, archive = self._download()
+        self.assertEqual(
+            [name for name in archive.namelist() if name.startswith('images')],
+            []
+        )
+
+    def test_anonymous_is_redirected(self):
+        self.client.logout()
+        response = self.client.get(reverse('posts:export_data'))
+        self.assertRedirects(
+            response,
+            reverse('users:login') + '?next=' + reverse('posts:export_data')
+        )
+
+    def test_command_writes_archive(self):
+        path = os.path.join(TEMP_MEDIA_ROOT, 'export.zip')
+        call_command('export_user', 'writer', path, stdout=StringIO())
+        with zipfile.ZipFile(path) as archive:
+            self.assertIn('posts.ndjson', archive.namelist())
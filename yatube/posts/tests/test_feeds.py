@@ -0,0 +1,107 @@
+from array import array
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import TestCase, override_settings
+
+from posts import feeds, shards, tasks
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.user, group=self.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+        cache.clear()
+
+    def page(self, feed, number=1, per_page=2):
+        return list(Paginator(feed, per_page).page(number))
+
+    def test_cached_feed_page_needs_no_queries(self):
+        self.page(feeds.group_feed(self.group))
+        with self.assertNumQueries(0):
+            posts = self.page(feeds.group_feed(self.group))
+            self.assertEqual(
+                [post.text for post in posts], ['Пост 2', 'Пост 1']
+            )
+            self.assertEqual(posts[0].author.username, 'author')
+
+    def test_created_and_deleted_posts_update_list(self):
+        self.page(feeds.index_feed())
+        post = Post.objects.create(author=self.user, text='Новый')
+        self.assertEqual(self.page(feeds.index_feed())[0], post)
+        post.delete()
+        self.assertEqual(self.page(feeds.index_feed())[0], self.posts[2])
+        self.assertEqual(feeds.index_feed().count(), 3)
+
+    def test_list_out_of_sync_is_rebuilt(self):
+        """Посты, не относящиеся к ленте, приводят к пересборке;
+        число постов текущий запрос уже взял из старого списка."""
+        other = User.objects.create_user(username='other')
+        stranger = Post.objects.create(author=other, text='Чужой')
+        cache.set(
+            feeds._key(feeds.author_scope(self.user.pk)),
+            (array('q', [stranger.pk]).tobytes(), True)
+        )
+        self.assertNotIn(stranger, self.page(feeds.author_feed(self.user)))
+        posts = self.page(feeds.author_feed(self.user))
+        self.assertEqual(posts, [self.posts[2], self.posts[1]])
+
+    @override_settings(FEED_IDS_MAX=2)
+    def test_long_feed_keeps_head_only(self):
+        feed = feeds.index_feed()
+        self.assertEqual(feed.count(), 3)
+        self.assertEqual(self.page(feed, 2), [self.posts[0]])
+
+    def test_complete_list_is_cut_when_it_outgrows_limit(self):
+        key = feeds._key(feeds.index_scope())
+        self.page(feeds.index_feed())
+        with override_settings(FEED_IDS_MAX=3):
+            post = Post.objects.create(author=self.user, text='Новый')
+            raw, complete = cache.get(key)
+            self.assertEqual(len(raw), 3 * array('q').itemsize)
+            self.assertFalse(complete)
+            self.assertEqual(feeds.index_feed().count(), 4)
+            self.assertEqual(self.page(feeds.index_feed())[0], post)
+
+    def test_list_built_during_write_is_not_stored(self):
+        """Запись, пришедшая во время сборки, меняет поколение ленты,
+        и собранный без неё список не сохраняется."""
+        key = feeds._key(feeds.index_scope())
+        ordered_ids = shards.ordered_ids
+
+        def write_during_build(querysets, limit):
+            ids = ordered_ids(querysets, limit)
+            feeds.drop(feeds.index_scope())
+            return ids
+
+        with mock.patch.object(shards, 'ordered_ids', write_during_build):
+            self.page(feeds.index_feed())
+        self.assertIsNone(cache.get(key))
+        self.page(feeds.index_feed())
+        self.assertIsNotNone(cache.get(key))
+
+    def test_follower_feeds_are_updated_by_task(self):
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        self.page(feeds.follow_feed(reader))
+        post = Post.objects.create(author=self.user, text='Новый')
+        tasks.add_to_follow_feeds(post.pk, self.user.pk)
+        self.assertEqual(self.page(feeds.follow_feed(reader))[0], post)
+        post.delete()
+        tasks.remove_from_follow_feeds(post.pk, self.user.pk)
+        self.assertEqual(
+            self.page(feeds.follow_feed(reader))[0], self.posts[2]
+        )
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from posts.forms import CommentForm
@@ -9,6 +10,7 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.db import OperationalError
 
 User = get_user_model()
 
@@ -78,6 +80,34 @@ class PostModelTest(TestCase):
             reverse('posts:profile', args=(self.user,))
         )
 
+    @override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+    def test_locked_thumbnail_task_does_not_duplicate_post(self):
+        """Повторяется только занятая запись, а не всё
+        представление: пост создаётся один раз."""
+        uploaded = SimpleUploadedFile(
+            name='locked.gif',
+            content=(
+                b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00'
+                b'\x00\x21\xF9\x04\x00\x00\x00\x00\x00\x2C\x00\x00'
+                b'\x00\x00\x01\x00\x01\x00\x00\x02\x02\x44\x01\x00\x3B'
+            ),
+            content_type='image/gif'
+        )
+        # TestCase держит транзакцию, а повтор разрешён только вне неё.
+        outside = mock.Mock(in_atomic_block=False)
+        with mock.patch(
+            'posts.views.generate_thumbnail.delay',
+            side_effect=[OperationalError('database is locked'), None]
+        ) as delay, mock.patch(
+            'core.db.sqlite.transaction.get_connection', return_value=outside
+        ):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                {'text': 'Пост с картинкой', 'image': uploaded}
+            )
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(Post.objects.count(), 1)
+
     def test_edit_post(self):
         """Валидная форма редактирует запись и сохраняет ее в Post.
         Пользователь - автор поста."""
@@ -0,0 +1,114 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import live, versions
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def events(chunks):
+    """Разбирает события SSE: [(id, данные)]."""
+    parsed = []
+    for chunk in chunks:
+        fields = dict(
+            line.split(': ', 1)
+            for line in chunk.decode().splitlines()
+            if ': ' in line and not line.startswith(':')
+        )
+        if fields.get('event') == 'post':
+            data = json.loads(fields['data'])
+            parsed.append((data['id'], data))
+    return parsed
+
+
+@override_settings(LIVE_FEED=True, LIVE_MAX_DURATION=0.2, LIVE_HEARTBEAT=0.05)
+class LiveFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.old = Post.objects.create(author=cls.author, text='Старый пост')
+        cls.new = Post.objects.create(
+            author=cls.author, group=cls.group, text='Новый пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_published_post_is_pushed_to_subscribers(self):
+        """Подписчик ленты группы получает карточку нового поста."""
+        response = self.client.get(
+            reverse('posts:live_group_list', args=(self.group.slug,))
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        next(stream)
+        live.publish_post(self.new)
+        received = events(stream)
+        self.assertEqual([post_id for post_id, _ in received], [self.new.id])
+        self.assertIn('Новый пост', received[0][1]['html'])
+
+    def test_reconnect_receives_missed_posts(self):
+        response = self.client.get(
+            reverse('posts:live_index'),
+            HTTP_LAST_EVENT_ID=live.event_id(self.old)
+        )
+        received = events(response.streaming_content)
+        self.assertEqual([post_id for post_id, _ in received], [self.new.id])
+
+    def test_reconnect_follows_publication_order(self):
+        """Пост с меньшим id, но опубликованный позже (id выдаются
+        блоками), не теряется при переподключении."""
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=self.new.pub_date + timedelta(seconds=1)
+        )
+        response = self.client.get(
+            reverse('posts:live_index'),
+            HTTP_LAST_EVENT_ID=live.event_id(self.new)
+        )
+        received = events(response.streaming_content)
+        self.assertEqual([post_id for post_id, _ in received], [self.old.id])
+
+    def test_malformed_last_event_id_is_ignored(self):
+        response = self.client.get(
+            reverse('posts:live_index'), HTTP_LAST_EVENT_ID='2026-13-40/1'
+        )
+        self.assertEqual(events(response.streaming_content), [])
+
+    def test_other_topics_are_not_delivered(self):
+        subscription = live.broker.subscribe([versions.group_scope('other')])
+        try:
+            live.publish_post(self.new)
+            self.assertTrue(subscription.empty())
+        finally:
+            live.broker.unsubscribe(subscription)
+
+    @override_settings(LIVE_MAX_STREAMS=1)
+    def test_streams_over_limit_are_rejected(self):
+        url = reverse('posts:live_index')
+        first = self.client.get(url)
+        rejected = self.client.get(url)
+        self.assertEqual(rejected.status_code, 503)
+        self.assertTrue(rejected.has_header('Retry-After'))
+        first.close()
+        self.assertEqual(live.slots.taken, 0)
+        self.client.get(url).close()
+        self.assertEqual(live.slots.taken, 0)
+
+
+@override_settings(LIVE_FEED=False)
+class LiveFeedDisabledTest(TestCase):
+    def test_feed_pages_do_not_open_streams(self):
+        """Без ASGI живые ленты выключены: страница не подключает
+        live.js, а адрес потока отвечает 404."""
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'live.js')
+        response = self.client.get(reverse('posts:live_index'))
+        self.assertEqual(response.status_code, 404)
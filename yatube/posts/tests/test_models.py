@@ -1,7 +1,11 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
 from ..models import Group, Post
+from ..utils import make_excerpt
 
 User = get_user_model()
 
@@ -45,3 +49,39 @@ class PostModelTest(TestCase):
                     self.post._meta.get_field(field).verbose_name,
                     expected_value
                 )
+
+
+@override_settings(POST_EXCERPT_LENGTH=20)
+class PostExcerptTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+
+    def test_short_text_is_its_own_excerpt(self):
+        self.assertEqual(make_excerpt('Два слова'), ('Два слова', 2, False))
+
+    def test_long_text_is_cut_on_word_boundary(self):
+        excerpt, words, truncated = make_excerpt(
+            'Очень длинный текст поста для ленты'
+        )
+        self.assertEqual(excerpt, 'Очень длинный текст…')
+        self.assertEqual(words, 6)
+        self.assertTrue(truncated)
+
+    def test_excerpt_follows_text_on_save(self):
+        post = Post.objects.create(author=self.user, text='Короткий')
+        post.text = 'Очень длинный текст поста для ленты'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertTrue(post.is_truncated)
+        self.assertEqual(post.excerpt, 'Очень длинный текст…')
+
+    def test_backfill_fills_existing_posts(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Старый пост {number} без отрывка')
+            for number in range(5)
+        )
+        call_command('backfill_excerpts', batch_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        self.assertEqual(
+            Post.objects.filter(is_truncated=True, word_count=5).count(), 5
+        )
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Recommendation
+from posts.recommendations import (
+    rebuild_recommendations, sample_followers
+)
+
+User = get_user_model()
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Данные для тестирования.
+        Граф подписок: reader -> writer_1, writer_2;
+        writer_1 -> star; twin -> writer_1, writer_2, hidden_gem."""
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.writer_1 = User.objects.create_user(username='writer_1')
+        cls.writer_2 = User.objects.create_user(username='writer_2')
+        cls.star = User.objects.create_user(username='star')
+        cls.twin = User.objects.create_user(username='twin')
+        cls.hidden_gem = User.objects.create_user(username='hidden_gem')
+        Follow.objects.bulk_create([
+            Follow(user=cls.reader, author=cls.writer_1),
+            Follow(user=cls.reader, author=cls.writer_2),
+            Follow(user=cls.writer_1, author=cls.star),
+            Follow(user=cls.twin, author=cls.writer_1),
+            Follow(user=cls.twin, author=cls.writer_2),
+            Follow(user=cls.twin, author=cls.hidden_gem),
+        ])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def test_rebuild_recommends_friends_of_friends_and_cofollows(self):
+        """Рекомендуются авторы друзей и авторы похожих читателей,
+        но не те, на кого пользователь уже подписан."""
+        rebuild_recommendations()
+        recommended = set(
+            Recommendation.objects.filter(user=self.reader).values_list(
+                'author__username', flat=True
+            )
+        )
+        self.assertEqual(recommended, {'star', 'hidden_gem'})
+
+    def test_rebuild_in_batches_drops_users_without_follows(self):
+        rebuild_recommendations()
+        self.assertTrue(
+            Recommendation.objects.filter(user=self.twin).exists()
+        )
+        Follow.objects.filter(user=self.twin).delete()
+        rebuild_recommendations(batch_size=1)
+        self.assertFalse(
+            Recommendation.objects.filter(user=self.twin).exists()
+        )
+        self.assertEqual(
+            set(Recommendation.objects.filter(
+                user=self.reader
+            ).values_list('author__username', flat=True)),
+            {'star'}
+        )
+
+    @override_settings(RECOMMENDATIONS_MAX_FOLLOWERS=1)
+    def test_popular_author_followers_are_sampled(self):
+        followers = {1: set(range(100)), 2: {5, 6}}
+        sampled = sample_followers(followers, 3)
+        self.assertEqual(len(sampled[1]), 3)
+        self.assertLessEqual(set(sampled[1]), followers[1])
+        self.assertEqual(sampled, sample_followers(followers, 3))
+        self.assertEqual(sorted(sampled[2]), [5, 6])
+        rebuild_recommendations()
+        self.assertTrue(Recommendation.objects.exists())
+
+    def test_recommendations_shown_on_follow_index(self):
+        """Рекомендации выводятся в ленте подписок."""
+        rebuild_recommendations()
+        response = self.client.get(reverse('posts:follow_index'))
+        authors = [
+            recommendation.author
+            for recommendation in response.context['recommendations']
+        ]
+        self.assertIn(self.star, authors)
+        self.assertContains(response, 'На кого подписаться')
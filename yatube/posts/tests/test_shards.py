@@ -0,0 +1,201 @@
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import deletion, shards, write_behind
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(
+    'shard_1' in settings.DATABASES, 'второй шард есть в профиле test'
+)
+@override_settings(DATABASE_SHARDS=['default', 'shard_1'])
+class ShardingTest(TestCase):
+    databases = {'default', 'shard_1'}
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(4)
+        ]
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=user, group=self.group, text=f'Пост {user.username}'
+            )
+            for user in self.users
+        ]
+
+    def _page_ids(self, url):
+        return [
+            post.pk for post in self.client.get(url).context['page_obj']
+        ]
+
+    def test_posts_live_on_author_shard(self):
+        self.assertEqual(
+            {shards.for_author(user.pk) for user in self.users},
+            {'default', 'shard_1'}
+        )
+        for post in self.posts:
+            with self.subTest(post=post.text):
+                db = shards.for_author(post.author_id)
+                self.assertEqual(shards.for_post(post.pk), db)
+                self.assertTrue(
+                    Post.objects.using(db).filter(pk=post.pk).exists()
+                )
+        self.assertEqual(
+            Post.objects.using('default').count()
+            + Post.objects.using('shard_1').count(),
+            len(self.posts)
+        )
+
+    def test_users_and_groups_are_replicated(self):
+        self.assertEqual(User.objects.using('shard_1').count(), 4)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(
+            Group.objects.using('shard_1').get(pk=self.group.pk).title,
+            'Новое название'
+        )
+
+    def test_feeds_merge_shards(self):
+        newest_first = [post.pk for post in reversed(self.posts)]
+        self.assertEqual(self._page_ids(reverse('posts:index')), newest_first)
+        self.assertEqual(
+            self._page_ids(reverse('posts:group_list', args=('group',))),
+            newest_first
+        )
+
+    def test_api_cursor_pages_merge_shards(self):
+        url = reverse('posts:api_index')
+        first = self.client.get(url, {'limit': 3, 'fields': 'id'}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            [post.pk for post in reversed(self.posts)]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_follow_index_merges_followed_authors(self):
+        reader, first, second = self.users[0], self.users[1], self.users[2]
+        Follow.objects.create(user=reader, author=first)
+        Follow.objects.create(user=reader, author=second)
+        self.client.force_login(reader)
+        self.assertEqual(
+            self._page_ids(reverse('posts:follow_index')),
+            [self.posts[2].pk, self.posts[1].pk]
+        )
+
+    def test_pending_follows_read_author_shards(self):
+        """Подписки, ещё не записанные в базу, тоже читают посты
+        с шардов авторов."""
+        reader, first, second = self.users[0], self.users[1], self.users[2]
+        Follow.objects.create(user=reader, author=first)
+        self.client.force_login(reader)
+        spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool, ignore_errors=True)
+        with self.settings(WRITE_BEHIND=True, WRITE_BEHIND_DIR=spool):
+            write_behind.enqueue_follow(reader, second)
+            write_behind.enqueue_follow(reader, first, following=False)
+            self.assertEqual(
+                self._page_ids(reverse('posts:follow_index')),
+                [self.posts[2].pk]
+            )
+
+    def test_write_behind_batch_is_atomic_on_post_shard(self):
+        """Сбой при связывании ответов откатывает вставку на шарде."""
+        post = next(
+            post for post in self.posts
+            if shards.for_post(post.pk) == 'shard_1'
+        )
+        record = {
+            'type': 'comment', 'post_id': post.pk, 'parent_id': None,
+            'text': 'Сбой', 'key': 'broken-batch',
+        }
+        with mock.patch.object(
+            write_behind.threads, 'link', side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            write_behind.apply([(self.users[0].pk, record)])
+        self.assertFalse(
+            Comment.objects.using('shard_1').filter(text='Сбой').exists()
+        )
+
+    def test_profile_reads_author_shard(self):
+        for user, post in zip(self.users, self.posts):
+            with self.subTest(user=user.username):
+                self.assertEqual(
+                    self._page_ids(
+                        reverse('posts:profile', args=(user.username,))
+                    ),
+                    [post.pk]
+                )
+
+    def test_post_create_and_comment_are_routed(self):
+        author = self.users[1]
+        post = self.posts[0]
+        self.client.force_login(author)
+        self.client.post(reverse('posts:post_create'), {'text': 'Новый'})
+        created = Post.objects.using(shards.for_author(author.pk)).get(
+            text='Новый'
+        )
+        self.client.post(
+            reverse('posts:add_comment', args=(post.pk,)),
+            {'text': 'Комментарий'}
+        )
+        db = shards.for_post(post.pk)
+        self.assertTrue(
+            Comment.objects.using(db).filter(
+                post_id=post.pk, author=author
+            ).exists()
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, 'Комментарий')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(created.pk,))
+        )
+        self.assertEqual(response.context['post'], created)
+
+    def test_commit_hooks_wait_for_post_shard(self):
+        """Действия после коммита ждут транзакцию шарда поста,
+        а не основной базы."""
+        author = next(
+            user for user in self.users
+            if shards.for_author(user.pk) == 'shard_1'
+        )
+        with mock.patch('posts.signals.transaction.on_commit') as on_commit:
+            post = Post.objects.create(author=author, text='На шарде')
+            post.delete()
+        self.assertTrue(on_commit.call_args_list)
+        for call in on_commit.call_args_list:
+            self.assertEqual(call[1].get('using'), 'shard_1')
+
+    def test_delete_user_on_its_shard(self):
+        author = self.users[1]
+        Comment.objects.create(
+            post=self.posts[0], author=author, text='Ответ'
+        )
+        deletion.delete_user(author.pk)
+        self.assertFalse(
+            Post.objects.using(shards.for_author(author.pk)).filter(
+                author_id=author.pk
+            ).exists()
+        )
+        self.assertFalse(
+            Comment.objects.using(shards.for_post(self.posts[0].pk)).exists()
+        )
+        self.assertFalse(
+            User.objects.using('shard_1').filter(pk=author.pk).exists()
+        )
@@ -0,0 +1,225 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import archive, deletion, threads, write_behind
+from posts.models import ArchivedComment, Comment, Post
+
+User = get_user_model()
+
+SPOOL_DIR = tempfile.mkdtemp()
+
+
+class CommentThreadsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def comment(self, text, parent=None, author=None):
+        return Comment.objects.create(
+            post=self.post, author=author or self.reader, text=text,
+            parent=parent
+        )
+
+    def test_reply_gets_path_depth_and_counter(self):
+        root = self.comment('Корень')
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Ответ', 'parent': root.pk}
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:comment_thread', args=(self.post.id, root.pk))
+        )
+        reply = Comment.objects.get(text='Ответ')
+        root.refresh_from_db()
+        self.assertEqual(reply.parent, root)
+        self.assertEqual(reply.depth, 1)
+        self.assertEqual(reply.path, root.path + threads.segment(reply.pk))
+        self.assertEqual(root.replies_count, 1)
+
+    def test_unknown_parent_is_404(self):
+        other = Post.objects.create(author=self.author, text='Другой пост')
+        foreign = Comment.objects.create(
+            post=other, author=self.reader, text='Чужой'
+        )
+        url = reverse('posts:add_comment', args=(self.post.id,))
+        for parent in (foreign.pk, 'abc'):
+            with self.subTest(parent=parent):
+                response = self.client.post(
+                    url, {'text': 'Ответ', 'parent': parent}
+                )
+                self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.filter(text='Ответ').exists())
+
+    def test_post_detail_renders_threads_in_order(self):
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        self.comment('Ответ на первый', first)
+        self.comment('Ответ на второй', second)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Первый', 'Ответ на первый', 'Второй', 'Ответ на второй']
+        )
+
+    def test_subtree_is_one_ordered_query(self):
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        deep = self.comment('Глубже', reply)
+        self.comment('Сосед')
+        bounds = threads.subtree_bounds(root.path)
+        with self.assertNumQueries(1):
+            subtree = list(self.post.comments.filter(
+                path__gte=bounds[0], path__lt=bounds[1]
+            ).order_by('path'))
+        self.assertEqual(subtree, [root, reply, deep])
+
+    @override_settings(COMMENT_THREAD_DEPTH=2)
+    def test_deep_replies_continue_on_thread_page(self):
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        self.comment('Глубоко', reply)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        shown = response.context['comments']
+        self.assertEqual([comment.text for comment in shown],
+                         ['Корень', 'Ответ'])
+        self.assertTrue(shown[1].more)
+        thread_url = reverse(
+            'posts:comment_thread', args=(self.post.id, reply.pk)
+        )
+        self.assertContains(response, thread_url)
+        response = self.client.get(thread_url)
+        self.assertEqual(response.context['root'], reply)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Глубоко']
+        )
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_top_comments_are_paginated(self):
+        first = self.comment('Первый')
+        self.comment('Второй')
+        third = self.comment('Третий')
+        self.comment('Ответ на третий', third)
+        self.comment('Ответ на первый', first)
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        response = self.client.get(url + '?page=2')
+        self.assertEqual(response.context['comments_page'].paginator.count, 3)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Третий', 'Ответ на третий']
+        )
+
+    def test_reply_deeper_than_limit_becomes_sibling(self):
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        Comment.objects.filter(pk=reply.pk).update(depth=threads.MAX_DEPTH)
+        reply.refresh_from_db()
+        deeper = self.comment('Ещё глубже', reply)
+        self.assertEqual(deeper.parent, root)
+
+    def test_delete_cascades_and_updates_counter(self):
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        self.comment('Ответ на ответ', reply)
+        reply.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 0)
+        self.assertEqual(list(self.post.comments.all()), [root])
+
+    def test_delete_user_removes_replies_to_their_comments(self):
+        root = self.comment('Корень', author=self.author)
+        kept = self.comment('Корень читателя')
+        reply = self.comment('Ответ', root)
+        self.comment('Ответ автору', kept, author=self.author)
+        other = Post.objects.create(author=self.reader, text='Пост читателя')
+        parent = Comment.objects.create(
+            post=other, author=self.reader, text='Вопрос'
+        )
+        answer = Comment.objects.create(
+            post=other, author=self.author, text='Ответ', parent=parent
+        )
+        Comment.objects.create(
+            post=other, author=self.reader, text='Спасибо', parent=answer
+        )
+        deletion.delete_user(self.author.pk)
+        self.assertFalse(Comment.objects.filter(pk=reply.pk).exists())
+        parent.refresh_from_db()
+        self.assertEqual(parent.replies_count, 0)
+        self.assertEqual(list(Comment.objects.all()), [parent])
+        self.assertEqual(
+            deletion.get_progress('user', self.author.pk)['steps'][
+                'comments'
+            ],
+            6
+        )
+
+    def test_archive_keeps_threads(self):
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        archive.archive_posts(days=365)
+        archived = ArchivedComment.objects.get(pk=reply.pk)
+        self.assertEqual(archived.parent_id, root.pk)
+        self.assertEqual(archived.path, reply.path)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Корень', 'Ответ']
+        )
+
+
+@override_settings(WRITE_BEHIND=True, WRITE_BEHIND_DIR=SPOOL_DIR)
+class WriteBehindRepliesTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.reader, text='Пост')
+        self.root = Comment.objects.create(
+            post=self.post, author=self.reader, text='Корень'
+        )
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_reply_is_linked_on_flush(self):
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Отложенный ответ', 'parent': self.root.pk}
+        )
+        thread_url = reverse(
+            'posts:comment_thread', args=(self.post.id, self.root.pk)
+        )
+        self.assertContains(self.client.get(thread_url), 'Отложенный ответ')
+        self.assertEqual(write_behind.flush(), 1)
+        reply = Comment.objects.get(text='Отложенный ответ')
+        self.root.refresh_from_db()
+        self.assertEqual(reply.parent, self.root)
+        self.assertEqual(reply.depth, 1)
+        self.assertEqual(reply.path, self.root.path + threads.segment(
+            reply.pk
+        ))
+        self.assertEqual(self.root.replies_count, 1)
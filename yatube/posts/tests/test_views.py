@@ -1,6 +1,8 @@
 from http import HTTPStatus
+import gzip
 import shutil
 import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
@@ -10,7 +12,8 @@ from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
-from posts.models import Post, Group, Follow
+from posts import versions
+from posts.models import Comment, Post, Group, Follow
 from posts.forms import PostForm
 
 
@@ -333,3 +336,106 @@ class PostsPagesTests(TestCase):
         )
         )
         self.assertEqual(Follow.objects.count(), 0)
+
+    def test_feed_pages_conditional_get(self):
+        """Неизменная страница группы отвечает 304 на If-None-Match,
+        новый пост в группе сбрасывает ETag."""
+        url = reverse('posts:group_list', args=(PostsPagesTests.group.slug,))
+        response = self.authorized_client.get(url)
+        etag = response['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(
+            text='Новый пост',
+            author=self.user_author,
+            group=PostsPagesTests.group
+        )
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_only_name_changes_reset_feed_pages(self):
+        """Регистрация и сохранение без смены имени не сбрасывают ETag
+        лент; переименование сбрасывает и ленту по старому имени."""
+        url = reverse('posts:group_list', args=(PostsPagesTests.group.slug,))
+        etag = self.authorized_client.get(url)['ETag']
+        User.objects.create_user(username='newcomer')
+        self.user_author.email = 'author@example.com'
+        self.user_author.save()
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        old_scope = versions.author_scope(self.user_author.username)
+        old_stamp, = versions.get_versions(old_scope)
+        self.user_author.username = 'renamed'
+        self.user_author.save()
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertGreater(versions.get_versions(old_scope)[0], old_stamp)
+
+    def test_post_stamp_is_bumped_again_after_commit(self):
+        """Страница, собранная под новым штампом до коммита
+        комментария, не переживёт коммит."""
+        post = Post.objects.create(text='Пост', author=self.user_author)
+        scope = versions.post_scope(post.pk)
+        with mock.patch('posts.versions.transaction.on_commit') as on_commit:
+            Comment.objects.create(post=post, author=self.user, text='Да')
+        before_commit, = versions.get_versions(scope)
+        for call in on_commit.call_args_list:
+            call[0][0]()
+        self.assertGreater(versions.get_versions(scope)[0], before_commit)
+
+    def test_feed_pages_cache_control(self):
+        """Страницы анонимов публичны, авторизованных - приватны."""
+        url = reverse('posts:profile', args=(self.user_author,))
+        response = Client().get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        response = self.authorized_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+    def test_page_cache_fills_personal_fragments(self):
+        """Каркас страницы общий, шапка и кнопки - свои у каждого."""
+        post = Post.objects.create(text='Пост', author=self.user_author)
+        url = reverse('posts:post_detail', args=(post.id,))
+        self.guest_client = Client()
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Войти')
+        response = self.authorized_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, self.user.username)
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertNotContains(response, 'hole:')
+        response = self.author.get(url)
+        self.assertContains(
+            response, reverse('posts:post_edit', args=(post.id,))
+        )
+
+    def test_page_cache_invalidated_by_comment(self):
+        """Новый комментарий сбрасывает кеш страницы поста."""
+        post = Post.objects.create(text='Пост', author=self.user_author)
+        url = reverse('posts:post_detail', args=(post.id,))
+        self.authorized_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(post.id,)),
+            {'text': 'Свежий комментарий'}
+        )
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_cached_page_served_precompressed(self):
+        """Страница из кеша отдаётся заранее сжатой."""
+        url = reverse('posts:group_list', args=(PostsPagesTests.group.slug,))
+        self.guest_client = Client(HTTP_ACCEPT_ENCODING='gzip')
+        first = self.guest_client.get(url)
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(
+            gzip.decompress(response.content),
+            gzip.decompress(first.content)
+        )
@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import write_behind
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+SPOOL_DIR = tempfile.mkdtemp()
+
+
+@override_settings(WRITE_BEHIND=True, WRITE_BEHIND_DIR=SPOOL_DIR)
+class WriteBehindTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def test_comment_is_visible_to_author_before_flush(self):
+        """Комментарий ставится в очередь, автор видит его сразу,
+        остальные - после записи в базу."""
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Отложенный комментарий'}
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertContains(self.client.get(url), 'Отложенный комментарий')
+        self.assertNotContains(Client().get(url), 'Отложенный комментарий')
+
+        self.assertEqual(write_behind.flush(), 1)
+        self.assertTrue(Comment.objects.filter(
+            post=self.post, author=self.reader, text='Отложенный комментарий'
+        ).exists())
+        self.assertContains(Client().get(url), 'Отложенный комментарий', 1)
+        self.assertContains(self.client.get(url), 'Отложенный комментарий', 1)
+
+    def test_follow_applies_last_operation(self):
+        """Подписка видна в ленте до записи; при сбросе побеждает
+        последняя операция."""
+        follow = reverse('posts:profile_follow', args=(self.author.username,))
+        unfollow = reverse(
+            'posts:profile_unfollow', args=(self.author.username,)
+        )
+        self.client.get(follow)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertIn(self.post, response.context['page_obj'])
+
+        self.client.get(unfollow)
+        self.client.get(follow)
+        self.assertEqual(write_behind.flush(), 1)
+        self.assertEqual(
+            Follow.objects.filter(
+                user=self.reader, author=self.author
+            ).count(),
+            1
+        )
+        self.assertEqual(write_behind.pending(self.reader), [])
+
+    def test_replayed_comment_is_saved_once(self):
+        """Пакет, применённый повторно после сбоя, не дублирует
+        комментарий."""
+        write_behind.enqueue_comment(self.reader, self.post, 'Один раз')
+        operations = [
+            (self.reader.pk, record)
+            for record in write_behind.pending(self.reader)
+        ]
+        write_behind.apply(operations)
+        write_behind.apply(operations)
+        self.assertEqual(
+            Comment.objects.filter(post=self.post, text='Один раз').count(),
+            1
+        )
+        write_behind.flush()
@@ -0,0 +1,158 @@
+"""Ветки комментариев.
+
+Комментарий хранит материализованный путь: id предков и свой, каждый
+дополнен нулями до PATH_STEP знаков. Порядок по path - обход дерева
+в глубину (ответы сразу после родителя, соседи - в порядке создания),
+а поддерево комментария - диапазон [path, следующий путь того же
+уровня). Поэтому ветка поста или любое поддерево выбираются одним
+запросом по индексу (post, path) без рекурсии.
+
+Путь содержит id, поэтому пишется после вставки (place, а для
+bulk_create - link). depth - уровень (0 у комментария к посту),
+replies_count - число прямых ответов. Ответ глубже MAX_DEPTH
+становится соседом родителя: длина пути ограничена столбцом.
+
+На странице показываются COMMENTS_PER_PAGE верхних комментариев
+с ответами до COMMENT_THREAD_DEPTH уровней; глубже - ссылка на
+страницу ветки.
+"""
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+
+PATH_STEP = 10
+
+MAX_DEPTH = 24
+
+PATH_LENGTH = PATH_STEP * (MAX_DEPTH + 1)
+
+
+def segment(pk):
+    return str(pk).zfill(PATH_STEP)
+
+
+def subtree_bounds(path):
+    """Пути поддерева комментария: [начало, конец)."""
+    head, last = path[:-PATH_STEP], int(path[-PATH_STEP:])
+    return path, head + segment(last + 1)
+
+
+def subtree_q(comments):
+    """Условие на поддеревья пар (id поста, путь)."""
+    conditions = []
+    for post_id, path in comments:
+        start, end = subtree_bounds(path)
+        conditions.append(
+            Q(post_id=post_id, path__gte=start, path__lt=end)
+        )
+    return reduce(or_, conditions)
+
+
+def reply_to(parent):
+    """Родитель ответа с учётом MAX_DEPTH."""
+    if parent is not None and parent.depth >= MAX_DEPTH:
+        return parent.parent
+    return parent
+
+
+def place(comment):
+    """Путь только что вставленного комментария и счётчик ответов
+    его родителя."""
+    rows = type(comment)._base_manager.using(comment._state.db)
+    parent = comment.parent
+    comment.path = (parent.path if parent else '') + segment(comment.pk)
+    rows.filter(pk=comment.pk).update(path=comment.path)
+    if parent is not None:
+        rows.filter(pk=parent.pk).update(
+            replies_count=F('replies_count') + 1
+        )
+
+
+def link(comments):
+    """Пути и счётчики для вставленных bulk_create комментариев
+    запроса comments (у них пустой path); возвращает их число."""
+    linked = list(
+        comments.filter(path='').select_related('parent').order_by('id')
+    )
+    for comment in linked:
+        parent = comment.parent
+        comment.path = (parent.path if parent else '') + segment(comment.pk)
+    rows = comments.model._base_manager.using(comments.db)
+    rows.bulk_update(linked, ['path'])
+    replies = Counter(comment.parent_id for comment in linked)
+    replies.pop(None, None)
+    for parent_id, count in replies.items():
+        rows.filter(pk=parent_id).update(
+            replies_count=F('replies_count') + count
+        )
+    return len(linked)
+
+
+def prune(rows, pks):
+    """Перед удалением комментариев rows в обход сигналов: удаляет
+    ответы на них и уменьшает счётчики оставшихся родителей.
+    Возвращает число удалённых ответов."""
+    comments = rows.model._base_manager.using(rows.db)
+    pks = set(pks)
+    found = list(rows.values_list('post_id', 'path', 'parent_id'))
+    if not found:
+        return 0
+    # Короткие OR: у SQLite ограничена глубина выражения.
+    replies = []
+    for start in range(0, len(found), 100):
+        chunk = found[start:start + 100]
+        replies += comments.filter(subtree_q(
+            (post_id, path) for post_id, path, _ in chunk
+        )).exclude(pk__in=pks).values_list('pk', flat=True)
+    removed = 0
+    for start in range(0, len(replies), 1000):
+        removed += comments.filter(
+            pk__in=replies[start:start + 1000]
+        )._raw_delete(rows.db)
+    parents = Counter(
+        parent_id for _, _, parent_id in found
+        if parent_id is not None and parent_id not in pks
+    )
+    for parent_id, count in parents.items():
+        comments.filter(pk=parent_id).update(
+            replies_count=F('replies_count') - count
+        )
+    return removed
+
+
+def page(comments, number, root=None):
+    """(страница верхних комментариев, комментарии для вывода).
+
+    comments - комментарии поста (post.comments.all()), root - корень
+    ветки или None для всего поста. Верхние комментарии страницы идут
+    подряд в порядке путей, поэтому они с ответами выбираются одним
+    запросом по диапазону от первого пути до конца поддерева последнего.
+    У каждого комментария level - уровень от верха страницы, а more -
+    есть ли не показанные здесь ответы."""
+    base = 0 if root is None else root.depth + 1
+    tops = comments.filter(depth=base)
+    if root is not None:
+        tops = tops.filter(parent=root)
+    page_obj = Paginator(
+        tops.order_by('path').values_list('path', flat=True),
+        settings.COMMENTS_PER_PAGE
+    ).get_page(number)
+    paths = list(page_obj)
+    if not paths:
+        return page_obj, []
+    depth = settings.COMMENT_THREAD_DEPTH
+    shown = list(
+        comments.filter(
+            path__gte=paths[0],
+            path__lt=subtree_bounds(paths[-1])[1],
+            depth__lt=base + depth
+        ).select_related('author').order_by('path')
+    )
+    for comment in shown:
+        comment.level = comment.depth - base
+        comment.more = comment.level == depth - 1 and comment.replies_count
+    return page_obj, shown
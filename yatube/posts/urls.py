@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, live, views
 
 app_name = 'posts'
 
@@ -23,6 +23,12 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    # Ветка комментария
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
     # Страница постов автора, на которых подписан пользователь
     path('follow/', views.follow_index, name='follow_index'),
     # Подписка на автора
@@ -37,4 +43,23 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    # Выгрузка данных пользователя
+    path('export/', views.export_data, name='export_data'),
+    # JSON API лент (только чтение)
+    path('api/v1/posts/', api.index, name='api_index'),
+    path(
+        'api/v1/group/<slug:slug>/',
+        api.group_posts,
+        name='api_group_list'
+    ),
+    path(
+        'api/v1/profile/<str:username>/',
+        api.profile,
+        name='api_profile'
+    ),
+    path('api/v1/follow/', api.follow_index, name='api_follow_index'),
+    # Новые посты в реальном времени (Server-Sent Events)
+    path('live/', live.index, name='live_index'),
+    path('live/group/<slug:slug>/', live.group_posts, name='live_group_list'),
+    path('live/follow/', live.follow_index, name='live_follow_index'),
 ]
@@ -1,5 +1,38 @@
+from functools import wraps
+
+from django.conf import settings
 from django.core.paginator import Paginator
-from yatube import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+
+def make_excerpt(text, length=None):
+    """Начало текста для карточки ленты: не длиннее length символов,
+    по границе слова. Возвращает (отрывок, число слов, обрезан ли)."""
+    length = length or settings.POST_EXCERPT_LENGTH
+    words = len(text.split())
+    if len(text) <= length:
+        return text, words, False
+    head = text[:length]
+    if not (text[length].isspace() or head[-1].isspace()):
+        # Слово на границе не рвём, если перед ним есть другие слова.
+        parts = head.rsplit(None, 1)
+        if len(parts) == 2:
+            head = parts[0]
+    return head.rstrip() + '…', words, True
+
+
+def pk_chunks(queryset, chunk_size):
+    """id строк пачками по возрастанию. Следующая пачка ищется после
+    последнего id, поэтому удалённые строки не мешают обходу."""
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        chunk = pks if last is None else pks.filter(pk__gt=last)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
 
 
 def paginate_page(request, post_list):
@@ -7,3 +40,24 @@ def paginate_page(request, post_list):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def feed_cache_control(view):
+    """Заголовки кеширования HTML-лент: страницы анонимов можно
+    хранить на обратном прокси, страницы авторизованных - только
+    в браузере и с обязательной перепроверкой."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=0,
+                s_maxage=settings.FEED_CACHE_S_MAXAGE
+            )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
@@ -0,0 +1,175 @@
+"""Штампы версий лент.
+
+Каждая лента (главная, группа, автор, подписки пользователя, пост)
+имеет в кеше штамп - время последнего изменения в наносекундах.
+Сигналы моделей поднимают штампы при записи, а представления строят
+из них ETag и Last-Modified, не обращаясь к базе данных.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+from core.db import routers
+
+KEY_PREFIX = 'feed_version:'
+
+INDEX = 'index'
+
+USERS = 'users'
+
+GROUPS = 'groups'
+
+RECOMMENDATIONS = 'recommendations'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def _key(scope):
+    """Слаги и имена пользователей могут содержать символы,
+    недопустимые в ключах memcached."""
+    return KEY_PREFIX + hashlib.md5(scope.encode()).hexdigest()
+
+
+def get_versions(*scopes):
+    """Штампы для набора лент. Отсутствующие в кеше штампы
+    инициализируются текущим временем."""
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, timeout=None)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, 0) for key in keys]
+
+
+def bump(*scopes):
+    """Помечает ленты изменёнными. Штамп строго растёт, даже если
+    две записи пришлись на один тик часов."""
+    keys = [_key(scope) for scope in scopes if scope]
+    current = cache.get_many(keys)
+    now = time.time_ns()
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys},
+        timeout=None
+    )
+
+
+def bump_twice(using, *scopes):
+    """Штампы поднимаются сразу и ещё раз после коммита в базе using:
+    страница или ETag, собранные под новым штампом по строкам до
+    коммита, не переживут его."""
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes), using=using)
+
+
+def last_modified(*scopes):
+    """Время последнего изменения самой свежей из лент."""
+    stamp = max(get_versions(*scopes))
+    return datetime.fromtimestamp(stamp / 1e9, tz=timezone.utc)
+
+
+def etag(*scopes, extra=''):
+    """Сильный ETag по штампам лент и дополнительному ключу."""
+    versions = ':'.join(str(version) for version in get_versions(*scopes))
+    return hashlib.md5(f'{versions}|{extra}'.encode()).hexdigest()
+
+
+def resolve_scopes(scope_funcs, request, *args, **kwargs):
+    """Имена лент, от которых зависит ответ представления. Имена
+    авторов и группы выводятся в карточках любой ленты."""
+    result = [USERS, GROUPS]
+    for func in scope_funcs:
+        scope = func(request, *args, **kwargs)
+        result += scope if isinstance(scope, tuple) else (scope,)
+    return result
+
+
+def page_key(*scope_funcs):
+    """Функция ключа для кеша страниц: меняется при записи
+    в любую из лент, от которых зависит страница."""
+    def key_func(request, *args, **kwargs):
+        names = resolve_scopes(scope_funcs, request, *args, **kwargs)
+        return ':'.join(str(version) for version in get_versions(*names))
+    return key_func
+
+
+def conditional(*scope_funcs, per_user=False, settle=0):
+    """Декоратор условных ответов (304) по штампам лент.
+
+    scope_funcs получают аргументы представления и возвращают имя ленты
+    или кортеж имён.
+    per_user - ответ зависит от пользователя (шапка, кнопки подписки).
+    settle - сколько секунд после изменения страница может отдаваться
+    из кеша фрагментов устаревшей; в это окно валидаторы не выдаются,
+    чтобы клиент не закрепил ETag за устаревшим содержимым. По той же
+    причине их нет у ответов, прочитанных с реплики: штампы уже новые,
+    а реплика может ещё отдавать старые данные.
+    """
+    def scopes(request, *args, **kwargs):
+        return resolve_scopes(scope_funcs, request, *args, **kwargs)
+
+    def settled(stamps):
+        return time.time_ns() >= max(stamps) + settle * 10 ** 9
+
+    def etag_func(request, *args, **kwargs):
+        names = scopes(request, *args, **kwargs)
+        if settle and not settled(get_versions(*names)):
+            return None
+        extra = request.get_full_path()
+        if per_user:
+            extra += f'|{request.user.pk}'
+        return etag(*names, extra=extra)
+
+    def last_modified_func(request, *args, **kwargs):
+        names = scopes(request, *args, **kwargs)
+        if settle and not settled(get_versions(*names)):
+            return None
+        return last_modified(*names)
+
+    validate = condition(
+        etag_func=etag_func,
+        last_modified_func=last_modified_func
+    )
+    return lambda view: _drop_replica_validators(validate(view))
+
+
+def _drop_replica_validators(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if _from_replica(response):
+            del response['ETag']
+            del response['Last-Modified']
+        return response
+    return wrapper
+
+
+def _from_replica(response):
+    """Ответ прочитан или ещё будет дочитан с реплики."""
+    if routers.replica_used():
+        return True
+    return (
+        response.streaming
+        and routers.replica_possible()
+        and not getattr(response, 'rendered_on_primary', False)
+    )
@@ -1,66 +1,170 @@
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
 
-from .models import Post, Group, Follow
+from core import streaming
+from core.db.routers import read_from_replica
+from core.db.sqlite import retry_on_locked
+from core.page_cache import cache_page_with_holes
+from core.views import prerendered_not_found
+from .models import Post, Follow
 from .forms import PostForm, CommentForm
-from . import utils
+from . import (
+    archive, existence, export, feeds, object_cache, shards, threads,
+    utils, versions, write_behind
+)
+from .recommendations import recommendations_for
+from .tasks import generate_thumbnail
 
 
 User = get_user_model()
 
 
+@read_from_replica
+@utils.feed_cache_control
+@versions.conditional(lambda request: versions.INDEX, per_user=True)
+@cache_page_with_holes(versions.page_key(lambda request: versions.INDEX))
 def index(request):
     """Все посты. Применяется паджинатор."""
-    post_list = Post.objects.select_related(
-        'author',
-        'group'
-    )
-    page_obj = utils.paginate_page(request, post_list)
+    page_obj = utils.paginate_page(request, feeds.index_feed())
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return streaming.render(request, 'posts/index.html', context)
 
 
+@existence.guard(existence.GROUP_SLUGS, 'slug')
+@read_from_replica
+@utils.feed_cache_control
+@versions.conditional(
+    lambda request, slug: versions.group_scope(slug),
+    per_user=True
+)
+@cache_page_with_holes(
+    versions.page_key(lambda request, slug: versions.group_scope(slug))
+)
 def group_posts(request, slug):
     """Посты группы. Применяется паджинатор."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author', 'group')
-    page_obj = utils.paginate_page(request, post_list)
+    group = object_cache.GROUPS.get_or_404(slug=slug)
+    page_obj = utils.paginate_page(request, feeds.group_feed(group))
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return streaming.render(request, 'posts/group_list.html', context)
 
 
+@existence.guard(existence.USERNAMES, 'username')
+@read_from_replica
+@utils.feed_cache_control
+@versions.conditional(
+    lambda request, username: versions.author_scope(username),
+    lambda request, username: versions.follow_scope(request.user.pk),
+    lambda request, username: versions.RECOMMENDATIONS,
+    per_user=True
+)
+@cache_page_with_holes(
+    versions.page_key(
+        lambda request, username: versions.author_scope(username)
+    )
+)
 def profile(request, username):
-    """Посты автора. Применяется паджинатор."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('author', 'group')
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=(User.objects.get(username=username))
-    ).exists()
-    page_obj = utils.paginate_page(request, post_list)
+    """Посты автора. Применяется паджинатор.
+    Кнопка подписки и рекомендации - персональный фрагмент
+    posts/includes/profile_actions.html."""
+    author = object_cache.USERS.get_or_404(username=username)
+    page_obj = utils.paginate_page(request, archive.author_posts(author))
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following
     }
-    return render(request, 'posts/profile.html', context)
+    return streaming.render(request, 'posts/profile.html', context)
 
 
+def post_related_scopes(request, post_id):
+    """Ленты, от которых зависит страница поста: число постов автора
+    и название группы. Пост с автором и группой берётся из кеша объектов."""
+    if not hasattr(request, 'post_related_scopes'):
+        post = archive.get_post(post_id)
+        scopes = ()
+        if post is not None:
+            scopes = (versions.author_scope(post.author.username),)
+            if post.group is not None:
+                scopes += (versions.group_scope(post.group.slug),)
+        request.post_related_scopes = scopes
+    return request.post_related_scopes
+
+
+@existence.guard(existence.POST_IDS, 'post_id')
+@read_from_replica
+@utils.feed_cache_control
+@versions.conditional(
+    lambda request, post_id: versions.post_scope(post_id),
+    post_related_scopes,
+    per_user=True
+)
+@cache_page_with_holes(
+    versions.page_key(
+        lambda request, post_id: versions.post_scope(post_id),
+        post_related_scopes
+    )
+)
 def post_detail(request, post_id):
-    """Страница поста: вывод подробной информации о посте"""
-    post = get_object_or_404(Post, id=post_id)
+    """Страница поста: вывод подробной информации о посте
+    и страница веток комментариев.
+    Архивный пост показывается без формы комментария."""
+    post = archive.get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
+    comments_page, comments = threads.page(
+        post.comments.all(), request.GET.get('page')
+    )
     context = {
         'post': post,
-        'form': form
+        'author_posts_count': archive.author_posts(post.author).count(),
+        'form': form,
+        'comments_page': comments_page,
+        'comments': comments,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return streaming.render(request, 'posts/post_detail.html', context)
+
+
+@existence.guard(existence.POST_IDS, 'post_id')
+@read_from_replica
+@utils.feed_cache_control
+@versions.conditional(
+    lambda request, post_id, comment_id: versions.post_scope(post_id),
+    per_user=True
+)
+@cache_page_with_holes(
+    versions.page_key(
+        lambda request, post_id, comment_id: versions.post_scope(post_id)
+    )
+)
+def comment_thread(request, post_id, comment_id):
+    """Ветка комментария: сам комментарий, ответы на него и форма
+    ответа.
+    Нет комментария - ответ 404 без исключения: existence.guard
+    запомнил бы Http404 как отсутствующий пост."""
+    post = archive.get_post_or_404(post_id)
+    root = post.comments.select_related('author').filter(
+        pk=comment_id
+    ).first()
+    if root is None:
+        return prerendered_not_found(request)
+    comments_page, comments = threads.page(
+        post.comments.all(), request.GET.get('page'), root
+    )
+    context = {
+        'post': post,
+        'root': root,
+        'comments_page': comments_page,
+        'comments': comments,
+    }
+    return streaming.render(request, 'posts/comment_thread.html', context)
 
 
 @login_required
@@ -72,7 +176,9 @@ def post_create(request):
         return render(request, 'posts/post_create.html', {'form': form})
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    retry_on_locked(post.save)()
+    if post.image:
+        retry_on_locked(generate_thumbnail.delay)(post.pk)
     return redirect('posts:profile', request.user)
 
 
@@ -81,7 +187,9 @@ def post_edit(request, post_id):
     """Редактирование поста - доступно только автору поста,
     если пользователь - не автор - переход на страницу поста.
     После успешного редактирования - переход на страницу поста"""
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        shards.on_post(Post.objects.all(), post_id), id=post_id
+    )
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -100,43 +208,84 @@ def post_edit(request, post_id):
                 'post': post
             }
         )
-    post = form.save()
-    post.save()
+    post = retry_on_locked(form.save)()
+    if 'image' in form.changed_data and post.image:
+        retry_on_locked(generate_thumbnail.delay)(post.pk)
     return redirect('posts:post_detail', post_id)
 
 
+def _reply_parent(post, parent_id):
+    """Комментарий поста, на который отвечают (POST-параметр parent),
+    или None."""
+    if not parent_id:
+        return None
+    if not parent_id.isdigit():
+        raise Http404('No Comment matches the given query.')
+    return get_object_or_404(post.comments.all(), pk=parent_id)
+
+
 @login_required
 def add_comment(request, post_id):
     """Добавление комментария к посту -
     доступно только авторизованному пользователю."""
-    post = get_object_or_404(Post, id=post_id)
+    post = object_cache.POSTS.get_or_404(pk=post_id)
     form = CommentForm(request.POST or None)
+    parent = _reply_parent(post, request.POST.get('parent'))
+    if parent is None:
+        done = redirect('posts:post_detail', post_id=post_id)
+    else:
+        done = redirect('posts:comment_thread', post_id, parent.pk)
     if not form.is_valid():
-        return redirect('posts:post_detail', post_id=post_id)
+        return done
+    if settings.WRITE_BEHIND:
+        write_behind.enqueue_comment(
+            request.user, post, form.cleaned_data['text'], parent
+        )
+        return done
     comment = form.save(commit=False)
     comment.author = request.user
     comment.post = post
-    comment.save()
-    return redirect('posts:post_detail', post_id=post_id)
+    comment.parent = parent
+    retry_on_locked(comment.save)()
+    return done
 
 
+@read_from_replica
 @login_required
+@utils.feed_cache_control
+@versions.conditional(
+    lambda request: versions.INDEX,
+    lambda request: versions.follow_scope(request.user.pk),
+    lambda request: versions.RECOMMENDATIONS,
+    per_user=True
+)
 def follow_index(request):
     """Страница постов авторов, на которых подписан
     пользователь."""
-    post_list = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
+    authors = None
+    pending = write_behind.pending_follows(request.user).values()
+    if pending:
+        authors = feeds.followed_authors(request.user)
+        for author_id, following in pending:
+            if following:
+                authors.add(author_id)
+            else:
+                authors.discard(author_id)
+    post_list = feeds.follow_feed(request.user, authors)
     page_obj = utils.paginate_page(request, post_list)
     context = {
         'page_obj': page_obj,
+        'recommendations': recommendations_for(request.user),
     }
-    return render(request, 'posts/follow.html', context)
+    return streaming.render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
+    if settings.WRITE_BEHIND and author != request.user:
+        write_behind.enqueue_follow(request.user, author)
+        return redirect('posts:follow_index')
     if (
         author == request.user
         or Follow.objects.filter(
@@ -145,7 +294,7 @@ def profile_follow(request, username):
         ).exists()
     ):
         return redirect('posts:profile', request.user)
-    Follow.objects.create(
+    retry_on_locked(Follow.objects.create)(
         user=request.user,
         author=(User.objects.get(username=username))
     )
@@ -154,10 +303,30 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
+    if settings.WRITE_BEHIND:
+        author = get_object_or_404(User, username=username)
+        write_behind.enqueue_follow(request.user, author, following=False)
+        return redirect('posts:index')
     unfollow = Follow.objects.filter(
         user=request.user,
         author=(User.objects.get(username=username))
     )
     if unfollow.exists():
-        unfollow.delete()
+        retry_on_locked(unfollow.delete)()
         return redirect('posts:index')
+
+
+@require_GET
+@never_cache
+@login_required
+def export_data(request):
+    """Архив с постами, комментариями, подписками и картинками
+    пользователя. Отдаётся потоком, см. posts.export."""
+    response = StreamingHttpResponse(
+        export.stream_export(request.user),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube-{request.user.username}.zip"'
+    )
+    return response
@@ -0,0 +1,298 @@
+"""Отложенная запись комментариев и подписок.
+
+При WRITE_BEHIND = True представления не пишут в базу, а дописывают
+операцию в файл очереди пользователя WRITE_BEHIND_DIR/<id>.jsonl
+(с fsync, поэтому операция переживает перезапуск). Команда
+flush_write_behind забирает файлы и применяет операции пакетами
+по WRITE_BEHIND_BATCH_SIZE в одной транзакции на пакет: комментарии -
+bulk_create, подписки - bulk_create и один delete.
+
+Пока операции не записаны, пользователь видит их поверх данных базы
+(read-your-writes): теги шаблонов и лента подписок читают его файл.
+Доставка «хотя бы один раз»: если процесс упадёт между commit
+и удалением файла, пакет применится повторно. Подписки при этом
+сходятся сами, а комментарий несёт ключ операции (Comment.write_key,
+уникальный) - повторная вставка пропускается.
+"""
+import fcntl
+import glob
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from . import feeds, shards, threads, versions
+from .models import Comment, Follow, Post
+
+User = get_user_model()
+
+FLUSHING_SUFFIX = '.flushing'
+
+
+def _path(user_id):
+    return os.path.join(settings.WRITE_BEHIND_DIR, f'{user_id}.jsonl')
+
+
+def _append(user_id, record):
+    os.makedirs(settings.WRITE_BEHIND_DIR, exist_ok=True)
+    path = _path(user_id)
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    while True:
+        with open(path, 'a', encoding='utf-8') as spool:
+            fcntl.flock(spool, fcntl.LOCK_EX)
+            # Пока ждали блокировку, файл могли забрать на запись в базу:
+            # тогда пишем в новый файл.
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                continue
+            if os.fstat(spool.fileno()).st_ino != current:
+                continue
+            spool.write(line)
+            spool.flush()
+            os.fsync(spool.fileno())
+            return
+
+
+def _read(path):
+    records = []
+    try:
+        with open(path, encoding='utf-8') as spool:
+            fcntl.flock(spool, fcntl.LOCK_SH)
+            for line in spool:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Недописанная строка после аварийного останова.
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def enqueue_comment(user, post, text, parent=None):
+    _append(user.pk, {
+        'type': 'comment',
+        'post_id': post.pk,
+        'parent_id': parent and parent.pk,
+        'text': text,
+        'created': time.time(),
+        'key': uuid.uuid4().hex,
+    })
+    versions.bump_twice(DEFAULT_DB_ALIAS, versions.post_scope(post.pk))
+
+
+def enqueue_follow(user, author, following=True):
+    _append(user.pk, {
+        'type': 'follow',
+        'author_id': author.pk,
+        'author': author.username,
+        'following': following,
+    })
+    versions.bump_twice(DEFAULT_DB_ALIAS, versions.follow_scope(user.pk))
+
+
+def pending(user):
+    """Незаписанные операции пользователя в порядке поступления."""
+    if not settings.WRITE_BEHIND or not user.is_authenticated:
+        return []
+    path = _path(user.pk)
+    records = []
+    for claimed in sorted(glob.glob(glob.escape(path) + FLUSHING_SUFFIX)):
+        records += _read(claimed)
+    return records + _read(path)
+
+
+def pending_comments(user, post_id, parent_id=None):
+    """Незаписанные комментарии к посту или ответы на parent_id."""
+    return [
+        Comment(post_id=post_id, author=user, text=record['text'])
+        for record in pending(user)
+        if record['type'] == 'comment' and record['post_id'] == post_id
+        and record.get('parent_id') == parent_id
+    ]
+
+
+def pending_follows(user):
+    """{имя автора: (id автора, подписан ли)} - последняя операция."""
+    return {
+        record['author']: (record['author_id'], record['following'])
+        for record in pending(user)
+        if record['type'] == 'follow'
+    }
+
+
+@contextmanager
+def _flush_lock():
+    os.makedirs(settings.WRITE_BEHIND_DIR, exist_ok=True)
+    path = os.path.join(settings.WRITE_BEHIND_DIR, 'flush.lock')
+    with open(path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _claim():
+    """Забирает файлы очереди: переименованный файл больше
+    не дописывается, новые операции идут в новый файл."""
+    pattern = os.path.join(glob.escape(settings.WRITE_BEHIND_DIR), '*')
+    claimed = glob.glob(pattern + '.jsonl' + FLUSHING_SUFFIX)
+    for path in glob.glob(pattern + '.jsonl'):
+        if path + FLUSHING_SUFFIX in claimed:
+            # Остался от прерванного сброса - сначала запишем его.
+            continue
+        os.rename(path, path + FLUSHING_SUFFIX)
+        claimed.append(path + FLUSHING_SUFFIX)
+    return sorted(claimed)
+
+
+def _user_id(path):
+    return int(os.path.basename(path).split('.', 1)[0])
+
+
+def apply(operations, batch_size=None):
+    """Применяет пары (id пользователя, операция) пакетами.
+    Возвращает число применённых операций."""
+    batch_size = batch_size or settings.WRITE_BEHIND_BATCH_SIZE
+    applied = 0
+    for start in range(0, len(operations), batch_size):
+        batch = operations[start:start + batch_size]
+        with transaction.atomic():
+            applied += _apply_batch(batch)
+    return applied
+
+
+def _targets(records):
+    """(id существующих постов, {(id поста, id): родитель}) для
+    комментариев пакета."""
+    post_ids = {record['post_id'] for record in records}
+    parent_ids = {record.get('parent_id') for record in records} - {None}
+    existing = set()
+    parents = {}
+    for db, ids in shards.by_post(post_ids).items():
+        existing.update(shards.on(Post.objects.all(), db).filter(
+            id__in=ids
+        ).values_list('id', flat=True))
+        if parent_ids:
+            parents.update(
+                ((parent.post_id, parent.pk), parent)
+                for parent in shards.on(Comment.objects.all(), db).filter(
+                    post_id__in=ids, pk__in=parent_ids
+                ).select_related('parent')
+            )
+    return existing, parents
+
+
+def _comments(records):
+    """Комментарии к существующим постам и родителям."""
+    post_ids, parents = _targets([record for _, record in records])
+    comments = []
+    for user_id, record in records:
+        parent = None
+        if record.get('parent_id') is not None:
+            parent = parents.get((record['post_id'], record['parent_id']))
+            if parent is None:
+                continue
+            parent = threads.reply_to(parent)
+        if record['post_id'] in post_ids:
+            comments.append(Comment(
+                post_id=record['post_id'],
+                author_id=user_id,
+                text=record['text'],
+                parent=parent,
+                depth=parent.depth + 1 if parent else 0,
+                write_key=record.get('key')
+            ))
+    return comments
+
+
+def _save_comments(comments):
+    """bulk_create на шарде поста; пути ответов - после вставки.
+    Комментарии с уже записанным ключом пропускаются."""
+    by_shard = {}
+    for comment in comments:
+        by_shard.setdefault(
+            shards.post_db(comment.post_id) or DEFAULT_DB_ALIAS, []
+        ).append(comment)
+    for db, shard_comments in by_shard.items():
+        # Транзакция пакета (apply) открыта только в основной базе.
+        with transaction.atomic(using=db):
+            Comment.objects.using(db).bulk_create(
+                shard_comments, ignore_conflicts=True
+            )
+            threads.link(Comment.objects.using(db).filter(
+                post_id__in={comment.post_id for comment in shard_comments}
+            ))
+
+
+def _apply_batch(batch):
+    user_ids = {user_id for user_id, _ in batch} | {
+        record['author_id'] for _, record in batch
+        if record['type'] == 'follow'
+    }
+    user_ids = set(User.objects.filter(
+        id__in=user_ids
+    ).values_list('id', flat=True))
+    comments = _comments([
+        (user_id, record) for user_id, record in batch
+        if record['type'] == 'comment' and user_id in user_ids
+    ])
+    follows = {}
+    for user_id, record in batch:
+        if record['type'] == 'follow' and (
+            {user_id, record['author_id']} <= user_ids
+        ):
+            follows[user_id, record['author_id']] = record['following']
+    _save_comments(comments)
+    added = [pair for pair, following in follows.items() if following]
+    removed = [pair for pair, following in follows.items() if not following]
+    if follows:
+        pairs = reduce(or_, (
+            Q(user_id=user_id, author_id=author_id)
+            for user_id, author_id in follows
+        ))
+        existing = set(
+            Follow.objects.filter(pairs).values_list('user_id', 'author_id')
+        )
+        Follow.objects.bulk_create([
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in added
+            if (user_id, author_id) not in existing
+        ])
+        if removed:
+            Follow.objects.filter(reduce(or_, (
+                Q(user_id=user_id, author_id=author_id)
+                for user_id, author_id in removed
+            ))).delete()
+    # bulk_create не отправляет сигналы - штампы лент поднимаем сами.
+    # Транзакция пакета открыта в основной базе, шарды коммитятся раньше.
+    versions.bump_twice(
+        DEFAULT_DB_ALIAS,
+        *{versions.post_scope(comment.post_id) for comment in comments},
+        *{versions.follow_scope(user_id) for user_id, _ in follows},
+    )
+    feeds.drop(*{feeds.follow_scope(user_id) for user_id, _ in follows})
+    return len(comments) + len(follows)
+
+
+def flush(batch_size=None):
+    """Записывает накопленные операции в базу.
+    Возвращает число применённых операций."""
+    with _flush_lock():
+        claimed = _claim()
+        operations = [
+            (_user_id(path), record)
+            for path in claimed
+            for record in _read(path)
+        ]
+        applied = apply(operations, batch_size)
+        for path in claimed:
+            os.remove(path)
+    return applied
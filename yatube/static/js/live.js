@@ -0,0 +1,19 @@
+// Новые посты приходят по Server-Sent Events и добавляются
+// в начало ленты без перезагрузки страницы.
+(function () {
+  var feed = document.getElementById('live-posts');
+  if (!feed || !window.EventSource) {
+    return;
+  }
+  var source = new EventSource(feed.dataset.url);
+  source.addEventListener('post', function (event) {
+    var data = JSON.parse(event.data);
+    if (document.getElementById('live-post-' + data.id)) {
+      return;
+    }
+    var card = document.createElement('div');
+    card.id = 'live-post-' + data.id;
+    card.innerHTML = data.html + '<hr>';
+    feed.insertBefore(card, feed.firstChild);
+  });
+})();
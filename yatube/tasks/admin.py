@@ -0,0 +1,28 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'created'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        queryset.update(
+            status=Task.PENDING,
+            attempts=0,
+            run_at=timezone.now(),
+            locked_at=None
+        )
+    retry.short_description = 'Перезапустить выбранные задачи'
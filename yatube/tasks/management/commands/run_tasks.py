@@ -0,0 +1,48 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.worker import work
+
+
+class Command(BaseCommand):
+    help = 'Рабочий процесс очереди фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.TASKS_CONCURRENCY,
+            help='Количество рабочих потоков'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        processed = []
+
+        def worker():
+            processed.append(work(stop, once=options['once']))
+
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            # Текущие задачи дорабатывают, новые не берутся.
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(
+            self.style.SUCCESS(f'Выполнено задач: {sum(processed)}')
+        )
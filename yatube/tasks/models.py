@@ -0,0 +1,59 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Задача в очереди. Выполненные задачи удаляются,
+    упавшие после всех попыток остаются со статусом failed."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(verbose_name='Задача', max_length=200)
+    payload = models.TextField(
+        verbose_name='Аргументы',
+        help_text='JSON: {"args": [...], "kwargs": {...}}'
+    )
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить не раньше',
+        default=timezone.now
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взята в работу',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ['run_at']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'],
+                name='task_status_run_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
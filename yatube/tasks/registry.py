@@ -0,0 +1,47 @@
+"""Объявление и постановка задач.
+
+    @task
+    def send_email(subject, body, from_email, recipient_list):
+        ...
+
+    send_email.delay('Тема', 'Текст', None, ['user@example.com'])
+
+Аргументы сериализуются в JSON, поэтому передаются id объектов,
+а не сами объекты. Задача ставится в той же транзакции, что и данные:
+при откате транзакции пропадает и задача. При TASKS_EAGER = True
+задача выполняется сразу, без очереди (разработка и тесты).
+"""
+import json
+
+from django.conf import settings
+
+from .models import Task
+
+_registry = {}
+
+
+def task(func):
+    name = f'{func.__module__}.{func.__name__}'
+    _registry[name] = func
+
+    def delay(*args, **kwargs):
+        return enqueue(name, *args, **kwargs)
+
+    func.delay = delay
+    return func
+
+
+def get(name):
+    return _registry.get(name)
+
+
+def enqueue(name, *args, **kwargs):
+    if name not in _registry:
+        raise LookupError(f'Задача {name} не объявлена')
+    if settings.TASKS_EAGER:
+        _registry[name](*args, **kwargs)
+        return None
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs})
+    )
@@ -0,0 +1,77 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tasks import worker
+from tasks.models import Task
+from tasks.registry import task
+
+User = get_user_model()
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task
+def flaky():
+    raise RuntimeError('Сбой')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_MAX_ATTEMPTS=2)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delayed_task_runs_in_worker(self):
+        """delay ставит задачу в очередь, рабочий выполняет
+        и удаляет её."""
+        remember.delay('значение')
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(worker.work(threading.Event(), once=True), 1)
+        self.assertEqual(calls, ['значение'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        flaky.delay()
+        with mock.patch('tasks.worker.logger'):
+            worker.drain()
+            retried = Task.objects.get()
+            self.assertEqual(retried.status, Task.PENDING)
+            self.assertEqual(retried.attempts, 1)
+            Task.objects.update(run_at=retried.created)
+            worker.drain()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertIn('Сбой', failed.last_error)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        remember.delay('сразу')
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_password_reset_email_is_sent_by_worker(self):
+        """Письмо восстановления пароля уходит не в запросе."""
+        User.objects.create_user(
+            username='user', email='user@example.com', password='secret'
+        )
+        self.client.post(
+            reverse('users:password_reset'),
+            {'email': 'user@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        # Ссылка с токеном в очередь не попадает.
+        self.assertNotIn('reset/', Task.objects.get().payload)
+        worker.drain()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
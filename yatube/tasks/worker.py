@@ -0,0 +1,122 @@
+"""Выполнение задач из очереди.
+
+Задача захватывается условным UPDATE: из нескольких рабочих процессов
+строку получит только тот, у кого обновление затронуло одну строку.
+Задача, зависшая в работе дольше TASKS_LOCK_TIMEOUT (процесс упал),
+захватывается заново. Упавшая задача повторяется с экспоненциальной
+задержкой, после TASKS_MAX_ATTEMPTS попыток получает статус failed.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import registry
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+CLAIM_CANDIDATES = 10
+
+
+def _stale(now):
+    return now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+
+
+def _claimable(now):
+    return Task.objects.filter(
+        Q(status=Task.PENDING, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_at__lt=_stale(now)),
+        attempts__lt=settings.TASKS_MAX_ATTEMPTS
+    )
+
+
+def claim():
+    """Захватывает одну готовую к запуску задачу или возвращает None."""
+    now = timezone.now()
+    Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=_stale(now),
+        attempts__gte=settings.TASKS_MAX_ATTEMPTS
+    ).update(
+        status=Task.FAILED,
+        last_error='Рабочий процесс не завершил задачу'
+    )
+    candidates = list(
+        _claimable(now).values_list('id', flat=True)[:CLAIM_CANDIDATES]
+    )
+    for task_id in candidates:
+        claimed = _claimable(now).filter(id=task_id).update(
+            status=Task.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def run(task):
+    """Выполняет захваченную задачу. Возвращает True при успехе."""
+    func = registry.get(task.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {task.name} не объявлена')
+        payload = json.loads(task.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s (id=%s) упала', task.name, task.id)
+        _failed(task, traceback.format_exc())
+        return False
+    Task.objects.filter(id=task.id).delete()
+    return True
+
+
+def _failed(task, error):
+    if task.attempts >= settings.TASKS_MAX_ATTEMPTS:
+        status, run_at = Task.FAILED, task.run_at
+    else:
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+        status = Task.PENDING
+        run_at = timezone.now() + timedelta(seconds=delay)
+    Task.objects.filter(id=task.id).update(
+        status=status,
+        run_at=run_at,
+        locked_at=None,
+        last_error=error
+    )
+
+
+def work(stop, once=False, poll_interval=None):
+    """Цикл рабочего потока. stop - threading.Event для остановки,
+    once - выйти, когда очередь опустеет."""
+    poll_interval = poll_interval or settings.TASKS_POLL_INTERVAL
+    processed = 0
+    while not stop.is_set():
+        close_old_connections()
+        task = claim()
+        if task is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run(task)
+        processed += 1
+    close_old_connections()
+    return processed
+
+
+def drain():
+    """Выполняет все готовые задачи в текущем потоке (для тестов)."""
+    processed = 0
+    task = claim()
+    while task is not None:
+        run(task)
+        processed += 1
+        task = claim()
+    return processed
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from posts.admin import BackgroundDeleteMixin
+from posts.tasks import delete_user
+
+User = get_user_model()
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class YatubeUserAdmin(BackgroundDeleteMixin, UserAdmin):
+    background_delete_task = delete_user
@@ -1,5 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.sites.shortcuts import get_current_site
+
+from .tasks import send_password_reset
 
 
 User = get_user_model()
@@ -9,3 +12,28 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо собирает и отправляет фоновая задача; в задачу попадает
+    только id пользователя, а ссылка с токеном создаётся в рабочем
+    процессе (всегда default_token_generator)."""
+    def save(self, domain_override=None,
+             subject_template_name='registration/password_reset_subject.txt',
+             email_template_name='registration/password_reset_email.html',
+             use_https=False, token_generator=None, from_email=None,
+             request=None, html_email_template_name=None,
+             extra_email_context=None):
+        if domain_override:
+            site_name = domain = domain_override
+        else:
+            current_site = get_current_site(request)
+            site_name = current_site.name
+            domain = current_site.domain
+        for user in self.get_users(self.cleaned_data['email']):
+            send_password_reset.delay(
+                user.pk, domain, site_name,
+                'https' if use_https else 'http',
+                subject_template_name, email_template_name,
+                from_email, html_email_template_name
+            )
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mail
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from tasks.registry import task
+
+User = get_user_model()
+
+
+@task
+def send_email(subject, body, from_email, recipient_list, html_message=None):
+    send_mail(
+        subject,
+        body,
+        from_email,
+        recipient_list,
+        html_message=html_message
+    )
+
+
+@task
+def send_password_reset(user_id, domain, site_name, protocol,
+                        subject_template_name, email_template_name,
+                        from_email=None, html_email_template_name=None):
+    """Токен и ссылка создаются в рабочем процессе: в очереди задач
+    (и в админке упавших задач) хранится только id пользователя."""
+    user = User._default_manager.filter(pk=user_id, is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return
+    email = getattr(user, User.get_email_field_name())
+    context = {
+        'email': email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context, from_email,
+        email, html_email_template_name=html_email_template_name
+    )
@@ -9,6 +9,7 @@ from django.contrib.auth.views import (
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -34,7 +35,10 @@ urlpatterns = [
     # Страница восстановления пароля
     path(
         'password_reset/',
-        PasswordResetView.as_view(template_name='users/password_reset.html'),
+        PasswordResetView.as_view(
+            template_name='users/password_reset.html',
+            form_class=QueuedPasswordResetForm
+        ),
         name='password_reset'
     ),
     # Сообщение об отправке ссылки для восстановления пароля
@@ -0,0 +1,29 @@
+"""
+ASGI config for yatube project.
+
+Запуск: uvicorn yatube.asgi:application (или любой ASGI-сервер).
+Представления выполняются в пуле из ASGI_THREADS потоков,
+см. core.asgi.
+"""
+
+import os
+
+from django.conf import settings
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+# Потоки событий живых лент не занимают рабочие процессы сервера.
+os.environ.setdefault('LIVE_FEED', 'True')
+
+from core.asgi import get_asgi_application  # noqa: E402
+
+application = get_asgi_application()
+
+if settings.TEMPLATE_WARMUP:
+    from core.templates_warmup import warm_up_templates
+
+    warm_up_templates()
+
+if settings.EXISTENCE_FILTER_WARMUP:
+    from posts.existence import warm_up as warm_up_existence_filters
+
+    warm_up_existence_filters()
@@ -0,0 +1,33 @@
+"""Профиль настроек выбирается переменной окружения DJANGO_ENV:
+dev (по умолчанию), test или prod."""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# Общий файл окружения проекта лежит рядом с requirements.txt. В нём
+# значения для разработки (DEBUG, заглушка SECRET_KEY), поэтому
+# продакшен его не читает.
+if os.getenv('DJANGO_ENV') != 'prod':
+    load_dotenv(os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__))
+        ))),
+        'yatube.env'
+    ))
+
+_environment = os.getenv('DJANGO_ENV', 'dev')
+
+if _environment == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif _environment == 'test':
+    from .test import *  # noqa: F401,F403
+elif _environment == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(
+        f'Неизвестный профиль настроек DJANGO_ENV={_environment!r}, '
+        'ожидается dev, test или prod'
+    )
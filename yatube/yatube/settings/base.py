@@ -0,0 +1,334 @@
+"""Общие настройки всех профилей (dev, test, prod)."""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def env_bool(name, default=False):
+    """Переменная окружения как флаг: строка 'False' - это False."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+SECRET_KEY = str(os.getenv('SECRET_KEY'))
+
+DEBUG = env_bool('DEBUG')
+
+ALLOWED_HOSTS = [
+    'www.yatube4mariasfriends.pythonanywhere.com',
+    'yatube4mariasfriends.pythonanywhere.com',
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'tasks.apps.TasksConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+POSTS_PER_PAGE = 10
+
+# Верхних комментариев на странице поста и уровней ответов под ними
+# (глубже - ссылка на страницу ветки, см. posts.threads).
+COMMENTS_PER_PAGE = 20
+
+COMMENT_THREAD_DEPTH = 3
+
+API_MAX_LIMIT = 100
+
+# Длина отрывка поста в карточках лент, символов.
+POST_EXCERPT_LENGTH = 300
+
+FEED_CACHE_S_MAXAGE = 30
+
+PAGE_CACHE_ENABLED = True
+
+PAGE_CACHE_TIMEOUT = 300
+
+COMPRESSION_MIN_LENGTH = 200
+
+TEMPLATE_WARMUP = False
+
+# Потоковый рендер лент и страницы поста (core.streaming).
+STREAMING_RENDER = env_bool('STREAMING_RENDER')
+
+STREAMING_MIN_CHUNK = 1024
+
+RECOMMENDATIONS_PER_USER = 5
+
+RECOMMENDATIONS_FOF_WEIGHT = 1.0
+
+RECOMMENDATIONS_COFOLLOW_WEIGHT = 1.0
+
+# Подписчиков автора в выборке для совместных подписок.
+RECOMMENDATIONS_MAX_FOLLOWERS = 200
+
+# Отложенная запись комментариев и подписок (posts.write_behind).
+WRITE_BEHIND = env_bool('WRITE_BEHIND')
+
+WRITE_BEHIND_DIR = os.path.join(BASE_DIR, 'spool')
+
+WRITE_BEHIND_BATCH_SIZE = 500
+
+# Очередь фоновых задач (приложение tasks). С TASKS_EAGER задачи
+# выполняются сразу, без рабочего процесса run_tasks.
+TASKS_EAGER = env_bool('TASKS_EAGER')
+
+TASKS_CONCURRENCY = int(os.getenv('TASKS_CONCURRENCY', 2))
+
+TASKS_MAX_ATTEMPTS = 5
+
+TASKS_RETRY_DELAY = 10
+
+TASKS_LOCK_TIMEOUT = 300
+
+TASKS_POLL_INTERVAL = 1
+
+# Удаление пользователей и групп пачками (posts.deletion).
+DELETION_CHUNK_SIZE = 1000
+
+# Выгрузка данных пользователя (posts.export): строк на одну выборку
+# курсора и байт в одной части потока.
+EXPORT_CURSOR_SIZE = 2000
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Архив старых постов (posts.archive): возраст поста в днях и постов
+# в одной пачке переноса.
+ARCHIVE_AFTER_DAYS = 365
+
+ARCHIVE_BATCH_SIZE = 500
+
+# Живые ленты (posts.live). Соединение всё время держит поток, поэтому
+# по умолчанию они включены только под ASGI (yatube.asgi); под WSGI
+# открытые вкладки заняли бы рабочие потоки сервера.
+LIVE_FEED = env_bool('LIVE_FEED')
+
+# Длительность соединения и пинга в секундах.
+LIVE_MAX_DURATION = 55
+
+LIVE_HEARTBEAT = 15
+
+LIVE_RETRY_MS = 3000
+
+LIVE_QUEUE_SIZE = 100
+# Фильтры существования объектов для быстрых 404 (core.existence).
+EXISTENCE_FILTER_WARMUP = False
+
+EXISTENCE_FILTER_MIN_CAPACITY = 10000
+
+EXISTENCE_FILTER_ERROR_RATE = 0.01
+
+EXISTENCE_NEGATIVE_TIMEOUT = 60
+
+# Кеш объектов постов, групп и пользователей (core.object_cache).
+OBJECT_CACHE_TIMEOUT = 300
+
+# Ленты как списки id в кеше (posts.feeds): сколько id хранить
+# на ленту и сколько секунд.
+FEED_IDS_MAX = 5000
+
+FEED_IDS_TIMEOUT = 60 * 60
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# Потоков для представлений при запуске через yatube.asgi.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 10))
+
+# Одновременных потоков живых лент (posts.live). Каждый держит поток
+# пула, поэтому половина пула остаётся обычным представлениям.
+LIVE_MAX_STREAMS = int(
+    os.getenv('LIVE_MAX_STREAMS', max(1, ASGI_THREADS // 2))
+)
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'yatube'),
+            'USER': os.getenv('POSTGRES_USER', 'yatube'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Соединение возвращается в пул в конце каждого запроса.
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                'check_interval': float(
+                    os.getenv('DB_POOL_CHECK_INTERVAL', 30)
+                ),
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f'Неизвестный DB_ENGINE={DB_ENGINE!r}, ожидается sqlite или postgresql'
+    )
+
+# Реплика только для чтения: для SQLite - путь к копии файла базы,
+# для PostgreSQL - хост реплики. В тестах реплика - та же база.
+DB_REPLICA = os.getenv('DB_REPLICA')
+
+DATABASE_REPLICAS = []
+
+if DB_REPLICA:
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        TEST={'MIRROR': 'default'},
+        **{'HOST' if DB_ENGINE == 'postgresql' else 'NAME': DB_REPLICA}
+    )
+    DATABASE_REPLICAS.append('replica')
+
+# Шарды постов и комментариев (posts.shards): через запятую пути к файлам
+# SQLite или имена баз PostgreSQL на том же сервере. Основная база -
+# всегда первый шард. Число шардов после начала записи не меняется.
+DB_SHARDS = [name for name in os.getenv('DB_SHARDS', '').split(',') if name]
+
+DATABASE_SHARDS = ['default']
+
+for number, name in enumerate(DB_SHARDS, start=1):
+    alias = f'shard_{number}'
+    DATABASES[alias] = dict(DATABASES['default'], NAME=name)
+    if DB_ENGINE == 'postgresql':
+        DATABASES[alias]['TEST'] = {'NAME': f'test_{name}'}
+    DATABASE_SHARDS.append(alias)
+
+# id постов выдаются из общего счётчика блоками по столько штук.
+SHARD_ID_BLOCK = 100
+
+DATABASE_ROUTERS = [
+    'posts.shards.ShardRouter',
+    'core.db.routers.ReplicaRouter',
+]
+
+# Сколько секунд после записи чтения пользователя идут в основную базу.
+REPLICA_PIN_SECONDS = 10
+
+# Выполняются при открытии каждого соединения с SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_LOCK_RETRIES = 3
+
+SQLITE_LOCK_RETRY_DELAY = 0.05
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+STATIC_URL = '/static/'
+
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.storage.CompressedStaticFilesStorage'
+
+LOGIN_URL = 'users:login'
+
+LOGIN_REDIRECT_URL = 'posts:index'
+
+# LOGOUT_REDIRECT_URL = 'posts:index'
@@ -0,0 +1,17 @@
+"""Локальная разработка: DEBUG и debug_toolbar."""
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE, env_bool
+
+ENVIRONMENT = 'dev'
+
+DEBUG = env_bool('DEBUG', default=True)
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+TASKS_EAGER = env_bool('TASKS_EAGER', default=True)
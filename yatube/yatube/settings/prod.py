@@ -0,0 +1,56 @@
+"""Продакшен: без отладки, с кешированным загрузчиком шаблонов
+и постоянными соединениями с базой данных."""
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, TEMPLATES, env_bool
+
+ENVIRONMENT = 'prod'
+
+DEBUG = env_bool('DEBUG')
+
+if DEBUG:
+    raise ImproperlyConfigured(
+        'Профиль prod нельзя запускать с DEBUG=True'
+    )
+
+# Заглушка из yatube.env.
+PLACEHOLDER_SECRET_KEYS = {'MY_SECRET_KEY'}
+
+if os.getenv('SECRET_KEY', '') in PLACEHOLDER_SECRET_KEYS | {''}:
+    raise ImproperlyConfigured('Для профиля prod задайте SECRET_KEY')
+
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+TEMPLATE_WARMUP = True
+
+EXISTENCE_FILTER_WARMUP = True
+
+# Штампы версий, кеш страниц, фильтры существования и списки лент
+# общие для всех рабочих процессов: кеш в памяти процесса не подходит
+# (см. core.checks).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211').split(','),
+    }
+}
+
+DATABASES = copy.deepcopy(DATABASES)
+# У PostgreSQL с пулом CONN_MAX_AGE уже задан: соединения живут в пуле.
+DATABASES['default'].setdefault(
+    'CONN_MAX_AGE', int(os.getenv('CONN_MAX_AGE', 60))
+)
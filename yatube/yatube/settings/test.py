@@ -0,0 +1,23 @@
+"""Прогон тестов: без отладочных инструментов, быстрый хешер паролей,
+письма в памяти, фоновые задачи без очереди."""
+from .base import *  # noqa: F401,F403
+from .base import DATABASES
+
+ENVIRONMENT = 'test'
+
+DEBUG = False
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+TASKS_EAGER = True
+
+# Второй шард для тестов шардирования: включается в тесте через
+# override_settings(DATABASE_SHARDS=...).
+if 'shard_1' not in DATABASES:
+    DATABASES['shard_1'] = dict(DATABASES['default'])
+    if 'sqlite3' not in DATABASES['default']['ENGINE']:
+        DATABASES['shard_1']['TEST'] = {
+            'NAME': f"test_{DATABASES['default']['NAME']}_shard_1"
+        }
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATE_WARMUP:
+    from core.templates_warmup import warm_up_templates
+
+    warm_up_templates()
+
+if settings.EXISTENCE_FILTER_WARMUP:
+    from posts.existence import warm_up as warm_up_existence_filters
+
+    warm_up_existence_filters()